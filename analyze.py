@@ -0,0 +1,245 @@
+'''
+=====================================================================================================================================================
+FILE		: analyze.py
+DESCRIPTION	: runs search.find_win over a stream of positions in a bounded process pool, with checkpoints to resume an interrupted job
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import search
+import solver
+import transposition
+import json
+import os
+import sys
+import time
+import argparse
+import concurrent.futures
+
+#Default number of positions submitted to the pool and not yet written, per worker
+WINDOW = 4
+
+#Checkpoint is written after this many results
+CHECKPOINT_EVERY = 100
+
+#Entries of the transposition table of every worker process
+WORKER_TABLE_SIZE = 1 << 18
+
+#Transposition table and exact solver of a worker process, kept between positions
+worker_table = None
+worker_solver = None
+
+#======================================================== SECTION: MAIN FUNCTIONS ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: analyze
+#PARAMETERS	: input_path (one position per line: JSON object with 'moves' and optional 'id', or a move string as Board.move_string()),
+#		  output_path (JSONL results), depth (None solves every position exactly with solver.Solver),
+#		  workers (processes, defaults to number of cores),
+#		  window (positions submitted and not yet written, defaults to WINDOW per worker), ordered (write results in input order,
+#		  otherwise as they finish), checkpoint (path of checkpoint file, an existing checkpoint resumes the job)
+#DESCRIPTION	: reads positions one line at a time and never holds more than 'window' of them, so memory does not grow with the input
+#		  Every result holds the 'id' of its position (line number if the input has none)
+#RETURNS	: number of positions analyzed by this call
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def analyze(input_path, output_path, depth, workers = None, window = None, ordered = True, checkpoint = None):
+
+	if workers is None:
+		workers = os.cpu_count() or 1
+	if window is None:
+		window = WINDOW * workers
+
+	state = load_checkpoint(checkpoint)
+	if state is None:
+		state = {'prefix': 0, 'input_offset': 0, 'output_offset': 0, 'done': []}
+
+	#Results written after the checkpoint are dropped and computed again
+	with open(output_path, 'ab') as out:
+		out.truncate(state['output_offset'])
+
+	#index of every position not yet written: (input offset of its line, future or result)
+	pending = {}
+	skip = set(state['done'])
+	prefix = state['prefix']
+	analyzed = 0
+
+	with open(input_path, 'rb') as f, open(output_path, 'ab') as out, concurrent.futures.ProcessPoolExecutor(max_workers = workers, initializer = init_worker) as pool:
+		f.seek(state['input_offset'])
+		index = prefix
+		since_checkpoint = 0
+		eof = False
+
+		while not eof or pending:
+
+			#Fill the window
+			while not eof and len(pending) < window:
+				offset = f.tell()
+				line = f.readline()
+				if not line:
+					eof = True
+					break
+				if index not in skip and line.strip():
+					pending[index] = (offset, pool.submit(analyze_task, (index, line, depth)))
+				index += 1
+
+			if not pending:
+				break
+
+			#Backpressure: wait until something finishes before reading more
+			running = [entry[1] for entry in pending.values() if isinstance(entry[1], concurrent.futures.Future)]
+			if running:
+				concurrent.futures.wait(running, return_when = concurrent.futures.FIRST_COMPLETED)
+
+			for i in sorted(pending):
+				offset, entry = pending[i]
+				if isinstance(entry, concurrent.futures.Future) and entry.done():
+					pending[i] = (offset, entry.result())
+
+			#Write finished results, in ordered mode only the finished ones in front of the first unfinished one
+			for i in sorted(pending):
+				offset, entry = pending[i]
+				if isinstance(entry, concurrent.futures.Future):
+					if ordered:
+						break
+					continue
+				out.write((json.dumps(entry) + '\n').encode())
+				del pending[i]
+				skip.add(i)
+				analyzed += 1
+				since_checkpoint += 1
+
+			#All lines below the first pending one are written (or blank)
+			first = min(pending) if pending else index
+			prefix = first
+			skip = set(i for i in skip if i >= prefix)
+
+			if checkpoint is not None and since_checkpoint >= CHECKPOINT_EVERY:
+				input_offset = pending[first][0] if pending else f.tell()
+				save_checkpoint(checkpoint, out, prefix, input_offset, skip)
+				since_checkpoint = 0
+
+		if checkpoint is not None:
+			save_checkpoint(checkpoint, out, prefix, f.tell(), skip)
+
+	return analyzed
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: main
+#PARAMETERS	: argv (command line arguments)
+#DESCRIPTION	: command line entry point
+#		  usage: python analyze.py INPUT OUTPUT [--depth D | --solve] [--workers N] [--window W] [--unordered] [--checkpoint FILE]
+#RETURNS	: exit status
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def main(argv):
+
+	parser = argparse.ArgumentParser(description = 'run find_win over a file of positions')
+	parser.add_argument('input', help = 'JSONL or move string file, one position per line')
+	parser.add_argument('output', help = 'JSONL file of results')
+	parser.add_argument('--depth', type = int, default = 8, help = 'search depth')
+	parser.add_argument('--workers', type = int, default = None, help = 'number of processes')
+	parser.add_argument('--window', type = int, default = None, help = 'positions in flight')
+	parser.add_argument('--unordered', action = 'store_true', help = 'write results as they finish')
+	parser.add_argument('--checkpoint', default = None, help = 'checkpoint file, resumes the job if it exists')
+	parser.add_argument('--solve', action = 'store_true', help = 'exact score and distance to the end instead of find_win')
+	args = parser.parse_args(argv)
+
+	depth = None if args.solve else args.depth
+	n = analyze(args.input, args.output, depth, args.workers, args.window, not args.unordered, args.checkpoint)
+	print(str(n) + ' positions analyzed')
+	return 0
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: HELPER FUNCTIONS =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: init_worker
+#PARAMETERS	: none
+#DESCRIPTION	: creates the transposition table and the solver of a worker process
+#RETURNS	: none
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def init_worker():
+	global worker_table, worker_solver
+	worker_table = transposition.TranspositionTable(WORKER_TABLE_SIZE)
+	worker_solver = solver.Solver(None, WORKER_TABLE_SIZE)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: analyze_task
+#PARAMETERS	: task (index, input line as bytes, depth or None to solve)
+#DESCRIPTION	: parses a line and runs find_win on its position or solves it, runs in a worker process
+#RETURNS	: dictionary with id, moves and result (or score, plies to the end and best move when solving),
+#		  or id and error for a line which is not a legal position or a position the solver gives up on at its node limit
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def analyze_task(task):
+
+	index, line, depth = task
+	line = line.decode().strip()
+	ident = index
+
+	try:
+		if line.startswith('{'):
+			record = json.loads(line)
+			ident = record.get('id', index)
+			moves = record['moves']
+		else:
+			moves = line
+		b = board.Board.from_moves(moves)
+		if b.last_move_won() or len(b.legal_moves()) == 0:
+			raise ValueError('game is over')
+	except (ValueError, KeyError, TypeError) as e:
+		return {'id': ident, 'error': str(e)}
+
+	start = time.perf_counter()
+	if depth is None:
+		try:
+			score, mov = worker_solver.best_move(b)
+		except search.SearchTimeout:
+			return {'id': ident, 'moves': b.move_string(), 'error': 'node limit reached', 'time': time.perf_counter() - start}
+		return {'id': ident, 'moves': b.move_string(), 'score': score, 'plies': worker_solver.plies(b, score), 'move': mov, 'time': time.perf_counter() - start}
+
+	result = search.find_win(b, depth, worker_table)
+	return {'id': ident, 'moves': b.move_string(), 'result': result, 'time': time.perf_counter() - start}
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: load_checkpoint
+#PARAMETERS	: path (or None)
+#DESCRIPTION	: reads a checkpoint written by save_checkpoint()
+#RETURNS	: dictionary or None if there is no checkpoint
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def load_checkpoint(path):
+	if path is None or not os.path.exists(path):
+		return None
+	with open(path) as f:
+		return json.load(f)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: save_checkpoint
+#PARAMETERS	: path, out (output file), prefix (lines below it are written), input_offset (offset of line 'prefix'),
+#		  done (lines at or above prefix already written, at most one window of them)
+#DESCRIPTION	: flushes output and replaces the checkpoint file in one step, so that an interrupted job finds either checkpoint complete
+#RETURNS	: none
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def save_checkpoint(path, out, prefix, input_offset, done):
+	out.flush()
+	os.fsync(out.fileno())
+
+	state = {'prefix': prefix, 'input_offset': input_offset, 'output_offset': out.tell(), 'done': sorted(done)}
+	with open(path + '.tmp', 'w') as f:
+		json.dump(state, f)
+	os.replace(path + '.tmp', path)
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,358 @@
+'''
+=====================================================================================================================================================
+FILE		: benchmark.py
+DESCRIPTION	: benchmarks of make/unmake, perft, find_win and get_move, with JSON output and comparison against a stored baseline
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import state_graph
+import search
+import computer
+import random
+import time
+import json
+import sys
+import argparse
+import tracemalloc
+
+#Starting positions for perft and find_win, as move sequences
+POSITIONS = {
+	'empty': (),
+	'opening': (3, 3, 2, 4),
+	'Q2': (0, 2, 0),
+	'midgame': (3, 3, 3, 2, 4, 4, 2, 5, 1, 3, 2, 2),
+}
+
+#Default allowed slowdown before a metric counts as a regression (fraction of baseline)
+THRESHOLD = 0.10
+
+#======================================================== SECTION: MAIN FUNCTIONS ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: run
+#PARAMETERS	: quick (smaller depths and fewer repetitions)
+#DESCRIPTION	: runs all benchmarks
+#RETURNS	: dictionary {metric name: {'value': number, 'unit': string, 'better': 'higher' / 'lower'}}
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def run(quick = False):
+
+	results = {}
+	repeat = 1 if quick else 3
+
+	for backend in ('bitboard', 'graph'):
+		results['make_unmake.' + backend] = metric(make_unmake(backend, 200 if quick else 1000, repeat), 'pairs/s', 'higher')
+
+	for name, moves in POSITIONS.items():
+		for depth in ((4,) if quick else (4, 6)):
+			results['perft.' + name + '.d' + str(depth)] = metric(perft_speed(moves, depth, repeat), 'nodes/s', 'higher')
+
+	latencies = find_win_latency(4 if quick else 6, 10 if quick else 30)
+	for p in (50, 90, 99):
+		results['find_win.p' + str(p)] = metric(percentile(latencies, p), 's', 'lower')
+
+	latencies = get_move_latency(2 if quick else 5)
+	for p in (50, 90, 99):
+		results['get_move.p' + str(p)] = metric(percentile(latencies, p), 's', 'lower')
+
+	for backend in ('bitboard', 'graph'):
+		results['memory.board.' + backend] = metric(board_memory(backend), 'bytes', 'lower')
+	results['memory.graph'] = metric(graph_memory(), 'bytes', 'lower')
+
+	return results
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: compare
+#PARAMETERS	: results, baseline (results of an earlier run), threshold (allowed change as a fraction of baseline)
+#DESCRIPTION	: finds metrics which got worse than baseline by more than threshold
+#RETURNS	: list of (metric name, baseline value, new value, relative change)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def compare(results, baseline, threshold = THRESHOLD):
+
+	regressions = []
+	for name, new in results.items():
+		old = baseline.get(name)
+		if old is None or old['value'] == 0:
+			continue
+
+		change = (new['value'] - old['value']) / old['value']
+		if new['better'] == 'higher':
+			worse = change < -threshold
+		else:
+			worse = change > threshold
+
+		if worse:
+			regressions.append((name, old['value'], new['value'], change))
+
+	return regressions
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: main
+#PARAMETERS	: argv (command line arguments)
+#DESCRIPTION	: runs benchmarks, writes JSON and compares against a baseline file
+#		  usage: python benchmark.py [--quick] [--output FILE] [--baseline FILE] [--threshold FRACTION] [--save-baseline]
+#RETURNS	: exit status, 1 if a metric regressed
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def main(argv):
+
+	parser = argparse.ArgumentParser(description = 'connect four benchmarks')
+	parser.add_argument('--quick', action = 'store_true', help = 'smaller depths and fewer repetitions')
+	parser.add_argument('--output', default = 'bench_output.txt', help = 'file to write results to (JSON)')
+	parser.add_argument('--baseline', default = None, help = 'results of an earlier run to compare against')
+	parser.add_argument('--threshold', type = float, default = THRESHOLD, help = 'allowed change as a fraction of baseline')
+	parser.add_argument('--save-baseline', action = 'store_true', help = 'also write results to the baseline file')
+	args = parser.parse_args(argv)
+
+	results = run(args.quick)
+
+	with open(args.output, 'w') as f:
+		json.dump(results, f, indent = 1, sort_keys = True)
+
+	for name in sorted(results):
+		print(name.ljust(32) + '%.6g %s' % (results[name]['value'], results[name]['unit']))
+
+	status = 0
+	if args.baseline is not None:
+		if args.save_baseline:
+			with open(args.baseline, 'w') as f:
+				json.dump(results, f, indent = 1, sort_keys = True)
+		else:
+			with open(args.baseline) as f:
+				baseline = json.load(f)
+			for name, old, new, change in compare(results, baseline, args.threshold):
+				print('REGRESSION ' + name + ': %.6g -> %.6g (%+.1f%%)' % (old, new, change * 100))
+				status = 1
+
+	return status
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: BENCHMARKS =======================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: make_unmake
+#PARAMETERS	: backend, games (number of random games replayed), repeat
+#DESCRIPTION	: replays random games move by move and takes them back
+#RETURNS	: make_move / unmake_last_move pairs per second (best of 'repeat' runs)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def make_unmake(backend, games, repeat):
+
+	rng = random.Random(1)
+	sequences = [random_game(rng) for i in range(games)]
+	pairs = sum(len(s) for s in sequences)
+
+	best = 0.0
+	for r in range(repeat):
+		b = board.Board(backend)
+		start = time.perf_counter()
+		for moves in sequences:
+			for mov in moves:
+				b.make_move(mov)
+			for mov in moves:
+				b.unmake_last_move()
+		best = max(best, pairs / (time.perf_counter() - start))
+
+	return best
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: perft_speed
+#PARAMETERS	: moves (starting position), depth, repeat
+#DESCRIPTION	: runs search.perft from a position
+#RETURNS	: leaf nodes per second (best of 'repeat' runs)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def perft_speed(moves, depth, repeat):
+
+	best = 0.0
+	for r in range(repeat):
+		b = board.Board()
+		for mov in moves:
+			b.make_move(mov)
+		start = time.perf_counter()
+		nodes = search.perft(b, depth)
+		best = max(best, nodes / (time.perf_counter() - start))
+
+	return best
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: find_win_latency
+#PARAMETERS	: depth, count (number of random positions)
+#DESCRIPTION	: times search.find_win on random positions
+#RETURNS	: list of times in seconds
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def find_win_latency(depth, count):
+
+	rng = random.Random(2)
+	times = []
+	for i in range(count):
+		b = random_position(rng, rng.randint(0, 20))
+		start = time.perf_counter()
+		search.find_win(b, depth)
+		times.append(time.perf_counter() - start)
+
+	return times
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: get_move_latency
+#PARAMETERS	: games (number of games computer.Player plays against itself)
+#DESCRIPTION	: times every computer.Player.get_move call of whole games
+#RETURNS	: list of times in seconds
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def get_move_latency(games):
+
+	random.seed(3)
+	times = []
+	for g in range(games):
+		with computer.Player() as p1, computer.Player() as p2:
+			players = [p1, p2]
+			b = board.Board()
+
+			#random first moves give different games
+			for i in range(2):
+				mov = random.choice(b.generate_moves())
+				b.make_move(mov)
+				for p in players:
+					p.make_move(mov)
+
+			i = 0
+			while not b.last_move_won() and len(b.generate_moves()) > 0:
+				start = time.perf_counter()
+				mov = players[i].get_move()
+				times.append(time.perf_counter() - start)
+				b.make_move(mov)
+				for p in players:
+					p.make_move(mov)
+				i ^= 1
+
+	return times
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: board_memory
+#PARAMETERS	: backend
+#DESCRIPTION	: measures memory of a board after a long game
+#RETURNS	: peak number of bytes allocated for one board
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def board_memory(backend):
+	moves = random_game(random.Random(4), True)
+
+	def create():
+		b = board.Board(backend)
+		for mov in moves:
+			b.make_move(mov)
+		return b
+
+	return peak_memory(create)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: graph_memory
+#PARAMETERS	: none
+#DESCRIPTION	: measures memory of a state_graph.Graph holding 21 stones
+#RETURNS	: peak number of bytes allocated for one graph
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def graph_memory():
+
+	def create():
+		g = state_graph.Graph()
+		n = 0
+		for col in range(board.WIDTH):
+			for row in range(0, board.HEIGHT, 2):
+				n += 1
+				g.insert_node(n, row, col)
+		return g
+
+	return peak_memory(create)
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: HELPER FUNCTIONS =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: metric
+#PARAMETERS	: value, unit, better ('higher' / 'lower')
+#DESCRIPTION	: builds a result entry
+#RETURNS	: dictionary
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def metric(value, unit, better):
+	return {'value': value, 'unit': unit, 'better': better}
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: percentile
+#PARAMETERS	: values, p (0 - 100)
+#DESCRIPTION	: nearest rank percentile
+#RETURNS	: value
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def percentile(values, p):
+	values = sorted(values)
+	if len(values) == 0:
+		return 0.0
+	return values[min(len(values) - 1, int(len(values) * p / 100))]
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: peak_memory
+#PARAMETERS	: create (function returning a new object)
+#DESCRIPTION	: traces memory allocated while the object is created
+#RETURNS	: peak number of bytes
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def peak_memory(create):
+	tracemalloc.start()
+	obj = create()
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return peak
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: random_game
+#PARAMETERS	: rng (random.Random), long (keep playing until the board is full, ignoring wins)
+#DESCRIPTION	: plays a random game
+#RETURNS	: list of moves
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def random_game(rng, long = False):
+	b = board.Board()
+	while len(b.generate_moves()) > 0 and (long or not b.last_move_won()):
+		b.make_move(rng.choice(b.generate_moves()))
+	return list(b.moves)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: random_position
+#PARAMETERS	: rng (random.Random), plies
+#DESCRIPTION	: plays up to 'plies' random moves, stopping before a winning move
+#RETURNS	: board
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def random_position(rng, plies):
+	b = board.Board()
+	for i in range(plies):
+		b.make_move(rng.choice(b.generate_moves()))
+		if b.last_move_won():
+			b.unmake_last_move()
+			break
+	return b
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -8,36 +8,789 @@ EMAIL	: rrrane@indiana.edu
 
 
 import state_graph
+import random
+import struct
+
+#Backend used when Board() is created without an explicit 'backend' argument
+#'bitboard'	: two integer masks plus column heights (fast)
+#'graph'	: original state_graph.Graph representation (kept for comparison)
+DEFAULT_BACKEND = 'bitboard'
+
+#Board dimensions of the standard game, other sizes are created with Board(backend, width, height, connect)
+WIDTH = 7
+HEIGHT = 6
+
+#Number of connected stones needed to win
+CONNECT = 4
+
+#Each column occupies HEIGHT + 1 bits, the extra bit acts as a separator so that shifts do not wrap between columns
+H1 = HEIGHT + 1
+
+#Widest board supported, Geometry.moves has an entry for every legal-move mask
+MAX_WIDTH = 16
+
+#Binary record of a position: Board.key() as unsigned 64 bit little endian
+RECORD = struct.Struct('<Q')
+
+#Tables of every board size created so far, by (width, height, connect)
+GEOMETRIES = {}
+
+class Geometry:
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: width, height, connect
+	#DESCRIPTION	: builds the lookup tables of one board size, use geometry() to share them between boards
+	#		  Raises ValueError for an unsupported size
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def __init__(self, width, height, connect):
+		
+		if not 1 <= width <= MAX_WIDTH or height < 1 or connect < 1:
+			raise ValueError('unsupported board: ' + str(width) + 'x' + str(height) + ', connect ' + str(connect))
+		
+		self.width = width
+		self.height = height
+		self.connect = connect
+		self.h1 = h1 = height + 1
+		cells = width * h1
+		
+		#Zobrist keys: zobrist[player][col * h1 + row] is a random 64-bit number for a stone of 'player' in that cell
+		#A fixed seed keeps hashes identical across processes and runs
+		rng = random.Random(20161018)
+		self.zobrist = [[rng.getrandbits(64) for i in range(cells)] for p in range(2)]
+		
+		#mirror_zobrist[player][cell] is the key of the cell reflected left to right, gives hash of the mirror image of the position
+		self.mirror_zobrist = [[self.zobrist[p][(width - 1 - (i // h1)) * h1 + i % h1] for i in range(cells)] for p in range(2)]
+		
+		#bit[cell] is 1 << cell, looked up instead of shifting on every move
+		self.bit = [1 << i for i in range(cells)]
+		
+		#moves[legal] is the tuple of columns whose bits are set in the legal-move mask 'legal'
+		self.moves = [tuple(col for col in range(width) if legal & (1 << col)) for legal in range(1 << width)]
+		
+		#Legal-move mask of the empty board
+		self.all_moves = (1 << width) - 1
+		
+		#Lowest bit of every column, used by Board.key()
+		self.bottom = sum(1 << (col * h1) for col in range(width))
+		
+		#Shifts of connected(): a run of 'connect' stones is found by doubling runs, e.g. 1 + 1 + 2 for four
+		steps = []
+		k = 1
+		while k < connect:
+			steps.append(min(k, connect - k))
+			k += steps[-1]
+		self.shifts = [[d * j for j in steps] for d in (h1, h1 + 1, h1 - 1, 1)]
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: connected
+	#PARAMETERS	: mask (bitboard of a single player)
+	#DESCRIPTION	: checks whether the bitboard contains 'connect' connected stones, same as the module function connected() for
+	#		  any size: every step keeps the stones which start a run twice as long, so only log2(connect) shifts per direction
+	#RETURNS	: True / False
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def connected(self, mask):
+		for shifts in self.shifts:
+			m = mask
+			for s in shifts:
+				m &= m >> s
+			if m:
+				return True
+		return False
+	#____________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: geometry
+#PARAMETERS	: width, height, connect
+#DESCRIPTION	: returns the tables of a board size, built once per size
+#RETURNS	: Geometry
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def geometry(width = WIDTH, height = HEIGHT, connect = CONNECT):
+	size = (width, height, connect)
+	if size not in GEOMETRIES:
+		GEOMETRIES[size] = Geometry(width, height, connect)
+	return GEOMETRIES[size]
+#____________________________________________________________________________________________________________________________________________________
+
+#Tables of the standard board, used directly by the fast path of Board
+STANDARD = geometry()
+ZOBRIST = STANDARD.zobrist
+MIRROR_ZOBRIST = STANDARD.mirror_zobrist
+BIT = STANDARD.bit
+MOVES = STANDARD.moves
+ALL_MOVES = STANDARD.all_moves
+BOTTOM = STANDARD.bottom
+
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: connected
+#PARAMETERS	: mask (bitboard of a single player)
+#DESCRIPTION	: checks whether the bitboard of the standard board contains four connected stones using shift-and-mask operations
+#RETURNS	: True / False
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def connected(mask):
+	
+	#horizontal
+	m = mask & (mask >> H1)
+	if m & (m >> (2 * H1)):
+		return True
+	
+	#diagonal1 ( / )
+	m = mask & (mask >> (H1 + 1))
+	if m & (m >> (2 * (H1 + 1))):
+		return True
+	
+	#diagonal2 ( \ )
+	m = mask & (mask >> (H1 - 1))
+	if m & (m >> (2 * (H1 - 1))):
+		return True
+	
+	#vertical
+	m = mask & (mask >> 1)
+	if m & (m >> 2):
+		return True
+	
+	return False
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: mirror_key
+#PARAMETERS	: key (Board.key() or a bitboard), width, height (board size)
+#DESCRIPTION	: reflects the columns of a key or bitboard left to right
+#RETURNS	: integer
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def mirror_key(key, width = WIDTH, height = HEIGHT):
+	h1 = height + 1
+	column = (1 << h1) - 1
+	mirrored = 0
+	for col in range(width):
+		mirrored |= ((key >> (col * h1)) & column) << ((width - 1 - col) * h1)
+	return mirrored
+#____________________________________________________________________________________________________________________________________________________
 
 class Board:
 	
+	#Fixed set of attributes: no per-instance dictionary, make_move / unmake_last_move only update these in place
+	__slots__ = ('current_state', 'position', 'moves', 'base', 'hash', 'mirror', 'lmw', 'player', 'legal')
+	
+	backend = 'bitboard'
+	
+	#Size of the standard board, boards of any other size are SizedBoard objects holding their own
+	geometry = STANDARD
+	width = WIDTH
+	height = HEIGHT
+	connect = CONNECT
+	
 	#===================================================== SECTION: CONSTRUCTOR =================================================================
 	
-	def __init__(self):
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __new__
+	#PARAMETERS	: backend ('bitboard' / 'graph', defaults to DEFAULT_BACKEND), width, height, connect (stones in a row needed to win)
+	#DESCRIPTION	: selects the class implementing requested backend and size
+	#RETURNS	: new board object
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def __new__(cls, backend = None, width = WIDTH, height = HEIGHT, connect = CONNECT):
+		
+		if backend is None:
+			backend = DEFAULT_BACKEND
+		
+		if backend not in ('bitboard', 'graph'):
+			raise ValueError('unknown board backend: ' + str(backend))
+		
+		#Board() with graph backend creates the original graph based board
+		#Bitboards of any size but the standard one read their tables from a Geometry instead of module globals
+		if cls is Board and backend == 'graph':
+			cls = GraphBoard
+		elif cls is Board and (width, height, connect) != (WIDTH, HEIGHT, CONNECT):
+			cls = SizedBoard
+		
+		return object.__new__(cls)
+	#____________________________________________________________________________________________________________________________________________
+	
+	def __init__(self, backend = None, width = WIDTH, height = HEIGHT, connect = CONNECT):
 		
 		#Initialize pointers to all columns
-		self.current_state = [0,0,0,0,0,0,0]
+		#current_state[i] is the row where next stone in column 'i' will land
+		self.current_state = [0] * self.width
+		
+		#Initialize bitboards for both the players
+		#Bit (col * H1 + row) is set if player owns the cell
+		self.position = [0, 0]
+		
+		#List of moves made so far, used by unmake_last_move()
+		self.moves = []
+		
+		#Number of stones placed before the first move of the list, set for boards decoded from a key which have no move history
+		self.base = 0
+		
+		#Zobrist hash of the position, updated incrementally by make_move() / unmake_last_move()
+		self.hash = 0
+		
+		#Zobrist hash of the mirror image of the position, equal to hash if the position is symmetric
+		self.mirror = 0
+		
+		#lmw: Variable to store 'last-move-won' status
+		#Initialized to False
+		self.lmw = False
+		
+		#player: player who will make a move now
+		self.player = 0
+		
+		#legal: bit 'col' is set while column 'col' is not full
+		self.legal = self.geometry.all_moves
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: copy
+	#PARAMETERS	: none
+	#DESCRIPTION	: creates an independent board in the same position, copies three short lists
+	#		  Boards are picklable, a copy can be handed to a worker process
+	#RETURNS	: new board
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def copy(self):
+		b = object.__new__(Board)
+		b.current_state = self.current_state[:]
+		b.position = self.position[:]
+		b.moves = self.moves[:]
+		b.base = self.base
+		b.hash = self.hash
+		b.mirror = self.mirror
+		b.lmw = self.lmw
+		b.player = self.player
+		b.legal = self.legal
+		return b
+	#____________________________________________________________________________________________________________________________________________
+	#========================================================== END SECTION =====================================================================	
+
+	#====================================================== SECTION: FUNCTION ===================================================================
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME 		: generate_moves():
+	#PARAMETERS	: none
+	#DESCRIPTION	: A function to find columns available to make a move
+	#RETURNS	: list of possible moves
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def generate_moves(self):
+		return list(MOVES[self.legal])
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME 		: legal_moves
+	#PARAMETERS	: none
+	#DESCRIPTION	: same as generate_moves(), but returns a shared tuple instead of a new list, used by the search
+	#RETURNS	: tuple of possible moves
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def legal_moves(self):
+		return MOVES[self.legal]
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME 		: make_move
+	#PARAMETERS 	: move
+	#DESCRIPTION	: makes a move for a current player
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def make_move(self, move):
+		
+		#Set the bit of the cell where stone lands and increase pointer to the column 'move' by 1
+		player = self.player
+		row = self.current_state[move]
+		self.current_state[move] = row + 1
+		cell = move * H1 + row
+		mask = self.position[player] | BIT[cell]
+		self.position[player] = mask
+		self.hash ^= ZOBRIST[player][cell]
+		self.mirror ^= MIRROR_ZOBRIST[player][cell]
+		
+		#Column becomes full
+		if row == HEIGHT - 1:
+			self.legal ^= 1 << move
+		
+		self.moves.append(move)
+		
+		#Only the player who just moved can have won
+		self.lmw = connected(mask)
+		
+		#Switch to other player
+		self.player ^= 1
+		pass
+	
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: unmake_last_move
+	#PARAMETERS	: none
+	#DESCRIPTION	: restores previous state of the board
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def unmake_last_move(self):
+		
+		#Check if there is a move to take back, stones of a decoded position are not moves
+		if self.moves:
+			
+			#Switch player to previous
+			self.player ^= 1
+			
+			#Clear the bit of the last stone and update column pointer to previous
+			move = self.moves.pop()
+			row = self.current_state[move] - 1
+			self.current_state[move] = row
+			cell = move * H1 + row
+			self.position[self.player] ^= BIT[cell]
+			self.hash ^= ZOBRIST[self.player][cell]
+			self.mirror ^= MIRROR_ZOBRIST[self.player][cell]
+			
+			if row == HEIGHT - 1:
+				self.legal |= 1 << move
+			
+			#A game never continues after a win, so previous position was not won
+			self.lmw = False
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: last_move_won
+	#PARAMETERS	: none
+	#DESCRIPTION	: returns 'True' if last move resulted in win for any player and 'False' otherwise
+	#RETURNS	: self.lmw [True / False]
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def last_move_won(self):
+		return self.lmw
+	#____________________________________________________________________________________________________________________________________________
+ 	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __str__
+	#PARAMETERS	: none
+	#DESCRIPTION 	: returns current state of the board as a string
+	#RETURNS	: state
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	 
+	def __str__(self):
+		state = ''
+		for i in range(self.height):
+			row = ''
+			for j in range(self.width):
+				bit = 1 << (j * self.geometry.h1 + i)
+				if self.position[0] & bit:
+					row = row + '\to'
+				elif self.position[1] & bit:
+					row = row + '\tx'
+				else:
+					row = row + '\t-'
+			state = row + '\n' + state
+		return state
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: get_player
+	#PARAMETERS	: none
+	#DESCRIPTION	: returns current player
+	#RETURNS	: self.player
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def get_player(self):
+		return self.player
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: is_first_move
+	#PARAMETERS	: none
+	#DESCRIPTION	: returns 'True' if current player has not played yet and 'False' otherwise
+	#RETURNS	: True / False
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def is_first_move(self):
+		return self.stones() < 2
+	#___________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: empty_cells
+	#PARAMETERS	: none
+	#DESCRIPTION	: returns number of cells which are still empty
+	#RETURNS	: number of empty cells
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def empty_cells(self):
+		return self.width * self.height - self.stones()
+	#___________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: stones
+	#PARAMETERS	: none
+	#DESCRIPTION	: returns number of stones on the board, including stones of a decoded position which are not in moves
+	#RETURNS	: number of stones
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def stones(self):
+		return self.base + len(self.moves)
+	#___________________________________________________________________________________________________________________________________________
+	#=========================================================== END SECTION ===================================================================
+
+	#====================================================== SECTION: ENCODINGS ==================================================================
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: key
+	#PARAMETERS	: none
+	#DESCRIPTION	: encodes the position in width * (height + 1) bits (49 for 7x6): stones of the player to move + mask of all stones + bottom
+	#		  In every column the highest set bit marks the height and the bits below it are stones of the player to move,
+	#		  so the key is unique and Board.from_key() decodes it. Move order is not part of the key
+	#RETURNS	: integer
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def key(self):
+		return self.position[self.player] + (self.position[0] | self.position[1]) + self.geometry.bottom
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: canonical_key
+	#PARAMETERS	: none
+	#DESCRIPTION	: smaller of key() and key of the mirror image, equal for a position and its mirror image
+	#RETURNS	: integer
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def canonical_key(self):
+		key = self.key()
+		return min(key, mirror_key(key, self.width, self.height))
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: canonical_hash
+	#PARAMETERS	: none
+	#DESCRIPTION	: smaller of hash and mirror hash, equal for a position and its mirror image
+	#		  A table keyed by canonical_hash() has to store moves mirrored when hash is not the smaller one
+	#RETURNS	: integer
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def canonical_hash(self):
+		return min(self.hash, self.mirror)
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: is_symmetric
+	#PARAMETERS	: none
+	#DESCRIPTION	: checks whether the position is its own mirror image, moves 'col' and width - 1 - col then lead to mirrored positions
+	#RETURNS	: True / False
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def is_symmetric(self):
+		return self.hash == self.mirror
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: move_string
+	#PARAMETERS	: none
+	#DESCRIPTION	: encodes moves as a string of column numbers counted from 1, e.g. '4453'
+	#		  Raises ValueError for a board decoded from a key, its move order is not known
+	#RETURNS	: string
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def move_string(self):
+		if self.base:
+			raise ValueError('position decoded from a key has no move history')
+		return ''.join(str(mov + 1) for mov in self.moves)
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: record
+	#PARAMETERS	: none
+	#DESCRIPTION	: encodes the position as a fixed width binary record (RECORD, 8 bytes)
+	#		  Raises ValueError if the key of the board size does not fit in 64 bits
+	#RETURNS	: bytes
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def record(self):
+		if self.width * self.geometry.h1 > 64:
+			raise ValueError('positions of a ' + str(self.width) + 'x' + str(self.height) + ' board do not fit in a record')
+		return RECORD.pack(self.key())
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: from_moves
+	#PARAMETERS	: moves (columns counted from 0, or a move string as returned by move_string()), width, height, connect
+	#DESCRIPTION	: builds a bitboard position directly from the moves, without checking for wins after every move
+	#		  Raises ValueError for a move into a full or missing column
+	#RETURNS	: new board
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	@staticmethod
+	def from_moves(moves, width = WIDTH, height = HEIGHT, connect = CONNECT):
+		
+		if isinstance(moves, str):
+			moves = [int(c) - 1 for c in moves]
+		
+		h1 = height + 1
+		position = [0, 0]
+		heights = [0] * width
+		player = 0
+		for mov in moves:
+			if not 0 <= mov < width or heights[mov] == height:
+				raise ValueError('illegal move: ' + str(mov))
+			position[player] |= 1 << (mov * h1 + heights[mov])
+			heights[mov] += 1
+			player ^= 1
+		
+		return Board.from_position(position, heights, list(moves), width, height, connect)
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: from_key
+	#PARAMETERS	: key (returned by key()), width, height, connect (size of the board the key was made on)
+	#DESCRIPTION	: decodes a key. As the key holds no move order, the new board has no move history: moves is empty and base
+	#		  counts the stones, unmake_last_move() only takes back moves made after from_key() and move_string() raises ValueError
+	#		  Raises ValueError for an invalid key
+	#RETURNS	: new board
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	@staticmethod
+	def from_key(key, width = WIDTH, height = HEIGHT, connect = CONNECT):
+		
+		h1 = height + 1
+		own, mask = 0, 0
+		heights = []
+		for col in range(width):
+			bits = (key >> (col * h1)) & ((1 << h1) - 1)
+			h = bits.bit_length() - 1
+			if h < 0:
+				raise ValueError('invalid key: ' + str(key))
+			heights.append(h)
+			own |= (bits ^ (1 << h)) << (col * h1)
+			mask |= ((1 << h) - 1) << (col * h1)
+		
+		if key >> (width * h1):
+			raise ValueError('invalid key: ' + str(key))
+		
+		player = sum(heights) & 1
+		position = [0, 0]
+		position[player] = own
+		position[player ^ 1] = mask ^ own
+		
+		return Board.from_position(position, heights, [], width, height, connect)
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: from_record
+	#PARAMETERS	: data (bytes returned by record()), width, height, connect
+	#DESCRIPTION	: decodes a binary record, see from_key()
+	#RETURNS	: new board
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	@staticmethod
+	def from_record(data, width = WIDTH, height = HEIGHT, connect = CONNECT):
+		return Board.from_key(RECORD.unpack(data)[0], width, height, connect)
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: from_position
+	#PARAMETERS	: position (bitboards of both players), heights (column heights), moves (the last moves made, stones not
+	#		  in the list are counted in base), width, height, connect
+	#DESCRIPTION	: builds a bitboard board from its parts, hash, legal-move mask, player to move and win status are computed
+	#RETURNS	: new board
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	@staticmethod
+	def from_position(position, heights, moves, width = WIDTH, height = HEIGHT, connect = CONNECT):
+		
+		g = geometry(width, height, connect)
+		if g is STANDARD:
+			b = object.__new__(Board)
+		else:
+			b = object.__new__(SizedBoard)
+			b.set_geometry(g)
+		b.position = list(position)
+		b.current_state = list(heights)
+		b.moves = moves
+		b.base = sum(heights) - len(moves)
+		b.player = sum(heights) & 1
+		
+		#hash of every set bit, lowest bit first
+		h, mh = 0, 0
+		for player in (0, 1):
+			zobrist = g.zobrist[player]
+			mirror = g.mirror_zobrist[player]
+			m = position[player]
+			while m:
+				low = m & -m
+				cell = low.bit_length() - 1
+				h ^= zobrist[cell]
+				mh ^= mirror[cell]
+				m ^= low
+		b.hash = h
+		b.mirror = mh
+		
+		legal = 0
+		for col in range(width):
+			if heights[col] < height:
+				legal |= 1 << col
+		b.legal = legal
+		
+		b.lmw = g.connected(position[b.player ^ 1])
+		return b
+	#____________________________________________________________________________________________________________________________________________
+	#=========================================================== END SECTION ===================================================================
+
+#Bitboard of any size other than the standard one, created by Board(backend, width, height, connect)
+#Same representation as Board, tables are read from the board's Geometry instead of module globals
+class SizedBoard(Board):
+	
+	__slots__ = ('geometry', 'width', 'height', 'connect')
+	
+	#===================================================== SECTION: CONSTRUCTOR =================================================================
+	
+	def __init__(self, backend = None, width = WIDTH, height = HEIGHT, connect = CONNECT):
+		self.set_geometry(geometry(width, height, connect))
+		Board.__init__(self)
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: set_geometry
+	#PARAMETERS	: g (Geometry)
+	#DESCRIPTION	: sets size of the board
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def set_geometry(self, g):
+		self.geometry = g
+		self.width = g.width
+		self.height = g.height
+		self.connect = g.connect
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	def copy(self):
+		b = object.__new__(SizedBoard)
+		b.set_geometry(self.geometry)
+		b.current_state = self.current_state[:]
+		b.position = self.position[:]
+		b.moves = self.moves[:]
+		b.base = self.base
+		b.hash = self.hash
+		b.mirror = self.mirror
+		b.lmw = self.lmw
+		b.player = self.player
+		b.legal = self.legal
+		return b
+	#========================================================== END SECTION =====================================================================	
+
+	#====================================================== SECTION: FUNCTION ===================================================================
+	
+	def generate_moves(self):
+		return list(self.geometry.moves[self.legal])
+	
+	def legal_moves(self):
+		return self.geometry.moves[self.legal]
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME 		: make_move
+	#PARAMETERS 	: move
+	#DESCRIPTION	: makes a move for a current player, win is checked on the mover's bitboard only, as in Board.make_move()
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def make_move(self, move):
+		
+		g = self.geometry
+		player = self.player
+		row = self.current_state[move]
+		self.current_state[move] = row + 1
+		cell = move * g.h1 + row
+		mask = self.position[player] | g.bit[cell]
+		self.position[player] = mask
+		self.hash ^= g.zobrist[player][cell]
+		self.mirror ^= g.mirror_zobrist[player][cell]
+		
+		if row == g.height - 1:
+			self.legal ^= 1 << move
+		
+		self.moves.append(move)
+		self.lmw = g.connected(mask)
+		self.player ^= 1
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	def unmake_last_move(self):
+		
+		if self.moves:
+			g = self.geometry
+			self.player ^= 1
+			
+			move = self.moves.pop()
+			row = self.current_state[move] - 1
+			self.current_state[move] = row
+			cell = move * g.h1 + row
+			self.position[self.player] ^= g.bit[cell]
+			self.hash ^= g.zobrist[self.player][cell]
+			self.mirror ^= g.mirror_zobrist[self.player][cell]
+			
+			if row == g.height - 1:
+				self.legal |= 1 << move
+			
+			self.lmw = False
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	#=========================================================== END SECTION ===================================================================
+
+#Original board implementation backed by state_graph.Graph, selected with Board(backend = 'graph')
+class GraphBoard(Board):
+	
+	backend = 'graph'
+	
+	#===================================================== SECTION: CONSTRUCTOR =================================================================
+	
+	def __init__(self, backend = 'graph', width = WIDTH, height = HEIGHT, connect = CONNECT):
+		
+		#Board size and tables used for hashing
+		self.geometry = geometry(width, height, connect)
+		self.width = width
+		self.height = height
+		self.connect = connect
+		
+		#Initialize pointers to all columns
+		self.current_state = [0] * width
 		
 		#Initialize a list indicating which column is full
-		self.isfull = [False, False, False, False, False, False, False]
+		self.isfull = [False] * width
 		
 		#Initialize graphs for both the players
 		#These graphs store current state of the board from both player's perspective
-		self.graph = [state_graph.Graph(), state_graph.Graph()]
+		self.graph = [state_graph.Graph(height, width, connect), state_graph.Graph(height, width, connect)]
 		
 		#Initialize move-number for both players
 		#Move-number is used to identify each different move made by player
 		self.move_no = [0, 0]
 		
+		#List of moves made so far
+		self.moves = []
+		self.base = 0
+		
 		#lmw: Variable to store 'last-move-won' status
 		#Initialized to False
 		self.lmw = False
 		
 		#board-state: string representing current state of the board
-		self.board_state = [['-', '-', '-', '-', '-', '-', '-'],  ['-', '-', '-', '-', '-', '-', '-'], ['-', '-', '-', '-', '-', '-', '-'], ['-', '-', '-', '-', '-', '-', '-'], ['-', '-', '-', '-', '-', '-', '-'], ['-', '-', '-', '-', '-', '-', '-']] 
+		self.board_state = [['-'] * width for i in range(height)]
 		
 		#player: player who will make a move now
 		self.player = 0
+		
+		#Zobrist hash of the position and of its mirror image
+		self.hash = 0
+		self.mirror = 0
 		pass
 	#____________________________________________________________________________________________________________________________________________
 	#========================================================== END SECTION =====================================================================	
@@ -55,7 +808,7 @@ class Board:
 		
 		possible_moves = [];
 		
-		for i in range(0, 7):
+		for i in range(0, self.width):
 			if not self.isfull[i]:
 				possible_moves.append(i);
 		
@@ -64,6 +817,29 @@ class Board:
 	
 	#____________________________________________________________________________________________________________________________________________
 	
+	def legal_moves(self):
+		return tuple(self.generate_moves())
+	
+	def key(self):
+		return Board.from_moves(self.moves, self.width, self.height, self.connect).key()
+	
+	def canonical_key(self):
+		return Board.from_moves(self.moves, self.width, self.height, self.connect).canonical_key()
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: copy
+	#PARAMETERS	: none
+	#DESCRIPTION	: creates an independent board in the same position by replaying the moves
+	#RETURNS	: new board
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def copy(self):
+		b = GraphBoard('graph', self.width, self.height, self.connect)
+		for mov in self.moves:
+			b.make_move(mov)
+		return b
+	#____________________________________________________________________________________________________________________________________________
+	
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 	#NAME 		: make_move
 	#PARAMETERS 	: move
@@ -77,16 +853,22 @@ class Board:
 		self.current_state[move] += 1;
 		
 		#Update colum status if current move causes it to become full
-		if self.current_state[move] == 6:
+		if self.current_state[move] == self.height:
 			self.isfull[move] = True;
 		
 		#Update move-number for current player
 		self.move_no[self.player] += 1
+		self.moves.append(move)
 		
 		#Update state graph for current player
 		#Store value of 'last_move_won' status [True / False] returned by insert_node() operation
 		self.lmw = self.graph[self.player].insert_node(self.move_no[self.player], self.current_state[move] - 1, move)
 		
+		#Update hash
+		cell = move * self.geometry.h1 + self.current_state[move] - 1
+		self.hash ^= self.geometry.zobrist[self.player][cell]
+		self.mirror ^= self.geometry.mirror_zobrist[self.player][cell]
+		
 		#Update board-state string
 		if self.player == 0:
 			self.board_state[self.current_state[move] - 1][move] = 'o'
@@ -117,6 +899,7 @@ class Board:
 			
 			#Restore previous state of the graph
 			mov, row, col, self.lmw = self.graph[self.player].remove_last_inserted()
+			self.moves.pop()
 			
 			#Update move-number to previous value
 			self.move_no[self.player] = mov - 1
@@ -127,6 +910,11 @@ class Board:
 			#Update column-status to False
 			self.isfull[col] = False;
 			
+			#Update hash
+			cell = col * self.geometry.h1 + row
+			self.hash ^= self.geometry.zobrist[self.player][cell]
+			self.mirror ^= self.geometry.mirror_zobrist[self.player][cell]
+			
 			#Update board-state string
 			self.board_state[row][col] = '-'
 		pass
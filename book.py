@@ -0,0 +1,188 @@
+'''
+=====================================================================================================================================================
+FILE		: book.py
+DESCRIPTION	: opening book: builder writing a sorted binary file of searched positions and a memory-mapped lookup
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import search
+import transposition
+import ordering
+import evaluate
+import math
+import mmap
+import struct
+
+#File layout: header followed by records sorted by key
+#header	: magic (4 bytes), board width, board height, one byte of file specific data, number of records
+#record	: position hash (unsigned 64 bit), two signed 8 bit values (move and score for the opening book)
+HEADER = struct.Struct('<4sBBBI')
+RECORD = struct.Struct('<Qbb')
+
+#Magic of opening book files
+MAGIC = b'C4OB'
+
+#======================================================== SECTION: FILE FORMAT =====================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: write_records
+#PARAMETERS	: path, magic, records (dictionary {key: (value1, value2)}), extra (byte stored in header)
+#DESCRIPTION	: writes records sorted by key
+#RETURNS	: number of records written
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def write_records(path, magic, records, extra = 0):
+
+	with open(path, 'wb') as f:
+		f.write(HEADER.pack(magic, board.WIDTH, board.HEIGHT, extra, len(records)))
+		for key in sorted(records):
+			v1, v2 = records[key]
+			f.write(RECORD.pack(key, v1, v2))
+
+	return len(records)
+#____________________________________________________________________________________________________________________________________________________
+
+class RecordFile:
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: path, magic (expected magic of the file)
+	#DESCRIPTION	: maps a file written by write_records() into memory, pages are shared by all processes reading the same file
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, path, magic):
+
+		self.file = open(path, 'rb')
+		self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+		m, width, height, self.extra, self.count = HEADER.unpack_from(self.data, 0)
+		if m != magic:
+			self.close()
+			raise ValueError(path + ' is not a ' + magic.decode() + ' file')
+		if (width, height) != (board.WIDTH, board.HEIGHT):
+			self.close()
+			raise ValueError(path + ' was built for a ' + str(width) + 'x' + str(height) + ' board')
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: find
+	#PARAMETERS	: key
+	#DESCRIPTION	: binary search for a key
+	#RETURNS	: (value1, value2) or None if key is not in the file
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def find(self, key):
+
+		lo, hi = 0, self.count
+		while lo < hi:
+			mid = (lo + hi) >> 1
+			k, v1, v2 = RECORD.unpack_from(self.data, HEADER.size + mid * RECORD.size)
+			if k == key:
+				return v1, v2
+			if k < key:
+				lo = mid + 1
+			else:
+				hi = mid
+
+		return None
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: close
+	#PARAMETERS	: none
+	#DESCRIPTION	: unmaps and closes the file
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def close(self):
+		self.data.close()
+		self.file.close()
+	#____________________________________________________________________________________________________________________________________________
+
+	def __len__(self):
+		return self.count
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: OPENING BOOK ====================================================================
+
+class OpeningBook(RecordFile):
+
+	def __init__(self, path):
+		RecordFile.__init__(self, path, MAGIC)
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: lookup
+	#PARAMETERS	: board
+	#DESCRIPTION	: looks up the position in the book
+	#RETURNS	: (move, score) with score in [-100, 100] from the point of view of the player to move, or None
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def lookup(self, board):
+		return self.find(board.hash)
+	#____________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: build
+#PARAMETERS	: path, plies (positions with up to this many moves are stored), depth (search depth), heuristic (use evaluate.evaluate_batch)
+#DESCRIPTION	: searches every distinct position reachable in 'plies' moves and writes best moves to a book file
+#RETURNS	: number of positions written
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def build(path, plies, depth, heuristic = True):
+
+	b = board.Board()
+	positions = {}
+	collect(b, plies, positions)
+
+	table = transposition.TranspositionTable(1 << 20)
+	order = ordering.MoveOrdering()
+	evaluator = evaluate.evaluate_batch if heuristic else None
+
+	records = {}
+	for key, moves in positions.items():
+		for mov in moves:
+			b.make_move(mov)
+
+		table.new_search()
+		order.new_search()
+		v, mov = search.negamax(b, -math.inf, math.inf, depth, table, None, order, evaluator)
+		records[key] = (mov, int(round(v * 100)))
+
+		for i in range(len(moves)):
+			b.unmake_last_move()
+
+	return write_records(path, MAGIC, records)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: collect
+#PARAMETERS	: board, plies, positions (dictionary to fill)
+#DESCRIPTION	: finds every distinct non-terminal position reachable in up to 'plies' moves
+#RETURNS	: none, positions[hash] is set to moves reaching the position
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def collect(board, plies, positions):
+
+	if board.last_move_won() or len(board.generate_moves()) == 0 or board.hash in positions:
+		return
+
+	positions[board.hash] = tuple(board.moves)
+
+	if plies == 0:
+		return
+
+	for mov in board.generate_moves():
+		board.make_move(mov)
+		collect(board, plies - 1, positions)
+		board.unmake_last_move()
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
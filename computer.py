@@ -8,14 +8,67 @@ EMAIL	: rrrane@indiana.edu
 
 import random
 import board
+import multiprocessing
 import math
+import search
+import transposition
+import ordering
+import evaluate
+import book as opening_book
+import tablebase as endgame_tablebase
 
 class Player:
 
 	#======================================================== SECTION: CONSTRUCTORS =============================================================
-	def __init__(self):
-		self.player_board = board.Board()
+	def __init__(self, depth = 3, time_limit = None, node_limit = None, heuristic = False, book = None, tablebase = None, stats = False, log = None, ponder = False, width = board.WIDTH, height = board.HEIGHT, connect = board.CONNECT):
+		
+		#Board size and number of stones in a row needed to win
+		self.player_board = board.Board(None, width, height, connect)
 		self.lmw = False
+		
+		#Fixed search depth, used when no budget is given
+		self.depth = depth
+		
+		#Budget per move: wall-clock seconds and / or number of nodes
+		#If either is set, get_move() uses iterative deepening instead of a fixed depth search
+		self.time_limit = time_limit
+		self.node_limit = node_limit
+		
+		#Score positions at the search horizon with the evaluate.Evaluator of the board size instead of treating them as draws
+		#Off by default: every leaf becomes about 10 times slower, which only pays off under a time or node budget
+		self.evaluator = evaluate.evaluator(width, height, connect) if heuristic else None
+		
+		#Book and tablebase files hold positions of the standard board only
+		if (book is not None or tablebase is not None) and (width, height, connect) != (board.WIDTH, board.HEIGHT, board.CONNECT):
+			raise ValueError('opening book and endgame tablebase are only available for the standard board')
+		
+		#Opening book: book.OpeningBook or path of a book file, positions found in it are not searched
+		if isinstance(book, str):
+			book = opening_book.OpeningBook(book)
+		self.book = book
+		
+		#Endgame tablebase: tablebase.Tablebase or path of a tablebase file, positions found in it are played perfectly
+		if isinstance(tablebase, str):
+			tablebase = endgame_tablebase.Tablebase(tablebase)
+		self.tablebase = tablebase
+		
+		#Transposition table and history / killer tables kept between moves, hold move ordering found by earlier searches
+		self.table = None
+		self.order = None
+		
+		#Search statistics: with stats set, self.stats holds search.SearchStats.result() of the last get_move() call
+		#log is called with that result of every move, e.g. list.append or a function writing to a dashboard
+		self.collect_stats = stats or log is not None
+		self.log = log
+		self.stats = None
+		
+		#Pondering: after get_move() the reply of the opponent is predicted and the position after it is searched
+		#in a background process. If the opponent plays the predicted reply, get_move() takes the result of that search
+		self.ponder = ponder
+		self.pondering = None
+		
+		#Depth reached by the last search within budget, pondering predicts the reply one ply shallower
+		self.last_depth = depth
 		pass
 	#======================================================== SECTION END =======================================================================
 	
@@ -40,190 +93,246 @@ class Player:
 
 	def make_move(self, move):
 		self.lmw = self.player_board.make_move(move)
+		
+		if self.pondering is not None:
+			self.check_pondering()
 		pass
 	#____________________________________________________________________________________________________________________________________________
 	
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 	#NAME		: get_move
 	#PARAMETERS	: none
-	#DESCRIPTION	: gets a move with maximum utility
+	#DESCRIPTION	: gets a move with maximum utility and starts pondering on the reply if pondering is on
 	#RETURNS	: ret_mov (move with maximum utility)
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 
 	def get_move(self):
-	
-		#Get a number representing this player
-		me = self.player_board.get_player()
+		mov = self.choose_move()
 		
-		#Get a move with maximum utility value
-		v, a, b, mov = self.max_value(self.player_board, me, -math.inf, math.inf, 3)
+		if self.ponder:
+			self.start_pondering(mov)
 		
 		return mov
-		pass
 	#____________________________________________________________________________________________________________________________________________
-
-	#============================================================== SECTION END =================================================================
 	
-	#============================================================== SECTION: HELPER FUNCTIONS ===================================================
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: shuffle
+	#NAME		: choose_move
 	#PARAMETERS	: none
-	#DESCRIPTION	: shuffles the input list for move ordering
-	#RETURNS	: list of moves after ordering
+	#DESCRIPTION	: gets a move with maximum utility
+	#		  Positions in the opening book or endgame tablebase are answered without searching
+	#		  If the opponent played the reply predicted by pondering, the move found by pondering is played
+	#		  With a time or node budget, returns best move of the deepest iteration finished within the budget
+	#RETURNS	: ret_mov (move with maximum utility)
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	
-	def shuffle(self, lst):
-		mid = math.floor(len(lst)/2)
-		
-		if len(lst) % 2 == 0:
-			mid -=1
-		
-		ptr = [mid, mid + 1]
-		turn = 0
-		ret_lst = []
-		if len(lst) > 0:
-			while (turn == 0 and ptr[0] >= 0) or (turn == 1 and ptr[1] < len(lst)) :
-				
-				ret_lst.append(lst[ptr[turn]])
-				if turn == 0:
-					ptr[turn] -= 1
-				else:
-					ptr[turn] += 1
-				
-				turn ^= 1
+
+	def choose_move(self):
+		
+		stats = search.SearchStats() if self.collect_stats else None
+		
+		#Play from opening book
+		if self.book is not None:
+			entry = self.book.lookup(self.player_board)
+			if entry is not None:
+				return self.record(entry[0], 'book', stats)
+		
+		#Play from endgame tablebase
+		if self.tablebase is not None:
+			entry = self.tablebase.probe(self.player_board)
+			if entry is not None:
+				return self.record(entry[2], 'tablebase', stats)
+		
+		#Play move found by pondering
+		if self.pondering is not None:
+			mov, ponder_stats = self.pondering_result()
+			if mov is not None:
+				return self.record(mov, 'ponder', ponder_stats if stats is not None else None)
+		
+		#Search within budget
+		if self.time_limit is not None or self.node_limit is not None:
+			if self.table is None:
+				self.table = transposition.TranspositionTable(1 << 18)
+				self.order = ordering.MoveOrdering(self.player_board.width, self.player_board.height)
+			v, mov, d = search.iterative_deepening(self.player_board, self.time_limit, self.node_limit, None, self.table, self.order, self.evaluator, stats)
+			self.last_depth = max(d, 1)
+			return self.record(mov, 'search', stats)
+		
+		if stats is not None:
+			stats.begin_iteration(self.player_board, self.depth)
+		
+		#Get a move with maximum utility value
+		v, mov = search.negamax(self.player_board, -math.inf, math.inf, self.depth, None, None, None, self.evaluator, None, stats)
 		
-		return ret_lst
+		if stats is not None:
+			stats.end_iteration(v, mov)
+		
+		return self.record(mov, 'search', stats)
+		pass
 	#____________________________________________________________________________________________________________________________________________
-	
+
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: max_value
-	#PARAMETERS	: board, player, alpha, beta, depth
-	#DESCRIPTION	: gets the move with maximum utility
-	#		  Source- "Russel S., Norvig P., Artificial Intelligence- a modern approach 2nd edition"
-	#RETURNS	: v (utility value), a (local alpha), b(local beta), ret_mov (move with maximum utility)
+	#NAME		: record
+	#PARAMETERS	: move, source ('book', 'tablebase' or 'search'), stats (search.SearchStats or None)
+	#DESCRIPTION	: keeps statistics of the move in self.stats and passes them to the log
+	#RETURNS	: move
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	
-	def max_value(self, board, player, alpha, beta, depth):
-		
-		#check if terminal state
-		if self.is_terminal(board):
-			u, alp, bet = self.utility(board, player)
-			return u, alp, bet, -1
-		
-		#check if depth limit is reached
-		if depth == 0:
-			u = 0
-			return u, -1, -1, -1
-		
-		
-		v = - math.inf
-		ret_mov = -1
-		a, b = alpha, beta
-		
-		#Get list of possible moves
-		legal_moves = self.shuffle(board.generate_moves())
-		
-		#Search for a move with maximum utility
-		for mov in legal_moves:
-			board.make_move(mov)
-			max_val, a1, b1, m  = self.min_value(board, player, a, b, depth - 1)
-			if max_val > v:
-				v, ret_mov = max_val, mov
-			
-			board.unmake_last_move()
-			if v >= b:
-				return v, a, b, ret_mov
-			
-			a = max(a, v)
-		
-		return v, a, b, ret_mov
+
+	def record(self, move, source, stats):
+		if stats is None:
+			return move
+		
+		self.stats = stats.result()
+		self.stats['move'] = move
+		self.stats['source'] = source
+		self.stats['ply'] = self.player_board.stones()
+		
+		if self.log is not None:
+			self.log(self.stats)
+		return move
 	#____________________________________________________________________________________________________________________________________________
 
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: min_value
-	#PARAMETERS	: board, player, alpha, beta, depth
-	#DESCRIPTION	: gets the move with minimum utility
-	#		  Source- "Russel S., Norvig P., Artificial Intelligence- a modern approach 2nd edition"
-	#RETURNS	: v (utility value), a (local alpha), b(local beta), ret_mov (move with minimum utility)
-	#--------------------------------------------------------------------------------------------------------------------------------------------
- 
-	def min_value(self, board, player, alpha, beta, depth):
-		
-		#check if termial state
-		if self.is_terminal(board):
-			u, alp, bet = self.utility(board, player)
-			return u, alp, bet, -1
-		
-		#check if depth limit is reached
-		if depth == 0:
-			u = 0
-			return u, -1, -1, -1
-		
-		v = math.inf
-		ret_mov = -1
-		a, b = alpha, beta
-		
-		#Get list of all possible moves
-		legal_moves = self.shuffle(board.generate_moves())
-		
-		#Search for a move with minimum utility
-		for mov in legal_moves:
-			board.make_move(mov)
-			min_val, a1, b1, m = self.max_value(board, player, a, b, depth - 1)
-			if min_val < v:
-				v, ret_mov = min_val, mov
-			
-			board.unmake_last_move()
-			if v <= a:
-				b = v
-				return v, a, b, ret_mov
-			
-			b = min(b, v)
-			
-		return v, a, b, ret_mov
+	#NAME		: start_pondering
+	#PARAMETERS	: move (move just returned by get_move)
+	#DESCRIPTION	: starts search.ponder() in a background process on the position after the move
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def start_pondering(self, move):
+		self.stop_pondering()
+		
+		#No reply to ponder on if the move ends the game
+		b = self.player_board
+		b.make_move(move)
+		over = b.last_move_won() or len(b.generate_moves()) == 0
+		moves = list(b.moves)
+		b.unmake_last_move()
+		if over:
+			return
+		
+		depth = self.depth if self.time_limit is None and self.node_limit is None else self.last_depth
+		receiver, sender = multiprocessing.Pipe(False)
+		stop = multiprocessing.Event()
+		size = (b.width, b.height, b.connect)
+		process = multiprocessing.Process(target = search.ponder, args = (sender, stop, moves, depth, self.time_limit, self.node_limit, self.evaluator is not None, self.collect_stats, size))
+		process.start()
+		sender.close()
+		
+		self.pondering = {'process': process, 'conn': receiver, 'stop': stop, 'moves': moves, 'reply': None, 'result': None}
+		pass
 	#____________________________________________________________________________________________________________________________________________
 	
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: is_terminal
-	#PARAMETERS	: board
-	#DESCRIPTION	: returns 'True' if board is in terminal state and 'False' otherwise
-	#RETURNS	: True / False
+	#NAME		: check_pondering
+	#PARAMETERS	: none
+	#DESCRIPTION	: called after every move, stops pondering unless the board is still on the way to the pondered position
+	#		  The opponent's move is compared with the predicted reply, if the reply is not known yet get_move() decides
+	#RETURNS	: none
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	
-	def is_terminal(self, board):
+
+	def check_pondering(self):
+		p = self.pondering
+		moves = self.player_board.moves
+		expected = p['moves']
 		
-		legal_moves = board.generate_moves()
-		lmw = board.last_move_won()
+		#Player's own move
+		if len(moves) <= len(expected) and moves == expected[:len(moves)]:
+			return
 		
-		#return true if no possible move or last move won
-		if len(legal_moves) == 0 or lmw:
-			return True
+		if len(moves) == len(expected) + 1 and moves[:-1] == expected:
+			self.receive_pondering(None)
+			if p['reply'] is None or p['reply'] == moves[-1]:
+				return
 		
-		#return false otherwise
-		return False
+		self.stop_pondering()
+		pass
 	#____________________________________________________________________________________________________________________________________________
 	
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: utility
-	#PARAMETERS	: board, player
-	#DESCRIPTION	: returns utility of the leaf node
-	#RETURNS	: utility of leaf node
+	#NAME		: receive_pondering
+	#PARAMETERS	: wait (None to read only messages already sent, 'reply' to block until the reply is predicted,
+	#		  'move' to block until the search ends)
+	#DESCRIPTION	: reads messages of search.ponder(), keeps predicted reply and final result
+	#RETURNS	: none
 	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def receive_pondering(self, wait):
+		p = self.pondering
+		try:
+			while p['result'] is None and (wait == 'move' or (wait == 'reply' and p['reply'] is None) or p['conn'].poll()):
+				msg = p['conn'].recv()
+				if msg[0] == 'reply':
+					p['reply'] = msg[1]
+				else:
+					p['result'] = msg
+		except EOFError:
+			p['result'] = ('stopped',)
+		pass
+	#____________________________________________________________________________________________________________________________________________
 	
-	def utility(self, board, player):
-		lmw = board.last_move_won()
-		
-		next_player = board.get_player()
-		
-		if lmw and player == next_player:
-			return -1, -1, -1
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: pondering_result
+	#PARAMETERS	: none
+	#DESCRIPTION	: waits for the pondering search of the current position and ends pondering
+	#RETURNS	: move and search.SearchStats (or None) of the pondering search, (None, None) if it did not search this position
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def pondering_result(self):
+		p = self.pondering
+		if len(self.player_board.moves) != len(p['moves']) + 1:
+			self.stop_pondering()
+			return None, None
 		
-		if lmw and player != next_player:
-			return 1, 1, 1
+		#Wrong prediction is stopped without waiting for the search
+		self.receive_pondering('reply')
+		if p['reply'] == self.player_board.moves[-1]:
+			self.receive_pondering('move')
+		self.stop_pondering()
 		
-		return 0, 0, 0
+		if p['reply'] == self.player_board.moves[-1] and p['result'][0] == 'move' and p['result'][1] != -1:
+			return p['result'][1], p['result'][2]
+		return None, None
 	#____________________________________________________________________________________________________________________________________________
 	
-	#============================================================ SECTION END ===================================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: stop_pondering
+	#PARAMETERS	: none
+	#DESCRIPTION	: stops the pondering process and waits for it to exit
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def stop_pondering(self):
+		p = self.pondering
+		if p is None:
+			return
+		self.pondering = None
+		
+		p['stop'].set()
+		p['process'].join(1)
+		if p['process'].is_alive():
+			p['process'].terminate()
+			p['process'].join()
+		p['conn'].close()
+		pass
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: close
+	#PARAMETERS	: none
+	#DESCRIPTION	: stops pondering, call when the player is discarded
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def close(self):
+		self.stop_pondering()
+		pass
+	#____________________________________________________________________________________________________________________________________________
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	#============================================================== SECTION END =================================================================
 
 
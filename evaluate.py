@@ -0,0 +1,210 @@
+'''
+=====================================================================================================================================================
+FILE		: evaluate.py
+DESCRIPTION	: heuristic evaluation of positions at the search horizon
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+
+#NumPy is optional, batches are scored one position at a time without it
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+#Board dimensions
+WIDTH = board.WIDTH
+HEIGHT = board.HEIGHT
+H1 = board.H1
+
+#Weights of open windows holding two and three stones of one player only
+TWO = 1
+THREE = 4
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: winning_lines
+#PARAMETERS	: width, height, connect (board size)
+#DESCRIPTION	: lists every group of 'connect' cells which wins the game (69 on a 7x6 board with four in a row)
+#RETURNS	: list of lines, each line is a list of bit indices
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def winning_lines(width = WIDTH, height = HEIGHT, connect = board.CONNECT):
+	h1 = height + 1
+	lines = []
+	for col in range(width):
+		for row in range(height):
+			for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+				cells = [(col + k * dc, row + k * dr) for k in range(connect)]
+				if all(0 <= c < width and 0 <= r < height for c, r in cells):
+					lines.append([c * h1 + r for c, r in cells])
+	return lines
+#____________________________________________________________________________________________________________________________________________________
+
+class Evaluator:
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: width, height, connect (board size)
+	#DESCRIPTION	: builds the tables of one board size, windows one stone short of a win weigh THREE, two stones short TWO
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def __init__(self, width = WIDTH, height = HEIGHT, connect = board.CONNECT):
+		self.lines = winning_lines(width, height, connect)
+		
+		#Bitmask of every line
+		self.line_masks = [sum(1 << i for i in line) for line in self.lines]
+		
+		#Scores are divided by scale so that every heuristic score is strictly between loss (-1) and win (1)
+		self.scale = len(self.lines) * THREE + 1
+		
+		#Weight of a window by number of stones in it
+		self.weights = [0] * (connect + 1)
+		if connect >= 3:
+			self.weights[connect - 2] = TWO
+		if connect >= 2:
+			self.weights[connect - 1] = THREE
+		
+		#NumPy tables: single bit masks of every cell of every line, and weights
+		#Bitboards wider than 64 bits are scored without NumPy
+		self.vectorized = numpy is not None and width * (height + 1) <= 64 and len(self.lines) > 0
+		if self.vectorized:
+			self.line_bits = numpy.array([[1 << i for i in line] for line in self.lines], dtype = numpy.uint64)
+			self.weight_array = numpy.array(self.weights, dtype = numpy.int64)
+		pass
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: evaluate_masks
+	#PARAMETERS	: own (bitboard of player to move), other (bitboard of opponent)
+	#DESCRIPTION	: scores open windows of the position from the point of view of the player to move
+	#RETURNS	: score in (-1, 1)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def evaluate_masks(self, own, other):
+		weights = self.weights
+		score = 0
+		for line in self.line_masks:
+			a = own & line
+			b = other & line
+			if a and not b:
+				score += weights[bin(a).count('1')]
+			elif b and not a:
+				score -= weights[bin(b).count('1')]
+		return score / self.scale
+	#____________________________________________________________________________________________________________________________________________
+	
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __call__
+	#PARAMETERS	: positions (list of (own, other) bitboard pairs)
+	#DESCRIPTION	: scores many positions with one vectorized NumPy call, falls back to evaluate_masks() without NumPy
+	#		  An Evaluator is a batch evaluator for search.negamax
+	#RETURNS	: list of scores in (-1, 1)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def __call__(self, positions):
+		
+		if not self.vectorized or len(positions) == 0:
+			return [self.evaluate_masks(own, other) for own, other in positions]
+		
+		pairs = numpy.array(positions, dtype = numpy.uint64)
+		
+		#number of stones of both players in every line: shape (positions, lines)
+		own = ((pairs[:, 0, None, None] & self.line_bits[None]) != 0).sum(axis = 2)
+		other = ((pairs[:, 1, None, None] & self.line_bits[None]) != 0).sum(axis = 2)
+		
+		#only windows without opponent's stones count
+		score = numpy.where(other == 0, self.weight_array[own], 0) - numpy.where(own == 0, self.weight_array[other], 0)
+		
+		return (score.sum(axis = 1) / self.scale).tolist()
+	#____________________________________________________________________________________________________________________________________________
+
+#Evaluator of the standard board
+STANDARD = Evaluator()
+LINES = STANDARD.lines
+LINE_MASKS = STANDARD.line_masks
+SCALE = STANDARD.scale
+WEIGHTS = STANDARD.weights
+
+#Evaluators of every board size created so far, by (width, height, connect)
+EVALUATORS = {(WIDTH, HEIGHT, board.CONNECT): STANDARD}
+
+#======================================================== SECTION: MAIN FUNCTIONS ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: masks
+#PARAMETERS	: board
+#DESCRIPTION	: gets bitboards of player to move and of the opponent
+#RETURNS	: (own, other) bitboards
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def masks(board):
+
+	player = board.get_player()
+
+	if board.backend == 'bitboard':
+		return board.position[player], board.position[player ^ 1]
+
+	#graph backend keeps the board as characters
+	own, other = 0, 0
+	mine = 'o' if player == 0 else 'x'
+	h1 = board.height + 1
+	for row in range(board.height):
+		for col in range(board.width):
+			cell = board.board_state[row][col]
+			if cell == mine:
+				own |= 1 << (col * h1 + row)
+			elif cell != '-':
+				other |= 1 << (col * h1 + row)
+	return own, other
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: evaluate
+#PARAMETERS	: board
+#DESCRIPTION	: scores open windows one and two stones short of a win from the point of view of the player to move
+#RETURNS	: score in (-1, 1)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def evaluate(board):
+	own, other = masks(board)
+	return evaluator(board.width, board.height, board.connect).evaluate_masks(own, other)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: evaluate_masks
+#PARAMETERS	: own (bitboard of player to move), other (bitboard of opponent)
+#DESCRIPTION	: same as evaluate() for a pair of bitboards of the standard board
+#RETURNS	: score in (-1, 1)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def evaluate_masks(own, other):
+	return STANDARD.evaluate_masks(own, other)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: evaluate_batch
+#PARAMETERS	: positions (list of (own, other) bitboard pairs of the standard board)
+#DESCRIPTION	: scores many positions with one vectorized NumPy call, falls back to evaluate_masks() without NumPy
+#RETURNS	: list of scores in (-1, 1)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def evaluate_batch(positions):
+	return STANDARD(positions)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: evaluator
+#PARAMETERS	: width, height, connect (board size)
+#DESCRIPTION	: gets the Evaluator of a board size, built once per size, STANDARD for the standard board
+#RETURNS	: Evaluator (a batch evaluator for search.negamax)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def evaluator(width = WIDTH, height = HEIGHT, connect = board.CONNECT):
+	size = (width, height, connect)
+	if size not in EVALUATORS:
+		EVALUATORS[size] = Evaluator(width, height, connect)
+	return EVALUATORS[size]
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
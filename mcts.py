@@ -0,0 +1,270 @@
+'''
+=====================================================================================================================================================
+FILE		: mcts.py
+DESCRIPTION	: Monte Carlo tree search player: UCT selection, tree reuse between moves and batches of random rollouts run in a process pool
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import simulate
+import random
+import math
+import time
+import concurrent.futures
+
+#Exploration constant of UCT
+C = math.sqrt(2)
+
+#Number of leaves selected before their rollouts are run together
+BATCH = 64
+
+class Node:
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: parent, move (move leading to the node), player (player who made the move), board (position of the node)
+	#DESCRIPTION	: creates a tree node, score is counted from the point of view of 'player' (win 1, draw 0.5)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, parent, move, player, board):
+		self.parent = parent
+		self.move = move
+		self.player = player
+		self.children = {}
+		self.visits = 0
+		self.score = 0.0
+
+		#winner of a terminal position (player, or -1 for a draw), None if the game goes on
+		if board.last_move_won():
+			self.winner = player
+		elif len(board.generate_moves()) == 0:
+			self.winner = -1
+		else:
+			self.winner = None
+
+		#moves without a child node yet
+		self.untried = board.generate_moves() if self.winner is None else []
+	#____________________________________________________________________________________________________________________________________________
+
+class Player:
+
+	#======================================================== SECTION: CONSTRUCTORS =============================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: time_limit (seconds per move), playouts (optional number of rollouts per move, used instead of time_limit if given),
+	#		  workers (processes running rollouts, 1 runs them in this process), batch (leaves per batch of rollouts), seed,
+	#		  width, height, connect (board size and stones in a row needed to win)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, time_limit = 1.0, playouts = None, workers = 1, batch = BATCH, seed = None, width = board.WIDTH, height = board.HEIGHT, connect = board.CONNECT):
+		self.player_board = board.Board(None, width, height, connect)
+		self.time_limit = time_limit
+		self.playouts = playouts
+		self.workers = workers
+		self.batch = batch
+		self.rng = random.Random(seed)
+
+		#Tree of the current position, kept between moves
+		self.root = None
+
+		#Process pool, created by the first get_move() with more than one worker
+		self.pool = None
+
+		#Number of rollouts of the last get_move()
+		self.last_playouts = 0
+		pass
+	#======================================================== SECTION END =======================================================================
+
+	#======================================================== SECTION: MAIN FUNCTIONS ===========================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: name
+	#PARAMETERS	: none
+	#DESCRIPTION	: Returns name of the player
+	#RETURNS	: string (name of the player)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def name(self):
+		return 'MCTS'
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: make_move
+	#PARAMETERS	: move
+	#DESCRIPTION	: makes a move on the internal board, the subtree of the move becomes the new tree
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def make_move(self, move):
+		self.player_board.make_move(move)
+
+		if self.root is not None and move in self.root.children:
+			self.root = self.root.children[move]
+			self.root.parent = None
+		else:
+			self.root = None
+		pass
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: get_move
+	#PARAMETERS	: none
+	#DESCRIPTION	: grows the tree until the budget is used and picks the most visited move
+	#		  Leaves of a batch are selected one after another, each selection counts a visit on its path right away
+	#		  (virtual loss) so that the batch spreads over different leaves, rollouts of the batch then run together
+	#RETURNS	: move, -1 if the game is over
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def get_move(self):
+
+		#No move to search in a won or full position
+		b = self.player_board
+		if b.last_move_won() or len(b.legal_moves()) == 0:
+			self.last_playouts = 0
+			return -1
+
+		if self.root is None:
+			self.root = Node(None, -1, b.player ^ 1, b)
+
+		deadline = time.time() + self.time_limit
+		done = 0
+
+		while True:
+			if self.playouts is not None:
+				if done >= self.playouts:
+					break
+			elif done > 0 and time.time() >= deadline:
+				break
+
+			n = self.batch if self.playouts is None else min(self.batch, self.playouts - done)
+			paths = []
+			states = []
+			for i in range(n):
+				path, state = self.select()
+				paths.append(path)
+				states.append(state)
+
+			winners = self.rollouts(states)
+			for path, winner in zip(paths, winners):
+				for node in path:
+					if winner == node.player:
+						node.score += 1.0
+					elif winner == -1:
+						node.score += 0.5
+			done += n
+
+		self.last_playouts = done
+		return max(self.root.children.values(), key = lambda child: child.visits).move
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: close
+	#PARAMETERS	: none
+	#DESCRIPTION	: shuts down the process pool
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def close(self):
+		if self.pool is not None:
+			self.pool.shutdown()
+			self.pool = None
+		pass
+	#____________________________________________________________________________________________________________________________________________
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+	#============================================================== SECTION END =================================================================
+
+	#======================================================== SECTION: HELPER FUNCTIONS =========================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: select
+	#PARAMETERS	: none
+	#DESCRIPTION	: walks down the tree by UCT and adds one child to the node reached, visits are counted on the way
+	#RETURNS	: path (list of nodes from the root), state of the leaf for simulate.playout() or winner of a terminal leaf
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def select(self):
+
+		b = self.player_board
+		node = self.root
+		node.visits += 1
+		path = [node]
+
+		#Descend through fully expanded nodes
+		while node.winner is None and len(node.untried) == 0:
+			log_visits = math.log(node.visits)
+			node = max(node.children.values(), key = lambda child: child.score / child.visits + C * math.sqrt(log_visits / child.visits))
+			b.make_move(node.move)
+			node.visits += 1
+			path.append(node)
+
+		#Expand a random untried move
+		if node.winner is None:
+			mov = node.untried.pop(self.rng.randrange(len(node.untried)))
+			b.make_move(mov)
+			child = Node(node, mov, node.player ^ 1, b)
+			node.children[mov] = child
+			child.visits += 1
+			path.append(child)
+			node = child
+
+		if node.winner is not None:
+			state = node.winner
+		else:
+			state = (tuple(b.position), tuple(b.current_state), b.stones())
+
+		for i in range(len(path) - 1):
+			b.unmake_last_move()
+
+		return path, state
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: rollouts
+	#PARAMETERS	: states (returned by select())
+	#DESCRIPTION	: plays a random game from every leaf, in the process pool if there is more than one worker
+	#RETURNS	: list of winners
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def rollouts(self, states):
+
+		winners = list(states)
+		index = [i for i in range(len(states)) if isinstance(states[i], tuple)]
+		todo = [states[i] for i in index]
+
+		b = self.player_board
+		size = (b.width, b.height, b.connect)
+		if self.workers <= 1 or len(todo) < 2 * self.workers:
+			results = rollout_task((self.rng.getrandbits(64), size, todo))
+		else:
+			if self.pool is None:
+				self.pool = concurrent.futures.ProcessPoolExecutor(max_workers = self.workers)
+			chunk = (len(todo) + self.workers - 1) // self.workers
+			tasks = [(self.rng.getrandbits(64), size, todo[i:i + chunk]) for i in range(0, len(todo), chunk)]
+			results = []
+			for r in self.pool.map(rollout_task, tasks):
+				results.extend(r)
+
+		for i, winner in zip(index, results):
+			winners[i] = winner
+		return winners
+	#____________________________________________________________________________________________________________________________________________
+	#============================================================== SECTION END =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: rollout_task
+#PARAMETERS	: task (random seed, (width, height, connect), list of (position, heights, ply) states)
+#DESCRIPTION	: plays a random game from every state, runs in a worker process
+#RETURNS	: list of winners
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def rollout_task(task):
+	seed, size, states = task
+	rng = random.Random(seed)
+	g = board.geometry(*size)
+	return [simulate.playout(position, heights, ply, rng, g)[0] for position, heights, ply in states]
+#____________________________________________________________________________________________________________________________________________________
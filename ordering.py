@@ -0,0 +1,116 @@
+'''
+=====================================================================================================================================================
+FILE		: ordering.py
+DESCRIPTION	: dynamic move ordering (history heuristic and killer moves) used by search.negamax
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+
+#Board dimensions
+WIDTH = board.WIDTH
+HEIGHT = board.HEIGHT
+H1 = board.H1
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: centre_first
+#PARAMETERS	: width
+#DESCRIPTION	: orders columns from the centre out, left before right at the same distance
+#RETURNS	: list of columns
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def centre_first(width):
+	return sorted(range(width), key = lambda col: (abs(2 * col - (width - 1)), col))
+#____________________________________________________________________________________________________________________________________________________
+
+#Centre-out order of columns, used to break ties between moves with the same score
+CENTRE_FIRST = centre_first(WIDTH)
+
+#Number of killer moves remembered per ply
+KILLERS = 2
+
+class MoveOrdering:
+
+	#================================================== SECTION: CONSTRUCTORS ===================================================================
+	def __init__(self, width = WIDTH, height = HEIGHT):
+
+		#cells are numbered col * h1 + row as in board.Board, width and height are the size of the board searched
+		self.h1 = height + 1
+
+		#history[player][cell] grows every time a stone of 'player' in 'cell' caused a beta cut-off
+		#A cell rather than a column is used, since dropping into the same column means a different thing at every height
+		self.history = [[0] * (width * self.h1) for p in range(2)]
+
+		#killers[ply] holds last moves which caused a cut-off at that ply, most recent first
+		self.killers = [[-1] * KILLERS for i in range(width * height + 1)]
+
+		#rank[col] is position of column in centre-out order
+		self.rank = [0] * width
+		for i, col in enumerate(centre_first(width)):
+			self.rank[col] = i
+		pass
+	#================================================== SECTION END =============================================================================
+
+	#================================================== SECTION: FUNCTIONS ======================================================================
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: order
+	#PARAMETERS	: board, legal_moves, tt_mov (best move from transposition table or -1)
+	#DESCRIPTION	: orders moves: table move, killer moves, then by history score, ties broken centre-out
+	#RETURNS	: list of ordered moves
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def order(self, board, legal_moves, tt_mov):
+
+		history = self.history[board.get_player()]
+		killers = self.killers[board.stones()]
+		heights = board.current_state
+		rank = self.rank
+		h1 = self.h1
+
+		def key(mov):
+			if mov == tt_mov:
+				return (0, 0, 0)
+			if mov in killers:
+				return (1, killers.index(mov), 0)
+			return (2, -history[mov * h1 + heights[mov]], rank[mov])
+
+		return sorted(legal_moves, key = key)
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: cutoff
+	#PARAMETERS	: board, mov (move which caused the cut-off, not made on the board), depth (remaining depth)
+	#DESCRIPTION	: rewards a move which caused a beta cut-off
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def cutoff(self, board, mov, depth):
+
+		self.history[board.get_player()][mov * self.h1 + board.current_state[mov]] += depth * depth
+
+		killers = self.killers[board.stones()]
+		if killers[0] != mov:
+			killers.pop()
+			killers.insert(0, mov)
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: new_search
+	#PARAMETERS	: none
+	#DESCRIPTION	: ages history scores and clears killer moves before searching a new position
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def new_search(self):
+		for h in self.history:
+			for i in range(len(h)):
+				h[i] >>= 1
+		for k in self.killers:
+			for i in range(KILLERS):
+				k[i] = -1
+	#____________________________________________________________________________________________________________________________________________
+
+	#======================================================== SECTION END =======================================================================
@@ -0,0 +1,334 @@
+'''
+=====================================================================================================================================================
+FILE	: parallel.py
+NAME	: Rohit Rane
+EMAIL	: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import search
+import transposition
+import os
+import math
+import time
+import multiprocessing
+import concurrent.futures
+
+#Default number of plies expanded in the calling process before subtrees are handed to the pool
+SPLIT_DEPTH = 2
+
+#Number of transposition table entries in every search worker
+WORKER_TABLE_SIZE = 1 << 18
+
+#Per process state of search workers, set by init_worker()
+worker_alpha = None
+worker_table = None
+
+#======================================================== SECTION: MAIN FUNCTIONS ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: perft
+#PARAMETERS	: board, depth, workers (number of processes, defaults to number of cores), split_depth
+#DESCRIPTION	: counts number of leaf nodes at given depth using a process pool
+#		  Unlike search.perft, the board is left unchanged
+#RETURN		: count (number of leaf nodes), same as search.perft
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def perft(board, depth, workers = None, split_depth = SPLIT_DEPTH):
+
+	#Terminal root is a single leaf
+	if board.last_move_won() or len(board.legal_moves()) == 0:
+		return 1
+
+	return sum(divide(board, depth, workers, split_depth).values())
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: divide
+#PARAMETERS	: board, depth, workers (number of processes, defaults to number of cores), split_depth
+#DESCRIPTION	: counts number of leaf nodes under each root move
+#RETURN		: dictionary {move: count}
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def divide(board, depth, workers = None, split_depth = SPLIT_DEPTH):
+
+	counts = {}
+	tasks = []
+
+	if board.last_move_won():
+		return counts
+
+	#Expand first plies here, collect deeper subtrees as tasks
+	for mov in board.legal_moves():
+		board.make_move(mov)
+		counts[mov] = expand(board, depth - 1, split_depth - 1, mov, tasks)
+		board.unmake_last_move()
+
+	if len(tasks) == 0:
+		return counts
+
+	#Count subtrees in the pool
+	if workers is None:
+		workers = os.cpu_count() or 1
+
+	chunk = max(1, len(tasks) // (workers * 8))
+	start, offset = root_of(board)
+	with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+		size = (board.width, board.height, board.connect)
+		results = pool.map(perft_task, [(board.backend, size, start, moves[offset:], d) for tag, moves, d in tasks], chunksize = chunk)
+		for (tag, moves, d), count in zip(tasks, results):
+			counts[tag] += count
+
+	return counts
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: find_win
+#PARAMETERS	: board, depth, workers (number of processes, defaults to number of cores)
+#DESCRIPTION	: determines if there is a Forced Win at given depth, root moves are searched in parallel
+#RETURNS	: string message, same as search.find_win
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def find_win(board, depth, workers = None):
+
+	v, m = search_root(board, depth, workers)
+
+	if v == 1:
+		return 'WIN BY PLAYING ' + str(m)
+
+	if v == -1:
+		return 'ALL MOVES LOSE'
+
+	return 'NO FORCED WIN IN ' + str(depth) + ' MOVES'
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: search_root
+#PARAMETERS	: board, depth, workers (number of processes, defaults to number of cores)
+#DESCRIPTION	: parallel version of search.negamax at the root
+#		  First root move is searched here to get a bound (young brothers wait), remaining root moves are searched by
+#		  the pool with the best value found so far as a shared alpha. Every worker reads the shared alpha when it starts a move.
+#		  Gives the same value and move as the serial search
+#RETURNS	: v (maximum utility), ret_mov (move with maximum utility)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def search_root(board, depth, workers = None):
+
+	if search.is_terminal(board) or depth == 0:
+		return search.negamax(board, -math.inf, math.inf, depth)
+
+	legal_moves = search.shuffle(board.legal_moves())
+
+	#Mirrored moves of a symmetric position have equal values
+	if board.is_symmetric():
+		legal_moves = search.drop_mirrored(legal_moves, board.width)
+
+	#Eldest brother
+	table = transposition.TranspositionTable(WORKER_TABLE_SIZE)
+	v = child_value(board, legal_moves[0], -math.inf, depth - 1, table)
+
+	values = {legal_moves[0]: (v, -math.inf)}
+
+	#Nothing beats a win
+	if v < 1 and len(legal_moves) > 1:
+
+		if workers is None:
+			workers = os.cpu_count() or 1
+
+		alpha = multiprocessing.Value('d', v)
+		start, offset = root_of(board)
+		root = tuple(board.moves[offset:])
+		size = (board.width, board.height, board.connect)
+
+		with concurrent.futures.ProcessPoolExecutor(max_workers = workers, initializer = init_worker, initargs = (alpha, WORKER_TABLE_SIZE)) as pool:
+			futures = {}
+			for mov in legal_moves[1:]:
+				futures[pool.submit(search_task, (board.backend, size, start, root, mov, depth - 1))] = mov
+
+			for f in concurrent.futures.as_completed(futures):
+				val, a = f.result()
+				values[futures[f]] = (val, a)
+				with alpha.get_lock():
+					if val > alpha.value:
+						alpha.value = val
+
+	#Best value, a value above the alpha it was searched with is exact
+	v = max(val for val, a in values.values())
+
+	#Serial search picks first move in order reaching the best value
+	#A move which failed low at exactly that value may still reach it, search it again with a full window
+	for mov in legal_moves:
+		val, a = values[mov]
+		if val == v and val <= a:
+			val = child_value(board, mov, -math.inf, depth - 1, table)
+		if val == v:
+			return v, mov
+
+	return v, legal_moves[0]
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: measure_speedup
+#PARAMETERS	: board, depth, workers (number of processes, defaults to number of cores)
+#DESCRIPTION	: times serial and parallel find_win on the same position
+#RETURNS	: dictionary with both results, times and speedup
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def measure_speedup(board, depth, workers = None):
+
+	if workers is None:
+		workers = os.cpu_count() or 1
+
+	start = time.time()
+	serial = search.find_win(board, depth)
+	serial_time = time.time() - start
+
+	start = time.time()
+	par = find_win(board, depth, workers)
+	parallel_time = time.time() - start
+
+	return {
+		'depth': depth,
+		'workers': workers,
+		'serial_result': serial,
+		'parallel_result': par,
+		'serial_time': serial_time,
+		'parallel_time': parallel_time,
+		'speedup': serial_time / parallel_time if parallel_time > 0 else 0.0,
+	}
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: HELPER FUNCTIONS =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: expand
+#PARAMETERS	: board, depth, split_depth, tag (root move), tasks (list to append subtrees to)
+#DESCRIPTION	: walks the tree like search.perft down to split_depth and appends remaining subtrees to 'tasks'
+#		  as (tag, board.moves of the subtree's root, remaining depth)
+#RETURNS	: number of leaf nodes found before split_depth
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def expand(board, depth, split_depth, tag, tasks):
+
+	if depth == 0 or board.last_move_won():
+		return 1
+
+	legal_moves = board.legal_moves()
+
+	if len(legal_moves) == 0:
+		return 1
+
+	if depth == 1:
+		return len(legal_moves)
+
+	if split_depth <= 0:
+		tasks.append((tag, tuple(board.moves), depth))
+		return 0
+
+	count = 0
+	for mov in legal_moves:
+		board.make_move(mov)
+		count += expand(board, depth - 1, split_depth - 1, tag, tasks)
+		board.unmake_last_move()
+
+	return count
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: root_of
+#PARAMETERS	: board
+#DESCRIPTION	: finds where workers rebuild the board from: a board decoded from a key has no moves for its stones,
+#		  workers decode its key and make the moves made since, other boards are replayed from the empty board
+#RETURNS	: start (key of the board or None for the empty board), offset (moves of board.moves already in start)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def root_of(board):
+	if board.base:
+		return board.key(), len(board.moves)
+	return None, 0
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: rebuild
+#PARAMETERS	: backend, size ((width, height, connect)), start (see root_of()), moves (made after start)
+#DESCRIPTION	: builds the board of a task in a worker process
+#RETURNS	: new board
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def rebuild(backend, size, start, moves):
+
+	if start is None:
+		b = board.Board(backend, *size)
+	else:
+		b = board.Board.from_key(start, *size)
+	for mov in moves:
+		b.make_move(mov)
+
+	return b
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: perft_task
+#PARAMETERS	: task (backend, (width, height, connect), start (see root_of()), moves after start, depth)
+#DESCRIPTION	: runs in a worker process, rebuilds the position and counts its leaf nodes
+#RETURNS	: number of leaf nodes
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def perft_task(task):
+
+	backend, size, start, moves, depth = task
+
+	return search.perft(rebuild(backend, size, start, moves), depth)
+#____________________________________________________________________________________________________________________________________________________
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: child_value
+#PARAMETERS	: board, mov, alpha, depth, table
+#DESCRIPTION	: searches root move 'mov' with window (alpha, inf) from the point of view of the player making it
+#RETURNS	: v (utility of the move)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def child_value(board, mov, alpha, depth, table):
+
+	board.make_move(mov)
+	if board.last_move_won():
+		v = 1
+	else:
+		v = -search.negamax(board, -math.inf, -alpha, depth, table)[0]
+	board.unmake_last_move()
+
+	return v
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: init_worker
+#PARAMETERS	: alpha (shared multiprocessing.Value), table_size
+#DESCRIPTION	: initializes a search worker process
+#RETURNS	: none
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def init_worker(alpha, table_size):
+	global worker_alpha, worker_table
+	worker_alpha = alpha
+	worker_table = transposition.TranspositionTable(table_size)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: search_task
+#PARAMETERS	: task (backend, (width, height, connect), start (see root_of()), moves from start to the root, root move, depth)
+#DESCRIPTION	: runs in a worker process, searches one root move with the current shared alpha
+#RETURNS	: v (utility of the move), alpha it was searched with
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def search_task(task):
+
+	backend, size, start, moves, mov, depth = task
+
+	b = rebuild(backend, size, start, moves)
+
+	alpha = worker_alpha.value
+	worker_table.new_search()
+
+	return child_value(b, mov, alpha, depth, worker_table), alpha
+#____________________________________________________________________________________________________________________________________________________
+#======================================================= SECTION END ================================================================================
@@ -0,0 +1,210 @@
+'''
+=====================================================================================================================================================
+FILE		: position_io.py
+DESCRIPTION	: streaming readers and writers of position files: binary files of Board.record() and text files of move strings
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import struct
+
+#Binary file layout: header followed by Board.record() of every position, positions are streamed so the header holds no count
+#header	: magic (4 bytes), board width, board height, stones in a row needed to win
+HEADER = struct.Struct('<4sBBB')
+MAGIC = b'C4P2'
+
+#Header of files written before the connect length was stored, their positions are of the given size with CONNECT
+OLD_HEADER = struct.Struct('<4sBB')
+OLD_MAGIC = b'C4PS'
+
+#Text files hold the board size in a comment line, '#size 8 7 4', files without one are of the standard size
+SIZE = '#size'
+
+#Records read from a binary file at a time
+CHUNK = 1 << 16
+
+class PositionWriter:
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: path, binary (True: binary records, False: one move string per line),
+	#		  width, height, connect (size of the boards, taken from the first board written if not given)
+	#DESCRIPTION	: opens a position file for writing, the header with the board size is written with the first position
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, path, binary = True, width = None, height = board.HEIGHT, connect = board.CONNECT):
+		self.binary = binary
+		self.count = 0
+		self.size = None if width is None else (width, height, connect)
+		self.header = False
+		self.file = open(path, 'wb' if binary else 'w')
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: write_header
+	#PARAMETERS	: size ((width, height, connect) of the position about to be written, None for the size given to the constructor)
+	#DESCRIPTION	: writes the header before the first position, raises ValueError for a position of another size than the file's
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def write_header(self, size):
+		if self.size is None:
+			self.size = size or (board.WIDTH, board.HEIGHT, board.CONNECT)
+		elif size is not None and size != self.size:
+			raise ValueError('position of a ' + str(size[0]) + 'x' + str(size[1]) + ' board in a file of ' + str(self.size[0]) + 'x' + str(self.size[1]) + ' boards')
+
+		if not self.header:
+			self.header = True
+			if self.binary:
+				self.file.write(HEADER.pack(MAGIC, *self.size))
+			elif self.size != (board.WIDTH, board.HEIGHT, board.CONNECT):
+				self.file.write(SIZE + ' ' + ' '.join(str(n) for n in self.size) + '\n')
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: write
+	#PARAMETERS	: b (board)
+	#DESCRIPTION	: appends a position. Binary files keep the position only, text files keep the moves
+	#		  Raises ValueError when writing a board without move history (read from a binary file) to a text file
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def write(self, b):
+		self.write_header((b.width, b.height, b.connect))
+		if self.binary:
+			self.file.write(b.record())
+		else:
+			self.file.write(b.move_string() + '\n')
+		self.count += 1
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: write_key
+	#PARAMETERS	: key (Board.key() of a board of the file's size)
+	#DESCRIPTION	: appends a position given by its key to a binary file
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def write_key(self, key):
+		if not self.binary:
+			raise ValueError('keys can only be written to binary position files')
+		self.write_header(None)
+		self.file.write(board.RECORD.pack(key))
+		self.count += 1
+	#____________________________________________________________________________________________________________________________________________
+
+	def close(self):
+		self.write_header(None)
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: read_keys
+#PARAMETERS	: path (binary or text position file)
+#DESCRIPTION	: reads keys of all positions, binary files are read CHUNK records at a time without building boards
+#RETURNS	: generator of keys
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def read_keys(path):
+
+	h = header(path)
+	if h is None:
+		for b in read_positions(path):
+			yield b.key()
+		return
+
+	with open(path, 'rb') as f:
+		f.seek(h[0])
+		while True:
+			data = f.read(board.RECORD.size * CHUNK)
+			if len(data) % board.RECORD.size != 0:
+				raise ValueError(path + ' ends with a partial record')
+			if not data:
+				break
+			for (key,) in board.RECORD.iter_unpack(data):
+				yield key
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: read_positions
+#PARAMETERS	: path (binary or text position file)
+#DESCRIPTION	: reads all positions on boards of the file's size (see board_size()). Boards of text files have the moves of the file,
+#		  boards of binary files are built by Board.from_key() and have no move history
+#		  Empty lines of text files are empty boards, lines starting with '#' are skipped
+#RETURNS	: generator of boards
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def read_positions(path):
+
+	width, height, connect = board_size(path)
+
+	if is_binary(path):
+		for key in read_keys(path):
+			yield board.Board.from_key(key, width, height, connect)
+		return
+
+	with open(path) as f:
+		for line in f:
+			line = line.strip()
+			if not line.startswith('#'):
+				yield board.Board.from_moves(line, width, height, connect)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: board_size
+#PARAMETERS	: path
+#DESCRIPTION	: reads the board size from the header of a binary file or the '#size' line of a text file
+#RETURNS	: (width, height, connect), the standard size for text files without a '#size' line
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def board_size(path):
+
+	h = header(path)
+	if h is not None:
+		return h[1]
+
+	with open(path) as f:
+		for line in f:
+			if line.startswith(SIZE + ' '):
+				return tuple(int(n) for n in line.split()[1:4])
+			if not line.startswith('#'):
+				break
+	return board.WIDTH, board.HEIGHT, board.CONNECT
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: header
+#PARAMETERS	: path
+#DESCRIPTION	: reads the header of a binary position file
+#RETURNS	: (size of the header in bytes, (width, height, connect)), None for a text file
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def header(path):
+
+	with open(path, 'rb') as f:
+		data = f.read(HEADER.size)
+
+	if data[:4] == MAGIC and len(data) == HEADER.size:
+		return HEADER.size, HEADER.unpack(data)[1:]
+	if data[:4] == OLD_MAGIC and len(data) >= OLD_HEADER.size:
+		return OLD_HEADER.size, OLD_HEADER.unpack(data[:OLD_HEADER.size])[1:] + (board.CONNECT,)
+	return None
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: is_binary
+#PARAMETERS	: path
+#DESCRIPTION	: checks the header of a position file
+#RETURNS	: True for binary files, False for text files
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def is_binary(path):
+	return header(path) is not None
+#____________________________________________________________________________________________________________________________________________________
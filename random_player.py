@@ -1,9 +1,12 @@
 import random
 
 class Player:
-  def __init__(self):
+  def __init__(self, width = 7, height = 6, connect = 4):
     # counts stores how many tiles are in each column (initalised to 0)
-    self.counts = [0] * 7
+    self.counts = [0] * width
+    self.height = height
+    # random moves do not look for wins, connect is kept so that every player takes the same board size arguments
+    self.connect = connect
 
   def name(self):
     return 'RANDOM'
@@ -13,10 +16,20 @@ class Player:
     self.counts[move]+=1
 
   def get_move(self):
-    # first we generate the moves, which is any column that isn't full (has less than 6 tiles)
+    # first we generate the moves, which is any column that isn't full (has less than 'height' tiles)
     moves = []
-    for i in range(0, 7):
-      if self.counts[i] < 6:
+    for i in range(0, len(self.counts)):
+      if self.counts[i] < self.height:
         moves.append(i)
     # return a random legal move
     return random.choice(moves)
+
+  def close(self):
+    # nothing to release, players of every kind are closed when they are discarded
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
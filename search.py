@@ -9,6 +9,149 @@ EMAIL	: rrrane@indiana.edu
 import board
 import random
 import math
+import time
+import transposition
+import ordering
+import evaluate
+
+#Width of the null window used by principal variation search, smaller than any difference between two scores
+NULL_WINDOW = 1e-6
+
+#======================================================== SECTION: SEARCH LIMITS ====================================================================
+
+#Raised inside the search when a Limits budget is exhausted
+class SearchTimeout(Exception):
+	pass
+
+class Limits:
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: time_limit (seconds, optional), node_limit (optional), stop (optional threading / multiprocessing Event)
+	#DESCRIPTION	: creates a budget for one search, clock starts now. Setting the stop event ends the search like a timeout
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def __init__(self, time_limit = None, node_limit = None, stop = None):
+		self.start = time.time()
+		self.deadline = None if time_limit is None else self.start + time_limit
+		self.node_limit = node_limit
+		self.stop = stop
+		self.nodes = 0
+	#______________________________________________________________________________________________________________________________________________
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: check
+	#PARAMETERS	: none
+	#DESCRIPTION	: counts a node and raises SearchTimeout if budget is exhausted or search is stopped
+	#		  Clock and stop event are read only every 64 nodes
+	#RETURNS	: none
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def check(self):
+		self.nodes += 1
+		if self.node_limit is not None and self.nodes > self.node_limit:
+			raise SearchTimeout()
+		if (self.nodes & 63) == 0:
+			if self.deadline is not None and time.time() >= self.deadline:
+				raise SearchTimeout()
+			if self.stop is not None and self.stop.is_set():
+				raise SearchTimeout()
+	#______________________________________________________________________________________________________________________________________________
+
+#Optional search statistics, passed down like Limits. Searches without a SearchStats pay a few 'is None' tests per node and none per child
+class SearchStats:
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: none
+	#DESCRIPTION	: creates empty counters
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def __init__(self):
+		self.root = 0
+		self.nodes = []
+		self.expanded = 0
+		self.cutoffs = 0
+		self.first_cutoffs = 0
+		self.terminal = 0
+		self.tt_hits = 0
+		self.iterations = []
+		self.iteration_start = None
+	#______________________________________________________________________________________________________________________________________________
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: node
+	#PARAMETERS	: board, count (number of nodes), below (nodes are children of the board if 1)
+	#DESCRIPTION	: counts nodes at the ply of the board, plies are counted from the root of the current iteration
+	#RETURNS	: none
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def node(self, board, count = 1, below = 0):
+		ply = len(board.moves) - self.root + below
+		while len(self.nodes) <= ply:
+			self.nodes.append(0)
+		self.nodes[ply] += count
+	#______________________________________________________________________________________________________________________________________________
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: begin_iteration
+	#PARAMETERS	: board (root), depth
+	#DESCRIPTION	: starts timing a search of the root to given depth
+	#RETURNS	: none
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def begin_iteration(self, board, depth):
+		self.root = len(board.moves)
+		self.iteration_start = (depth, time.perf_counter(), sum(self.nodes))
+	#______________________________________________________________________________________________________________________________________________
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: end_iteration
+	#PARAMETERS	: value, move, finished (False if the budget ran out)
+	#DESCRIPTION	: records depth, nodes, time and result of the iteration started by begin_iteration
+	#RETURNS	: none
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def end_iteration(self, value, move, finished = True):
+		depth, start, nodes = self.iteration_start
+		nodes = sum(self.nodes) - nodes
+		self.iterations.append({
+			'depth': depth,
+			'nodes': nodes,
+			'time': time.perf_counter() - start,
+			'value': value,
+			'move': move,
+			'finished': finished,
+			'branching_factor': nodes ** (1 / depth) if depth > 0 and nodes > 0 else 0.0,
+		})
+	#______________________________________________________________________________________________________________________________________________
+	
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: result
+	#PARAMETERS	: none
+	#DESCRIPTION	: summarizes the counters
+	#		  cutoff_rate is the fraction of expanded nodes failing high, first_move_cutoff_rate the fraction of those cutoffs
+	#		  caused by the first move searched, branching_factor is that of the deepest finished iteration
+	#RETURNS	: dictionary
+	#----------------------------------------------------------------------------------------------------------------------------------------------
+	
+	def result(self):
+		finished = [it for it in self.iterations if it['finished']]
+		return {
+			'nodes': sum(self.nodes),
+			'nodes_per_ply': list(self.nodes),
+			'expanded': self.expanded,
+			'cutoff_rate': self.cutoffs / self.expanded if self.expanded > 0 else 0.0,
+			'first_move_cutoff_rate': self.first_cutoffs / self.cutoffs if self.cutoffs > 0 else 0.0,
+			'branching_factor': finished[-1]['branching_factor'] if finished else 0.0,
+			'terminal': self.terminal,
+			'tt_hits': self.tt_hits,
+			'time': sum(it['time'] for it in self.iterations),
+			'iterations': list(self.iterations),
+		}
+	#______________________________________________________________________________________________________________________________________________
+
+#======================================================== SECTION END ===============================================================================
 
 #======================================================== SECTION: MAIN FUNCTIONS ===================================================================
 #----------------------------------------------------------------------------------------------------------------------------------------------------
@@ -21,7 +164,7 @@ import math
 def perft(board, depth):
 	
 	#Get all possible moves
-	legal_moves = board.generate_moves()
+	legal_moves = board.legal_moves()
 	
 	#Check if last move caused win
 	lmv = board.last_move_won()
@@ -41,10 +184,19 @@ def perft(board, depth):
 	#initialize variable to count leaf nodes visited so far
 	count = 0
 	
+	#Mirrored moves of a symmetric position have subtrees of equal size, only the right one is counted, twice
+	symmetric = board.is_symmetric()
+	last = board.width - 1
+	
 	#For all legal moves from current state, call perft recursively
 	for i in legal_moves:
+		if symmetric and 2 * i < last:
+			continue
 		board.make_move(i)
-		count += perft(board, depth - 1)
+		if symmetric and 2 * i > last:
+			count += 2 * perft(board, depth - 1)
+		else:
+			count += perft(board, depth - 1)
 	
 	#Unmake last move made by calling function before returning count
 	board.unmake_last_move()
@@ -55,20 +207,44 @@ def perft(board, depth):
 	pass
 #____________________________________________________________________________________________________________________________________________________
 
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: perft_hashed
+#PARAMETERS	: board, depth, table (optional transposition.TranspositionTable), table_size
+#DESCRIPTION	: counts number of leaf nodes at given depth like perft, but remembers count of every subtree in a bounded table
+#		  so that a position reached by different move orders is counted only once
+#		  Unlike perft, the board is left unchanged
+#RETURN		: count (number of leaf nodes)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def perft_hashed(board, depth, table = None, table_size = 1 << 20):
+	
+	if table is None:
+		table = transposition.TranspositionTable(table_size)
+	
+	return count_leaves(board, depth, table)
+#____________________________________________________________________________________________________________________________________________________
+
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 #NAME		: find_win
-#PARAMETERS	: board, depth
+#PARAMETERS	: board, depth, table (optional transposition.TranspositionTable), tablebase (optional tablebase.Tablebase),
+#		  stats (optional SearchStats, filled with statistics of the search)
 #DESCRIPTION	: determines if there is a Forced Win at given depth
 #RETURNS	: string message
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 
-def find_win(board, depth):
+def find_win(board, depth, table = None, tablebase = None, stats = None):
 	
-	#Get which player has a turn now
-	me = board.get_player()
+	if table is not None:
+		table.new_search()
+	
+	if stats is not None:
+		stats.begin_iteration(board, depth)
 	
 	#Select move with maximum utility
-	v, a, b, m = max_value(board, me, -math.inf, math.inf, depth)
+	v, m = negamax(board, -math.inf, math.inf, depth, table, None, None, None, tablebase, stats)
+	
+	if stats is not None:
+		stats.end_iteration(v, m)
 	
 	#Return appropriate result
 	if v == 1:
@@ -81,10 +257,380 @@ def find_win(board, depth):
 	return 'NO FORCED WIN IN ' + str(depth) + ' MOVES'
 	pass
 #____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: iterative_deepening
+#PARAMETERS	: board, time_limit (seconds), node_limit, max_depth, table (optional transposition.TranspositionTable),
+#		  order (optional ordering.MoveOrdering), evaluator (optional batch evaluator, see negamax),
+#		  stats (optional SearchStats, every iteration is recorded), stop (optional Event, see Limits)
+#DESCRIPTION	: searches depth 1, 2, ... until budget is exhausted and keeps result of the deepest finished iteration
+#		  Best moves of earlier iterations are kept in the table and searched first by later iterations
+#RETURNS	: v (utility of the move), ret_mov (best move), depth (deepest finished iteration)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def iterative_deepening(board, time_limit = None, node_limit = None, max_depth = None, table = None, order = None, evaluator = None, stats = None, stop = None):
+	
+	legal_moves = shuffle(board.legal_moves())
+	
+	#Nothing deeper than the number of empty cells can be searched
+	empty = board.empty_cells()
+	if max_depth is None or empty < max_depth:
+		max_depth = empty
+	
+	if table is None:
+		table = transposition.TranspositionTable(1 << 16)
+	table.new_search()
+	
+	if order is None:
+		order = ordering.MoveOrdering(board.width, board.height)
+	order.new_search()
+	
+	limits = Limits(time_limit, node_limit, stop)
+	start = len(board.moves)
+	
+	#Fall back to first ordered move if not even depth 1 finishes
+	v, ret_mov, depth = 0, legal_moves[0] if legal_moves else -1, 0
+	
+	for d in range(1, max_depth + 1):
+		if stats is not None:
+			stats.begin_iteration(board, d)
+		
+		try:
+			val, mov = negamax(board, -math.inf, math.inf, d, table, limits, order, evaluator, None, stats)
+		except SearchTimeout:
+			#Take back moves of the unfinished iteration
+			while len(board.moves) > start:
+				board.unmake_last_move()
+			if stats is not None:
+				stats.end_iteration(None, -1, False)
+			break
+		
+		if stats is not None:
+			stats.end_iteration(val, mov)
+		
+		v, ret_mov, depth = val, mov, d
+		
+		#A won or lost position does not change with deeper search
+		if v == 1 or v == -1:
+			break
+	
+	return v, ret_mov, depth
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: negamax
+#PARAMETERS	: board, alpha, beta, depth, table (optional transposition.TranspositionTable), limits (optional Limits),
+#		  order (optional ordering.MoveOrdering, static centre-out ordering is used without it),
+#		  evaluator (optional batch evaluator such as evaluate.evaluate_batch, scores positions at depth limit instead of 0),
+#		  tablebase (optional tablebase.Tablebase, probed once few cells are empty), stats (optional SearchStats)
+#DESCRIPTION	: principal variation search in negamax form
+#		  Scores are from the point of view of the player to move: 1 (win), -1 (loss), 0 (draw or depth limit reached)
+#		  First move is searched with full window, remaining moves with a null window and searched again only if they beat alpha
+#		  A move which wins is scored right after it is made, so terminal positions are never searched
+#		  With an evaluator, children of a node at depth 1 are scored together with one evaluator call
+#RETURNS	: v (score), ret_mov (best move, -1 for a terminal position)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def negamax(board, alpha, beta, depth, table = None, limits = None, order = None, evaluator = None, tablebase = None, stats = None):
+	
+	#count node against search budget
+	if limits is not None:
+		limits.check()
+	
+	if stats is not None:
+		stats.node(board)
+	
+	#Opponent's last move won
+	if board.last_move_won():
+		if stats is not None:
+			stats.terminal += 1
+		return -1, -1
+	
+	legal_moves = board.legal_moves()
+	
+	#Board is full or depth limit reached
+	if len(legal_moves) == 0:
+		if stats is not None:
+			stats.terminal += 1
+		return 0, -1
+	
+	if depth == 0:
+		if evaluator is not None:
+			return evaluator([evaluate.masks(board)])[0], -1
+		return 0, -1
+	
+	#Win or loss within the depth limit is exact, beyond it the depth limited search would see a draw
+	if tablebase is not None:
+		entry = tablebase.probe(board)
+		if entry is not None:
+			result, distance, mov = entry
+			if result == 0 or distance <= depth:
+				return result, mov
+			if evaluator is None:
+				return 0, mov
+	
+	#return stored value if it is deep enough to decide this node
+	tt_mov = -1
+	if table is not None:
+		entry = probe(table, board)
+		if entry is not None:
+			val, d, flag, tt_mov = entry
+			if d >= depth:
+				if flag == transposition.EXACT or (flag == transposition.LOWER and val >= beta) or (flag == transposition.UPPER and val <= alpha):
+					if stats is not None:
+						stats.tt_hits += 1
+					return val, tt_mov
+	
+	#order moves, best move stored in the table is searched first
+	if order is not None:
+		legal_moves = order.order(board, legal_moves, tt_mov)
+	else:
+		legal_moves = shuffle(legal_moves)
+		if tt_mov in legal_moves:
+			legal_moves.remove(tt_mov)
+			legal_moves.insert(0, tt_mov)
+	
+	#Mirrored moves of a symmetric position have equal values, only the one ordered first is searched
+	if board.is_symmetric():
+		legal_moves = drop_mirrored(legal_moves, board.width)
+	
+	if stats is not None:
+		stats.expanded += 1
+	
+	#Score all children in one batch
+	if depth == 1 and evaluator is not None:
+		if stats is not None:
+			stats.node(board, len(legal_moves), 1)
+		v, ret_mov = horizon(board, legal_moves, evaluator)
+		if table is not None:
+			store(table, board, v, alpha, beta, depth, ret_mov)
+		return v, ret_mov
+	
+	v = -math.inf
+	ret_mov = -1
+	a = alpha
+	won = False
+	
+	for mov in legal_moves:
+		board.make_move(mov)
+		
+		if board.last_move_won():
+			score = 1
+			won = True
+		elif ret_mov == -1:
+			score = -negamax(board, -beta, -a, depth - 1, table, limits, order, evaluator, tablebase, stats)[0]
+		else:
+			#Null window: only tells whether the move is better than alpha
+			score = -negamax(board, -a - NULL_WINDOW, -a, depth - 1, table, limits, order, evaluator, tablebase, stats)[0]
+			if a < score < beta:
+				score = -negamax(board, -beta, -score, depth - 1, table, limits, order, evaluator, tablebase, stats)[0]
+		
+		board.unmake_last_move()
+		
+		if score > v:
+			v, ret_mov = score, mov
+		
+		if v >= beta:
+			if order is not None:
+				order.cutoff(board, mov, depth)
+			break
+		
+		#Nothing is better than a win
+		if v == 1:
+			break
+		
+		a = max(a, v)
+	
+	#Both the winning child and the cutoff end the loop, so they are counted once here instead of per child
+	if stats is not None:
+		if won:
+			stats.node(board, 1, 1)
+			stats.terminal += 1
+		if v >= beta:
+			stats.cutoffs += 1
+			if ret_mov == legal_moves[0]:
+				stats.first_cutoffs += 1
+	
+	if table is not None:
+		store(table, board, v, alpha, beta, depth, ret_mov)
+	
+	return v, ret_mov
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: horizon
+#PARAMETERS	: board, legal_moves (ordered), evaluator
+#DESCRIPTION	: scores every move of a node at depth 1, positions after the moves are evaluated with a single evaluator call
+#RETURNS	: v (score), ret_mov (best move)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def horizon(board, legal_moves, evaluator):
+	
+	moves = []
+	positions = []
+	draws = []
+	
+	for mov in legal_moves:
+		board.make_move(mov)
+		
+		#Winning move needs no evaluation
+		if board.last_move_won():
+			board.unmake_last_move()
+			return 1, mov
+		
+		#Full board is a draw
+		if len(board.legal_moves()) == 0:
+			draws.append(mov)
+		else:
+			moves.append(mov)
+			positions.append(evaluate.masks(board))
+		
+		board.unmake_last_move()
+	
+	#Children are scored from opponent's point of view
+	scores = dict(zip(moves, evaluator(positions)))
+	for mov in draws:
+		scores[mov] = 0
+	
+	v, ret_mov = -math.inf, -1
+	for mov in legal_moves:
+		if -scores[mov] > v:
+			v, ret_mov = -scores[mov], mov
+	
+	return v, ret_mov
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: compare_ordering
+#PARAMETERS	: board, depth, table_size (entries of transposition table, 0 to search without a table)
+#DESCRIPTION	: searches a position at fixed depth with static shuffle() ordering and with dynamic ordering and counts nodes
+#RETURNS	: dictionary {'shuffle': nodes, 'dynamic': nodes, 'value': score}
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def compare_ordering(board, depth, table_size = 1 << 16):
+	
+	result = {}
+	for name in ('shuffle', 'dynamic'):
+		table = transposition.TranspositionTable(table_size) if table_size > 0 else None
+		order = ordering.MoveOrdering(board.width, board.height) if name == 'dynamic' else None
+		limits = Limits()
+		v, m = negamax(board, -math.inf, math.inf, depth, table, limits, order)
+		result[name] = limits.nodes
+		result['value'] = v
+	
+	return result
+#____________________________________________________________________________________________________________________________________________________
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: ponder
+#PARAMETERS	: conn (multiprocessing connection), stop (multiprocessing Event), moves (position after the player's move),
+#		  depth (fixed depth, or depth of the player's last search with a budget), time_limit, node_limit, heuristic, collect_stats,
+#		  size (width, height, connect of the board)
+#DESCRIPTION	: runs in a background process while the opponent thinks
+#		  Predicts the opponent's reply with a search one ply shallower than the player's (within the same budget) and sends ('reply', move),
+#		  then searches the position after the reply the same way the player would and sends ('move', move, SearchStats or None)
+#		  Sends ('stopped',) if stop is set before the search ends
+#RETURNS	: none
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def ponder(conn, stop, moves, depth, time_limit, node_limit, heuristic, collect_stats, size = (board.WIDTH, board.HEIGHT, board.CONNECT)):
+	
+	b = board.Board(None, *size)
+	for mov in moves:
+		b.make_move(mov)
+	
+	evaluator = evaluate.evaluator(*size) if heuristic else None
+	
+	budget = time_limit is not None or node_limit is not None
+	
+	try:
+		if budget:
+			v, reply, d = iterative_deepening(b, time_limit, node_limit, max(1, depth - 1), None, None, evaluator, None, stop)
+		else:
+			v, reply = negamax(b, -math.inf, math.inf, max(1, depth - 1), None, Limits(None, None, stop), None, evaluator)
+		if stop.is_set():
+			raise SearchTimeout()
+		conn.send(('reply', reply))
+		b.make_move(reply)
+		
+		#Nothing to search if the reply ends the game
+		if b.last_move_won() or len(b.generate_moves()) == 0:
+			conn.send(('move', -1, None))
+			return
+		
+		stats = SearchStats() if collect_stats else None
+		if budget:
+			v, mov, d = iterative_deepening(b, time_limit, node_limit, None, transposition.TranspositionTable(1 << 18), ordering.MoveOrdering(b.width, b.height), evaluator, stats, stop)
+			if stop.is_set():
+				raise SearchTimeout()
+		else:
+			if stats is not None:
+				stats.begin_iteration(b, depth)
+			v, mov = negamax(b, -math.inf, math.inf, depth, None, Limits(None, None, stop), None, evaluator, None, stats)
+			if stats is not None:
+				stats.end_iteration(v, mov)
+		conn.send(('move', mov, stats))
+	except SearchTimeout:
+		conn.send(('stopped',))
+	finally:
+		conn.close()
+#____________________________________________________________________________________________________________________________________________________
 #======================================================== SECTION END ===============================================================================
 
 #======================================================== SECTION: HELPER FUNCTIONS =================================================================
 
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: count_leaves
+#PARAMETERS	: board, depth, table
+#DESCRIPTION	: recursive part of perft_hashed, table maps position to (count, depth)
+#RETURNS	: count (number of leaf nodes)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def count_leaves(board, depth, table):
+	
+	legal_moves = board.legal_moves()
+	
+	if board.last_move_won() or len(legal_moves) <= 0:
+		return 1
+	
+	if depth == 1:
+		return len(legal_moves)
+	
+	#Count is reused only if it was stored for the same remaining depth, a position and its mirror image share an entry
+	key = board.canonical_hash()
+	entry = table.probe(key)
+	if entry is not None and entry[1] == depth:
+		return entry[0]
+	
+	symmetric = board.is_symmetric()
+	last = board.width - 1
+	
+	count = 0
+	for i in legal_moves:
+		if symmetric and 2 * i < last:
+			continue
+		board.make_move(i)
+		if symmetric and 2 * i > last:
+			count += 2 * count_leaves(board, depth - 1, table)
+		else:
+			count += count_leaves(board, depth - 1, table)
+		board.unmake_last_move()
+	
+	table.store(key, count, depth, transposition.EXACT, -1)
+	
+	return count
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: drop_mirrored
+#PARAMETERS	: legal_moves (ordered moves of a symmetric position), width (board width)
+#DESCRIPTION	: removes every move whose mirror image comes earlier in the list
+#RETURNS	: list of moves
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def drop_mirrored(legal_moves, width):
+	return [mov for i, mov in enumerate(legal_moves) if width - 1 - mov not in legal_moves[:i]]
+#____________________________________________________________________________________________________________________________________________________
+
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 #NAME		: shuffle
 #PARAMETERS	: lst (list to shuffle)
@@ -123,13 +669,19 @@ def shuffle(lst):
 	
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 #NAME		: max_value
-#PARAMETERS	: board, plyer, alpha, beta, depth
+#PARAMETERS	: board, plyer, alpha, beta, depth, table (optional transposition.TranspositionTable), limits (optional Limits)
 #DESCRIPTION	: gets a move with maximum utility
 #		  Source - "Russel S., Norvig P.; Artificial Intelligence- A modern approach 2nd edition"
+#		  Plain alpha-beta kept as a reference for negamax(), which is used by find_win() and the players
+#		  Table values are stored from the point of view of the player to move
 #RETURNS	: v (maximum value), a (local alpha), b (local beta), ret_mov (move with maximum utility)
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 
-def max_value(board, player, alpha, beta, depth):
+def max_value(board, player, alpha, beta, depth, table = None, limits = None):
+	
+	#count node against search budget
+	if limits is not None:
+		limits.check()
 	
 	#if terminal state then return utility of leaf node
 	if is_terminal(board):
@@ -143,38 +695,59 @@ def max_value(board, player, alpha, beta, depth):
 		return u, -1, -1, -1
 	
 	
+	#return stored value if it is deep enough to decide this node
+	tt_mov = -1
+	if table is not None:
+		entry = probe(table, board)
+		if entry is not None:
+			val, d, flag, tt_mov = entry
+			if d >= depth:
+				if flag == transposition.EXACT or (flag == transposition.LOWER and val >= beta) or (flag == transposition.UPPER and val <= alpha):
+					return val, alpha, beta, tt_mov
+	
 	v = - math.inf
 	ret_mov = -1
 	a, b = alpha, beta
 	
-	#get list of possible moves and shuffle it
-	legal_moves = shuffle(board.generate_moves())
+	#get list of possible moves and shuffle it, best move stored in the table is searched first
+	legal_moves = shuffle(board.legal_moves())
+	if tt_mov in legal_moves:
+		legal_moves.remove(tt_mov)
+		legal_moves.insert(0, tt_mov)
 	
 	#find move with maximum utility	
 	for mov in legal_moves:
 		board.make_move(mov)
-		max_val, a1, b1, m  = min_value(board, player, a, b, depth - 1)
+		max_val, a1, b1, m  = min_value(board, player, a, b, depth - 1, table, limits)
 		if max_val > v:
 			v, ret_mov = max_val, mov
 		
 		board.unmake_last_move()
 		if v >= b:
-			return v, a, b, ret_mov
+			break
 		
 		a = max(a, v)
+	
+	if table is not None:
+		store(table, board, v, alpha, beta, depth, ret_mov)
 
 	return v, a, b, ret_mov
 #____________________________________________________________________________________________________________________________________________________
 
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 #NAME		: min_value
-#PARAMETERS	: board, player, alpha, beta, depth
+#PARAMETERS	: board, player, alpha, beta, depth, table (optional transposition.TranspositionTable), limits (optional Limits)
 #DESCRIPTION	: gets a move with minimum utility
 #		  Source - "Russel S., Norvig P.; Artificial Intelligence- A modern approach 2nd edition"
+#		  Table values are stored from the point of view of the player to move, that is negated
 #RETURNS	: v (minimum value), a (local alpha), b (local beta), ret_mov (move with minimum utility
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 	
-def min_value(board, player, alpha, beta, depth):
+def min_value(board, player, alpha, beta, depth, table = None, limits = None):
+	
+	#count node against search budget
+	if limits is not None:
+		limits.check()
 	
 	#if terminal state then return utility of leaf node
 	if is_terminal(board):
@@ -187,30 +760,90 @@ def min_value(board, player, alpha, beta, depth):
 		u = 0
 		return u, -1, -1, -1
 	
+	#return stored value if it is deep enough to decide this node
+	tt_mov = -1
+	if table is not None:
+		entry = probe(table, board)
+		if entry is not None:
+			val, d, flag, tt_mov = entry
+			if d >= depth:
+				if flag == transposition.EXACT or (flag == transposition.LOWER and -val <= alpha) or (flag == transposition.UPPER and -val >= beta):
+					return -val, alpha, beta, tt_mov
+	
 	v = math.inf
 	ret_mov = -1
 	a, b = alpha, beta
 	
-	#get list of possible moves and shuffle it
-	legal_moves = shuffle(board.generate_moves())
+	#get list of possible moves and shuffle it, best move stored in the table is searched first
+	legal_moves = shuffle(board.legal_moves())
+	if tt_mov in legal_moves:
+		legal_moves.remove(tt_mov)
+		legal_moves.insert(0, tt_mov)
 	
 	#find a move with minimum utility
 	for mov in legal_moves:
 		board.make_move(mov)
-		min_val, a1, b1, m = max_value(board, player, a, b, depth - 1)
+		min_val, a1, b1, m = max_value(board, player, a, b, depth - 1, table, limits)
 		if min_val < v:
 			v, ret_mov = min_val, mov
 		
 		board.unmake_last_move()
 		if v <= a:
 			b = v
-			return v, a, b, ret_mov
+			break
 		
 		b = min(b, v)
+	
+	if table is not None:
+		store(table, board, -v, -beta, -alpha, depth, ret_mov)
 		
 	return v, a, b, ret_mov
 #____________________________________________________________________________________________________________________________________________________
 
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: store
+#PARAMETERS	: table, board, v, alpha, beta, depth, mov
+#DESCRIPTION	: stores result of a search with window (alpha, beta) in the transposition table
+#		  v, alpha and beta are from the point of view of the player to move
+#		  A position and its mirror image share an entry: the entry is keyed by the smaller of the two hashes
+#		  and the move is stored mirrored when the mirror hash is used
+#RETURNS	: none
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def store(table, board, v, alpha, beta, depth, mov):
+	
+	#value at or below alpha is an upper bound, value at or above beta is a lower bound
+	if v <= alpha:
+		flag = transposition.UPPER
+	elif v >= beta:
+		flag = transposition.LOWER
+	else:
+		flag = transposition.EXACT
+	
+	if board.mirror < board.hash:
+		table.store(board.mirror, v, depth, flag, board.width - 1 - mov if mov >= 0 else mov)
+	else:
+		table.store(board.hash, v, depth, flag, mov)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: probe
+#PARAMETERS	: table, board
+#DESCRIPTION	: looks up an entry written by store(), the move is mirrored back if the entry was stored for the mirror image
+#RETURNS	: (value, depth, flag, move) or None
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def probe(table, board):
+	
+	if board.mirror < board.hash:
+		entry = table.probe(board.mirror)
+		if entry is not None and entry[3] >= 0:
+			return entry[0], entry[1], entry[2], board.width - 1 - entry[3]
+		return entry
+	
+	return table.probe(board.hash)
+#____________________________________________________________________________________________________________________________________________________
+
 #----------------------------------------------------------------------------------------------------------------------------------------------------
 #NAME		: is_terminal
 #PARAMETERS	: board
@@ -221,7 +854,7 @@ def min_value(board, player, alpha, beta, depth):
 def is_terminal(board):
 	
 	#Get possible moves		
-	legal_moves = board.generate_moves()
+	legal_moves = board.legal_moves()
 	
 	#Check if last move caused any player win the game
 	lmw = board.last_move_won()
@@ -0,0 +1,387 @@
+'''
+=====================================================================================================================================================
+FILE		: server.py
+DESCRIPTION	: asyncio TCP server hosting many games against the computer players, and a load generator client measuring it
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import computer
+import Player
+import random_player
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+import time
+import random
+import argparse
+
+#Protocol: one JSON object per line in both directions, every request gets one reply
+#	{"op": "new", "player": "computer", "depth": 3, "first": "client"}	-> {"game": id, "moves": [...], "result": null}
+#	{"op": "move", "game": id, "move": col}					-> {"game": id, "move": reply or null, "moves": [...], "result": ...}
+#	{"op": "close", "game": id}						-> {"game": id, "closed": true}
+#	{"op": "stats"}								-> server counters
+#result is null while the game goes on, then "client", "server" (winner) or "draw". Errors are replied as {"error": message}
+#A game can only be played and closed by the connection which opened it
+
+#Players the server can play with, constructed from depth (random player has none)
+PLAYERS = {
+	'computer': lambda depth: computer.Player(depth),
+	'Player': lambda depth: Player.Player(depth),
+	'random': lambda depth: random_player.Player(),
+}
+
+#Defaults of the server
+PORT = 4747
+MAX_DEPTH = 8
+
+#Connections waiting to be accepted, thousands of clients may connect at once
+BACKLOG = 4096
+
+class Game:
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: player (key of PLAYERS), depth
+	#DESCRIPTION	: session state of one game, the server's player is rebuilt from the moves in a worker process for every search
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, player, depth):
+		self.player = player
+		self.depth = depth
+		self.board = board.Board()
+		self.server_side = None
+		self.result = None
+		self.busy = False
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: play
+	#PARAMETERS	: move, side ('client' / 'server')
+	#DESCRIPTION	: makes a move and records the result if it ends the game
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def play(self, move, side):
+		self.board.make_move(move)
+		if self.board.last_move_won():
+			self.result = side
+		elif len(self.board.legal_moves()) == 0:
+			self.result = 'draw'
+	#____________________________________________________________________________________________________________________________________________
+
+class GameServer:
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: workers (processes running searches, defaults to number of cores), max_searches (searches submitted at once,
+	#		  defaults to workers), max_depth (deepest search a client can ask for), max_games (open games)
+	#DESCRIPTION	: creates the server state, call start() inside a running event loop
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, workers = None, max_searches = None, max_depth = MAX_DEPTH, max_games = 100000):
+		if workers is None:
+			workers = os.cpu_count() or 1
+		self.pool = concurrent.futures.ProcessPoolExecutor(max_workers = workers)
+		self.searches = asyncio.Semaphore(max_searches or workers)
+		self.max_depth = max_depth
+		self.max_games = max_games
+		self.games = {}
+		self.next_id = 0
+		self.server = None
+		self.connections = set()
+		self.counters = {'requests': 0, 'searches': 0, 'games': 0, 'errors': 0, 'search_time': 0.0}
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: start
+	#PARAMETERS	: host, port (0 picks a free port)
+	#DESCRIPTION	: starts listening
+	#RETURNS	: port
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	async def start(self, host = '127.0.0.1', port = PORT):
+		self.server = await asyncio.start_server(self.handle, host, port, backlog = BACKLOG)
+		return self.server.sockets[0].getsockname()[1]
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: close
+	#PARAMETERS	: none
+	#DESCRIPTION	: stops listening, ends open connections and shuts down the process pool
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	async def close(self):
+		if self.server is not None:
+			self.server.close()
+		for task in list(self.connections):
+			task.cancel()
+		await asyncio.gather(*self.connections, return_exceptions = True)
+		if self.server is not None:
+			await self.server.wait_closed()
+		self.pool.shutdown()
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: handle
+	#PARAMETERS	: reader, writer (streams of one connection)
+	#DESCRIPTION	: answers requests of a connection one at a time, games opened by the connection are closed when it ends
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	async def handle(self, reader, writer):
+
+		opened = set()
+		task = asyncio.current_task()
+		self.connections.add(task)
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+
+				try:
+					reply = await self.request(json.loads(line), opened)
+				except (ValueError, KeyError, TypeError) as e:
+					self.counters['errors'] += 1
+					reply = {'error': str(e)}
+
+				writer.write((json.dumps(reply) + '\n').encode())
+				await writer.drain()
+		except (ConnectionError, asyncio.CancelledError):
+			#connection lost or server closing
+			pass
+		finally:
+			self.connections.discard(task)
+			for game in opened:
+				self.games.pop(game, None)
+			writer.close()
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: request
+	#PARAMETERS	: msg (decoded request), opened (ids of games opened by the connection)
+	#DESCRIPTION	: carries out one request, raises ValueError / KeyError for a bad request
+	#RETURNS	: reply
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	async def request(self, msg, opened):
+
+		self.counters['requests'] += 1
+		op = msg['op']
+
+		if op == 'stats':
+			return dict(self.counters, open_games = len(self.games))
+
+		if op == 'new':
+			if len(self.games) >= self.max_games:
+				raise ValueError('too many games')
+			player = msg.get('player', 'computer')
+			if player not in PLAYERS:
+				raise ValueError('unknown player: ' + str(player))
+			depth = int(msg.get('depth', 3))
+			if not 1 <= depth <= self.max_depth:
+				raise ValueError('depth must be between 1 and ' + str(self.max_depth))
+
+			game = Game(player, depth)
+			ident = self.next_id
+			self.next_id += 1
+			self.games[ident] = game
+			opened.add(ident)
+			self.counters['games'] += 1
+
+			#Server plays first
+			game.server_side = 0 if msg.get('first', 'client') == 'server' else 1
+			if game.server_side == 0:
+				game.busy = True
+				try:
+					await self.server_move(game)
+				finally:
+					game.busy = False
+			return {'game': ident, 'moves': game.board.moves, 'result': game.result}
+
+		#Games of other connections are unknown to this one
+		if msg['game'] not in opened:
+			raise ValueError('unknown game: ' + str(msg['game']))
+		game = self.games[msg['game']]
+
+		if op == 'close':
+			del self.games[msg['game']]
+			opened.discard(msg['game'])
+			return {'game': msg['game'], 'closed': True}
+
+		if op == 'move':
+			move = msg['move']
+			if game.result is not None:
+				raise ValueError('game is over')
+			if game.busy or game.board.get_player() == game.server_side:
+				raise ValueError('not your turn')
+			if move not in game.board.legal_moves():
+				raise ValueError('illegal move: ' + str(move))
+
+			game.play(move, 'client')
+			reply = None
+			if game.result is None:
+				game.busy = True
+				try:
+					reply = await self.server_move(game)
+				finally:
+					game.busy = False
+			return {'game': msg['game'], 'move': reply, 'moves': game.board.moves, 'result': game.result}
+
+		raise ValueError('unknown op: ' + str(op))
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: server_move
+	#PARAMETERS	: game
+	#DESCRIPTION	: searches the server's move in the process pool, at most max_searches searches are submitted at once
+	#RETURNS	: move
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	async def server_move(self, game):
+
+		async with self.searches:
+			start = time.perf_counter()
+			move = await asyncio.get_running_loop().run_in_executor(self.pool, search_task, (game.player, game.depth, tuple(game.board.moves)))
+			self.counters['searches'] += 1
+			self.counters['search_time'] += time.perf_counter() - start
+
+		game.play(move, 'server')
+		return move
+	#____________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: search_task
+#PARAMETERS	: task (player, depth, moves of the game)
+#DESCRIPTION	: builds the player, replays the game and gets its move, runs in a worker process
+#RETURNS	: move
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def search_task(task):
+	player, depth, moves = task
+	with PLAYERS[player](depth) as p:
+		for mov in moves:
+			p.make_move(mov)
+		return p.get_move()
+#____________________________________________________________________________________________________________________________________________________
+
+#======================================================== SECTION: LOAD GENERATOR ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: load
+#PARAMETERS	: host, port, clients (concurrent connections), games (games played by every client), player, depth, seed
+#DESCRIPTION	: every client plays random legal moves against the server and times every request
+#		  Latency is kept per op: only move requests (and new games the server starts) wait for a search
+#RETURNS	: dictionary with number of requests and games, requests per second, p50 / p99 latency of move requests
+#		  and {op: {'requests', 'p50', 'p99'}} of every op, latencies in seconds
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+async def load(host, port, clients, games, player = 'computer', depth = 3, seed = 0):
+
+	latency = {'new': [], 'move': [], 'close': []}
+	results = {'client': 0, 'server': 0, 'draw': 0}
+	start = time.perf_counter()
+
+	async def client(n):
+		rng = random.Random(seed + n)
+		reader, writer = await asyncio.open_connection(host, port)
+
+		async def call(msg):
+			t = time.perf_counter()
+			writer.write((json.dumps(msg) + '\n').encode())
+			await writer.drain()
+			reply = json.loads(await reader.readline())
+			latency[msg['op']].append(time.perf_counter() - t)
+			if 'error' in reply:
+				raise RuntimeError(reply['error'])
+			return reply
+
+		for g in range(games):
+			first = 'server' if (n + g) % 2 else 'client'
+			reply = await call({'op': 'new', 'player': player, 'depth': depth, 'first': first})
+			b = board.Board.from_moves(reply['moves'])
+			while reply['result'] is None:
+				reply = await call({'op': 'move', 'game': reply['game'], 'move': rng.choice(b.legal_moves())})
+				b = board.Board.from_moves(reply['moves'])
+			results[reply['result']] += 1
+			await call({'op': 'close', 'game': reply['game']})
+
+		writer.close()
+		await writer.wait_closed()
+
+	await asyncio.gather(*[client(n) for n in range(clients)])
+	elapsed = time.perf_counter() - start
+
+	ops = {}
+	for op, times in latency.items():
+		times.sort()
+		ops[op] = {
+			'requests': len(times),
+			'p50': times[len(times) // 2] if times else 0.0,
+			'p99': times[min(len(times) - 1, int(0.99 * len(times)))] if times else 0.0,
+		}
+	requests = sum(len(times) for times in latency.values())
+
+	return {
+		'requests': requests,
+		'games': clients * games,
+		'results': results,
+		'seconds': elapsed,
+		'requests_per_second': requests / elapsed,
+		'move_p50_latency': ops['move']['p50'],
+		'move_p99_latency': ops['move']['p99'],
+		'latency': ops,
+	}
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: main
+#PARAMETERS	: argv (command line arguments)
+#DESCRIPTION	: usage: python server.py serve [--host H] [--port P] [--workers N] [--max-searches S]
+#		         python server.py load [--host H] [--port P] [--clients C] [--games G] [--player NAME] [--depth D]
+#RETURNS	: exit status
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def main(argv):
+
+	parser = argparse.ArgumentParser(description = 'connect four game server')
+	parser.add_argument('command', choices = ('serve', 'load'))
+	parser.add_argument('--host', default = '127.0.0.1')
+	parser.add_argument('--port', type = int, default = PORT)
+	parser.add_argument('--workers', type = int, default = None, help = 'search processes of the server')
+	parser.add_argument('--max-searches', type = int, default = None, help = 'searches submitted at once')
+	parser.add_argument('--clients', type = int, default = 100, help = 'concurrent connections of the load generator')
+	parser.add_argument('--games', type = int, default = 1, help = 'games per client')
+	parser.add_argument('--player', default = 'computer', choices = sorted(PLAYERS))
+	parser.add_argument('--depth', type = int, default = 3)
+	args = parser.parse_args(argv)
+
+	if args.command == 'load':
+		result = asyncio.run(load(args.host, args.port, args.clients, args.games, args.player, args.depth))
+		print(json.dumps(result, indent = 1))
+		return 0
+
+	async def serve():
+		server = GameServer(args.workers, args.max_searches)
+		port = await server.start(args.host, args.port)
+		print('listening on ' + args.host + ':' + str(port))
+		try:
+			await server.server.serve_forever()
+		finally:
+			await server.close()
+
+	try:
+		asyncio.run(serve())
+	except KeyboardInterrupt:
+		pass
+	return 0
+#____________________________________________________________________________________________________________________________________________________
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
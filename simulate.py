@@ -0,0 +1,207 @@
+'''
+=====================================================================================================================================================
+FILE		: simulate.py
+DESCRIPTION	: plays many random games at once and collects outcome and length statistics
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import random
+
+#NumPy is optional, games are played one at a time without it
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+#Board dimensions
+WIDTH = board.WIDTH
+HEIGHT = board.HEIGHT
+H1 = board.H1
+
+#Number of games advanced together by simulate_numpy()
+BATCH = 1 << 16
+
+#======================================================== SECTION: MAIN FUNCTIONS ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: simulate
+#PARAMETERS	: games (number of games), seed (optional), batch (games advanced together)
+#DESCRIPTION	: plays random games, every move is chosen uniformly among legal moves like random_player.Player does
+#		  Uses NumPy when it is installed
+#RETURNS	: dictionary of statistics, see statistics()
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def simulate(games, seed = None, batch = BATCH):
+
+	if numpy is None:
+		return simulate_python(games, seed)
+
+	return simulate_numpy(games, seed, batch)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: simulate_numpy
+#PARAMETERS	: games, seed, batch
+#DESCRIPTION	: advances a batch of games in lock-step: all games make their n-th move together, using arrays of column heights
+#		  and bitboards. Games which are won drop out of the batch
+#RETURNS	: dictionary of statistics
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def simulate_numpy(games, seed = None, batch = BATCH):
+
+	rng = numpy.random.default_rng(seed)
+	winners = []
+	lengths = []
+
+	done = 0
+	while done < games:
+		n = min(batch, games - done)
+		w, l = play_batch(n, rng)
+		winners.append(w)
+		lengths.append(l)
+		done += n
+
+	return statistics(numpy.concatenate(winners).tolist(), numpy.concatenate(lengths).tolist())
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: simulate_python
+#PARAMETERS	: games, seed
+#DESCRIPTION	: plays games one at a time on bitboards, used without NumPy
+#RETURNS	: dictionary of statistics
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def simulate_python(games, seed = None):
+
+	rng = random.Random(seed)
+	winners = []
+	lengths = []
+
+	for g in range(games):
+		winner, ply = playout((0, 0), [0] * WIDTH, 0, rng)
+		winners.append(winner)
+		lengths.append(ply)
+
+	return statistics(winners, lengths)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: playout
+#PARAMETERS	: position (bitboards of both players), heights (column heights), ply (number of moves made), rng (random.Random),
+#		  g (board.Geometry of the board size)
+#DESCRIPTION	: finishes a game from the position with uniformly random moves, arguments are not changed
+#RETURNS	: winner (0 / 1, -1 for a draw), ply (length of the game)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def playout(position, heights, ply, rng, g = board.STANDARD):
+
+	position = list(position)
+	heights = list(heights)
+	height = g.height
+	h1 = g.h1
+	connected = g.connected
+	legal_moves = [col for col in range(g.width) if heights[col] < height]
+
+	while len(legal_moves) > 0:
+		player = ply & 1
+		col = rng.choice(legal_moves)
+		position[player] |= 1 << (col * h1 + heights[col])
+		heights[col] += 1
+		if heights[col] == height:
+			legal_moves.remove(col)
+		ply += 1
+		if connected(position[player]):
+			return player, ply
+
+	return -1, ply
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: HELPER FUNCTIONS =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: play_batch
+#PARAMETERS	: n (number of games), rng (numpy random generator)
+#DESCRIPTION	: plays n random games in lock-step
+#RETURNS	: winners (array, -1 for a draw), lengths (array of number of moves)
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def play_batch(n, rng):
+
+	heights = numpy.zeros((n, WIDTH), dtype = numpy.int64)
+	position = numpy.zeros((2, n), dtype = numpy.uint64)
+	winners = numpy.full(n, -1, dtype = numpy.int64)
+	lengths = numpy.zeros(n, dtype = numpy.int64)
+
+	#indices of games still being played
+	active = numpy.arange(n)
+
+	for ply in range(WIDTH * HEIGHT):
+		if len(active) == 0:
+			break
+
+		player = ply & 1
+		h = heights[active]
+
+		#uniform choice among columns which are not full: largest random number wins
+		r = rng.random((len(active), WIDTH))
+		r[h >= HEIGHT] = -1.0
+		col = r.argmax(axis = 1)
+		row = h[numpy.arange(len(active)), col]
+
+		heights[active, col] += 1
+		mask = position[player, active] | numpy.left_shift(numpy.uint64(1), (col * H1 + row).astype(numpy.uint64))
+		position[player, active] = mask
+		lengths[active] = ply + 1
+
+		won = connected(mask)
+		winners[active[won]] = player
+		active = active[~won]
+
+	return winners, lengths
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: connected
+#PARAMETERS	: masks (numpy array of bitboards)
+#DESCRIPTION	: vectorized version of board.connected()
+#RETURNS	: boolean array, True where a bitboard contains four connected stones
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def connected(masks):
+
+	won = numpy.zeros(len(masks), dtype = bool)
+	for shift in (H1, H1 + 1, H1 - 1, 1):
+		s = numpy.uint64(shift)
+		m = masks & (masks >> s)
+		won |= (m & (m >> (s + s))) != 0
+	return won
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: statistics
+#PARAMETERS	: winners (list, -1 for a draw), lengths (list of number of moves)
+#DESCRIPTION	: summarizes results of a set of games
+#RETURNS	: dictionary with number of games, wins of both players, draws, mean / min / max length and histogram of lengths
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def statistics(winners, lengths):
+
+	games = len(winners)
+	histogram = [0] * (WIDTH * HEIGHT + 1)
+	for l in lengths:
+		histogram[l] += 1
+
+	return {
+		'games': games,
+		'wins': [winners.count(0), winners.count(1)],
+		'draws': winners.count(-1),
+		'mean_length': sum(lengths) / games if games > 0 else 0.0,
+		'min_length': min(lengths) if games > 0 else 0,
+		'max_length': max(lengths) if games > 0 else 0,
+		'length_histogram': histogram,
+	}
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
@@ -0,0 +1,398 @@
+'''
+=====================================================================================================================================================
+FILE		: solver.py
+DESCRIPTION	: exact solver: game-theoretic score of a position including the number of plies to the end, found with null-window searches
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import ordering
+import transposition
+import search
+import math
+import sys
+import time
+import argparse
+
+#Default number of transposition table entries
+TABLE_SIZE = 1 << 20
+
+#Default number of nodes one solve() or best_move() call may search, about 7 seconds at 140000 nodes per second
+#Solves of random standard board positions within this limit, 30 positions each:
+#	16 stones: all, at most 5 s	14 stones: 28 of 30	12 stones: 27 of 30	10 stones: 20 of 30, median 3 s
+#Positions with fewer stones can take minutes or hours, search.SearchTimeout is raised instead
+NODE_LIMIT = 1000000
+
+#Multiplier spreading position keys over the table slots (odd, so that different keys stay different)
+MIX = 0x9E3779B97F4A7C15
+
+#Score of a position, from the point of view of the player to move:
+#	0 for a draw, positive if the player to move wins and negative if it loses
+#	a win with the player's own n-th stone scores (cells / 2 + 1 - n), so a faster win scores higher and a slower loss scores higher
+#Solver.plies() turns a score back into the number of plies to the end of the game
+
+class Solver:
+
+	#======================================================== SECTION: CONSTRUCTORS =============================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: table (optional transposition.TranspositionTable, kept between solves), table_size (entries of a new table),
+	#		  node_limit (nodes one solve() or best_move() call may search, None for no limit)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, table = None, table_size = TABLE_SIZE, node_limit = NODE_LIMIT):
+		if table is None:
+			table = transposition.TranspositionTable(table_size)
+		self.table = table
+		self.node_limit = node_limit
+
+		#Value of self.nodes at which the current call gives up
+		self.stop_at = math.inf
+
+		#Geometry the tables below were built for, set by setup()
+		self.geometry = None
+
+		#Nodes searched since the solver was created
+		self.nodes = 0
+		pass
+	#======================================================== SECTION END =======================================================================
+
+	#======================================================== SECTION: MAIN FUNCTIONS ===========================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: solve
+	#PARAMETERS	: board, weak (only find out whether the position is won, drawn or lost)
+	#DESCRIPTION	: computes the exact score of the position. The score lies between bounds given by the number of empty cells,
+	#		  every null-window search (med, med + 1) tells whether the score is above 'med' and moves one of the bounds,
+	#		  'med' is taken halfway, nearer to 0 while the bounds are wide, as short wins and losses are searched fastest
+	#		  Raises ValueError if the game is over and search.SearchTimeout if the node limit is reached
+	#RETURNS	: score (see top of the file), with weak only its sign (1, 0, -1)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def solve(self, board, weak = False):
+		self.start_budget()
+		return self.score(board, weak)
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: best_move
+	#PARAMETERS	: board
+	#DESCRIPTION	: solves the position and finds a move reaching its score: the fastest win, or the slowest loss
+	#		  Every move is solved after the first, positions already met are answered by the transposition table
+	#		  The node limit counts all of these solves, search.SearchTimeout is raised when it is reached
+	#RETURNS	: score, move (-1 if the board is full)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def best_move(self, board):
+
+		self.start_budget()
+		score = self.score(board)
+		legal_moves = ordering.centre_first(board.width)
+
+		for mov in legal_moves:
+			if mov not in board.legal_moves():
+				continue
+			board.make_move(mov)
+			try:
+				if board.last_move_won():
+					v = (self.cells + 2 - board.stones()) // 2
+				elif board.stones() == self.cells:
+					v = 0
+				else:
+					v = -self.score(board)
+			finally:
+				board.unmake_last_move()
+			if v == score:
+				return score, mov
+
+		return score, -1
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: plies
+	#PARAMETERS	: board, score (returned by solve())
+	#DESCRIPTION	: converts a score into distance to the end of the game with perfect play: the ply of the winning stone counted
+	#		  from the position (1 is a win with the next move, 2 a loss right after the next move), empty cells for a draw
+	#RETURNS	: number of plies
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def plies(self, board, score):
+		cells = board.width * board.height
+		moves = board.stones()
+		if score > 0:
+			return 2 * ((cells + 1 - moves) // 2 - score) + 1
+		if score < 0:
+			return 2 * ((cells - moves) // 2 + score + 1)
+		return cells - moves
+	#____________________________________________________________________________________________________________________________________________
+	#============================================================== SECTION END =================================================================
+
+	#======================================================== SECTION: HELPER FUNCTIONS =========================================================
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: start_budget
+	#PARAMETERS	: none
+	#DESCRIPTION	: starts counting the nodes of one solve() or best_move() call against the node limit
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def start_budget(self):
+		self.stop_at = math.inf if self.node_limit is None else self.nodes + self.node_limit
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: score
+	#PARAMETERS	: board, weak
+	#DESCRIPTION	: solve() without starting a new node budget
+	#RETURNS	: score, with weak only its sign
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def score(self, board, weak = False):
+
+		if board.last_move_won():
+			raise ValueError('game is over')
+
+		current, mask, moves = self.setup(board)
+		cells = self.cells
+
+		if moves == cells:
+			return 0
+
+		#Win with the next stone
+		if self.winning(current, mask) & (mask + self.bottom) & self.board_mask:
+			return 1 if weak else (cells + 1 - moves) // 2
+
+		low = -((cells - moves) // 2)
+		high = (cells + 1 - moves) // 2
+		if weak:
+			low, high = -1, 1
+
+		while low < high:
+			med = low + (high - low) // 2
+			if med <= 0 and int(low / 2) < med:
+				med = int(low / 2)
+			elif med >= 0 and int(high / 2) > med:
+				med = int(high / 2)
+
+			v = self.negamax(current, mask, moves, med, med + 1)
+			if v <= med:
+				high = v
+			else:
+				low = v
+
+		if weak:
+			return (low > 0) - (low < 0)
+		return low
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: setup
+	#PARAMETERS	: board
+	#DESCRIPTION	: builds the masks of the board size, the table is cleared when the size changes as keys of different sizes collide
+	#RETURNS	: current (stones of the player to move), mask (all stones), moves (number of stones)
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def setup(self, b):
+
+		g = b.geometry
+		if g is not self.geometry:
+			if self.geometry is not None:
+				self.table.clear()
+			self.geometry = g
+			self.cells = g.width * g.height
+			self.bottom = g.bottom
+			self.board_mask = g.bottom * ((1 << g.height) - 1)
+			self.columns = [(col, ((1 << g.height) - 1) << (col * g.h1)) for col in ordering.centre_first(g.width)]
+			self.directions = [g.h1, g.h1 + 1, g.h1 - 1, 1]
+			self.shifts = [(d, 2 * d, 3 * d) for d in self.directions[:3]]
+			self.connect = g.connect
+			self.winning = self.winning_four if g.connect == 4 else self.winning_any
+
+		#graph backend has no bitboards
+		if b.backend != 'bitboard':
+			b = board.Board.from_moves(b.moves, b.width, b.height, b.connect)
+
+		return b.position[b.player], b.position[0] | b.position[1], b.stones()
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: winning_any
+	#PARAMETERS	: position (stones of one player), mask (all stones)
+	#DESCRIPTION	: finds empty cells which complete a run of 'connect' stones of the player, playable or not, used as self.winning
+	#		  In every direction, left[k] marks cells with k stones right behind them and right[k] cells with k stones right ahead,
+	#		  a cell wins if left[k] and right[connect - 1 - k] meet for some k
+	#RETURNS	: bitboard of winning cells
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def winning_any(self, position, mask):
+		n = self.connect
+		cells = 0
+		for d in self.directions:
+			left = [-1]
+			right = [-1]
+			behind = ahead = -1
+			for j in range(1, n):
+				behind &= position << (j * d)
+				ahead &= position >> (j * d)
+				left.append(behind)
+				right.append(ahead)
+			for k in range(n):
+				cells |= left[k] & right[n - 1 - k]
+		return cells & (self.board_mask ^ mask)
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: winning_four
+	#PARAMETERS	: position (stones of one player), mask (all stones)
+	#DESCRIPTION	: same as winning_any() unrolled for four in a row: a cell wins with three stones behind it, three ahead,
+	#		  or a pair on one side and a single stone on the other
+	#RETURNS	: bitboard of winning cells
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def winning_four(self, position, mask):
+
+		#vertical, stones can only be below
+		cells = (position << 1) & (position << 2) & (position << 3)
+
+		for d, d2, d3 in self.shifts:
+			p = (position << d) & (position << d2)
+			cells |= p & ((position << d3) | (position >> d))
+			p = (position >> d) & (position >> d2)
+			cells |= p & ((position >> d3) | (position << d))
+
+		return cells & (self.board_mask ^ mask)
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: negamax
+	#PARAMETERS	: current (stones of the player to move), mask (all stones), moves (number of stones), alpha, beta
+	#DESCRIPTION	: alpha-beta search to the end of the game, the player to move must not have a winning move
+	#		  Only moves which do not let the opponent win right away are searched, ordered by the number of winning cells they create
+	#		  Bounds are stored in the transposition table, keyed by position: a bound holds whatever window it was found with
+	#RETURNS	: score if it is inside (alpha, beta), otherwise a bound on the wrong side of the window
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def negamax(self, current, mask, moves, alpha, beta):
+
+		self.nodes += 1
+		if self.nodes > self.stop_at:
+			raise search.SearchTimeout()
+		cells = self.cells
+		board_mask = self.board_mask
+
+		#Moves which do not lose at once: a single threat of the opponent has to be blocked, two cannot be,
+		#and a cell right below a winning cell of the opponent must not be filled
+		opponent = current ^ mask
+		possible = (mask + self.bottom) & board_mask
+		threats = self.winning(opponent, mask)
+		forced = possible & threats
+		if forced:
+			if forced & (forced - 1):
+				return -((cells - moves) // 2)
+			possible = forced
+		possible &= ~(threats >> 1)
+
+		if not possible:
+			return -((cells - moves) // 2)
+
+		#Neither player can win with the last two stones
+		if moves >= cells - 2:
+			return 0
+
+		#Opponent cannot win with the next stone and the player cannot win with this one
+		low = -((cells - 2 - moves) // 2)
+		high = (cells - 1 - moves) // 2
+
+		key = (current + mask) * MIX
+		key ^= key >> 29
+		entry = self.table.probe(key)
+		first = -1
+		if entry is not None:
+			first = entry[3]
+			if entry[2] == transposition.LOWER:
+				low = max(low, entry[0])
+			elif entry[2] == transposition.UPPER:
+				high = min(high, entry[0])
+			else:
+				return entry[0]
+
+		if alpha < low:
+			alpha = low
+			if alpha >= beta:
+				return alpha
+		if beta > high:
+			beta = high
+			if alpha >= beta:
+				return beta
+
+		#Move which was best or caused a cut-off before comes first, then moves creating most winning cells
+		#Centre-out order, stable sort keeps it between moves creating as many winning cells
+		candidates = []
+		for col, column in self.columns:
+			move = possible & column
+			if move:
+				if col == first:
+					candidates.append((-cells, col, move))
+				else:
+					candidates.append((-bin(self.winning(current | move, mask)).count('1'), col, move))
+		candidates.sort(key = lambda c: c[0])
+
+		#Entries always replace the slot, keeping the deeper entry let entries near the roots of earlier searches block most stores
+		start = alpha
+		best = -1
+		for s, col, move in candidates:
+			v = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+			if v >= beta:
+				self.table.store(key, v, cells - moves, transposition.LOWER, col, True)
+				return v
+			if v > alpha:
+				alpha = v
+				best = col
+
+		self.table.store(key, alpha, cells - moves, transposition.EXACT if alpha > start else transposition.UPPER, best, True)
+		return alpha
+	#____________________________________________________________________________________________________________________________________________
+	#============================================================== SECTION END =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: main
+#PARAMETERS	: argv (command line arguments)
+#DESCRIPTION	: command line entry point, solves a position given as a move string
+#		  usage: python solver.py MOVES [--weak] [--width W] [--height H] [--connect N] [--nodes N]
+#RETURNS	: exit status
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def main(argv):
+
+	parser = argparse.ArgumentParser(description = 'solve a position exactly')
+	parser.add_argument('moves', nargs = '?', default = '', help = 'columns counted from 1, e.g. 4453')
+	parser.add_argument('--weak', action = 'store_true', help = 'only win / draw / loss')
+	parser.add_argument('--width', type = int, default = board.WIDTH)
+	parser.add_argument('--height', type = int, default = board.HEIGHT)
+	parser.add_argument('--connect', type = int, default = board.CONNECT)
+	parser.add_argument('--nodes', type = int, default = NODE_LIMIT, help = 'node limit, 0 for none')
+	args = parser.parse_args(argv)
+
+	b = board.Board.from_moves(args.moves, args.width, args.height, args.connect)
+	solver = Solver(None, TABLE_SIZE, args.nodes or None)
+	start = time.perf_counter()
+	try:
+		if args.weak:
+			score, mov = solver.solve(b, True), -1
+		else:
+			score, mov = solver.best_move(b)
+	except search.SearchTimeout:
+		print('node limit reached after ' + str(solver.nodes) + ' nodes, use --nodes 0 to search without a limit')
+		return 1
+	elapsed = time.perf_counter() - start
+
+	print('score ' + str(score))
+	if not args.weak:
+		print('plies ' + str(solver.plies(b, score)))
+		print('move ' + str(mov + 1))
+	print('nodes ' + str(solver.nodes) + ' in ' + str(round(elapsed, 3)) + ' s')
+	return 0
+#____________________________________________________________________________________________________________________________________________________
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
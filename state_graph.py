@@ -7,25 +7,42 @@ EmAIL		: rrrane@indiana.edu
 =====================================================================================================================================================
 '''
 
-import math;
+#Board dimensions of the standard game
+ROWS = 6
+COLS = 7
+
+#Number of connected stones needed to win
+CONNECT = 4
 
 class Graph:
 
 	#================================================== SECTION: CONSTRUCTORS ===================================================================	
-	def __init__(self):
+	def __init__(self, rows = ROWS, cols = COLS, connect = CONNECT):
+		
+		#number of connected stones needed to win
+		self.connect = connect
+		
+		#Each relation is stored as a grid of run lengths
+		#grid[row + 1][col + 1] is the length of the run of this player's stones, in that direction, which passes through the cell (0 if empty)
+		#Grids have an empty border so that neighbours of any cell can be read without bounds checks
 		
-		#graphs representing diagonal relations
-		self.diagonal1 = [[]];
-		self.diagonal2 = [[]];
+		#grids representing diagonal relations
+		#diagonal1: row and column increase together, diagonal2: row increases as column decreases
+		self.diagonal1 = [[0] * (cols + 2) for i in range(rows + 2)];
+		self.diagonal2 = [[0] * (cols + 2) for i in range(rows + 2)];
 		
-		#graph representing horizontal relation
-		self.horizontal = [[]];
+		#grid representing horizontal relation
+		self.horizontal = [[0] * (cols + 2) for i in range(rows + 2)];
 		
-		#graph representing vertical relation
-		self.vertical = [[]];
+		#grid representing vertical relation
+		self.vertical = [[0] * (cols + 2) for i in range(rows + 2)];
+		
+		#directions as (grid, row step, column step)
+		self.directions = [(self.horizontal, 0, 1), (self.vertical, 1, 0), (self.diagonal1, 1, 1), (self.diagonal2, 1, -1)]
 		
 		#list of moves made so far
-		self.move_list = [[0,0]];
+		#each entry is [row, col, runs] where runs holds (backward, forward) run lengths merged by the move in every direction
+		self.move_list = [[0,0,None]];
 		
 		#flag: set if last move won
 		self.final_flag = False;
@@ -38,124 +55,69 @@ class Graph:
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 	#NAME		: insert_node
 	#PARAMETERS	: move_no, row_index, col_index
-	#DESCRIPTION	: inserts move in move_list and appropriate graph
+	#DESCRIPTION	: inserts move in move_list and updates run lengths of all the grids
 	#RETURNS	: 'True' if last move won and 'False' otherwise
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 	
 	def insert_node(self, move_no, row_index, col_index):
 		
-		self.move_list.append([row_index, col_index]);
-		self.build_graph(move_no, row_index, col_index);
+		r, c = row_index + 1, col_index + 1
+		runs = []
+		for grid, dr, dc in self.directions:
+			
+			#Length of the runs ending next to the new stone, on both sides
+			back = grid[r - dr][c - dc]
+			fwd = grid[r + dr][c + dc]
+			runs.append((back, fwd))
+			
+			#New stone joins both runs into one
+			self.set_run(grid, r, c, dr, dc, -back, fwd, back + fwd + 1)
+		
+		self.move_list.append([row_index, col_index, runs]);
 		self.final_flag = self.check_if_done(move_no);
 		return self.final_flag;
 	#____________________________________________________________________________________________________________________________________________
 
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: build_graph
-	#PARAMETERS	: move_no, row_index, col_index
-	#DESCRIPTION	: appropriate graph
+	#NAME		: set_run
+	#PARAMETERS	: grid, row_index, col_index, dr, dc, first, last, length
+	#DESCRIPTION	: stores 'length' in cells (row_index + k * dr, col_index + k * dc) for k in [first, last] of the padded grid
 	#RETURNS	: none
 	#--------------------------------------------------------------------------------------------------------------------------------------------
-		
-	def build_graph(self, move_no, row_index, col_index):
-		self.diagonal1.append([]);
-		self.diagonal2.append([]);
-		self.horizontal.append([]);
-		self.vertical.append([]);
-		
-		for i in range(1, move_no):
-			r1 = self.move_list[i][0]
-			c1 = self.move_list[i][1]
-			
-			'''Check for connectivity and update appropriate graph'''
-			if abs(r1 - row_index) == 1 and c1 == col_index:
-				self.vertical[i].append(move_no)
-				self.vertical[move_no].append(i)
-			elif r1 == row_index and abs(c1 - col_index) == 1:
-				self.horizontal[i].append(move_no)
-				self.horizontal[move_no].append(i)
-			elif (r1 - row_index == 1 and c1 - col_index == 1) or (r1 - row_index == -1 and c1 - col_index == -1):
-				self.diagonal1[i].append(move_no)
-				self.diagonal1[move_no].append(i)
-			elif (r1 - row_index == 1 and c1 - col_index == -1) or (r1 - row_index == -1 and c1 - col_index == 1):
-				self.diagonal2[i].append(move_no)
-				self.diagonal2[move_no].append(i)
-		
-		
-		pass
+	
+	def set_run(self, grid, row_index, col_index, dr, dc, first, last, length):
+		for k in range(first, last + 1):
+			grid[row_index + k * dr][col_index + k * dc] = length
 	#____________________________________________________________________________________________________________________________________________
 	
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 	#NAME		: check_if_done
 	#PARAMETERS	: move_no
-	#DESCRIPTION	: determines whether last move won or not by traversing a graph
+	#DESCRIPTION	: determines whether last move won or not from run lengths at the last inserted cell
 	#RETURNS	: 'True' if last move won and 'False' otherwise
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 
-	
 	def check_if_done(self, move_no):
 		
-		is_h_connected = False
-		is_v_connected = False
-		is_d1_connected = False
-		is_d2_connected = False
-		
-		is_h_connected = self.traverse(self.horizontal, move_no)
-		is_v_connected = self.traverse(self.vertical, move_no)
-		is_d1_connected = self.traverse(self.diagonal1, move_no)
-		is_d2_connected = self.traverse(self.diagonal2, move_no)	
+		row_index, col_index, runs = self.move_list[-1]
 		
+		if runs is None:
+			return False
 		
-		return (is_h_connected or is_v_connected or is_d1_connected or is_d2_connected)
-		
-		pass
-	#____________________________________________________________________________________________________________________________________________
-	
-	#--------------------------------------------------------------------------------------------------------------------------------------------
-	#NAME		: traverse
-	#PARAMETERS	: graph, node
-	#DESCRIPTION	: checks if ast move won by traversing particular graph starting from a given node
-	#RETURNS	: 'True' if last move won and 'False' otherwise
-	#--------------------------------------------------------------------------------------------------------------------------------------------
-
-	def traverse(self, graph, node):
-		
-		n = node
-		hop_count = 0
-		temp_queue = [n]
-		isVisited = []
-		
-		for i in range(1, len(graph) + 1):
-			isVisited.append(False)
-		
-		while len(temp_queue) > 0:	
-			
-			j = temp_queue.pop(0)
-			isVisited[j] = True
-			
-			hop_count += 1
-			
-			for k in graph[j]:
-				if not isVisited[k]:
-					temp_queue.append(k)
-			
-			
-		if hop_count >= 4:
-			return True
+		for grid, dr, dc in self.directions:
+			if grid[row_index + 1][col_index + 1] >= self.connect:
+				return True
 		
 		return False
-		
-		pass
 	#____________________________________________________________________________________________________________________________________________
 	
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 	#NAME		: remove_last_inserted
 	#PARAMETERS	: none
-	#DESCRIPTION	: restores all the graphs to previous state
+	#DESCRIPTION	: restores all the grids to previous state
 	#RETURNS	: last move
 	#--------------------------------------------------------------------------------------------------------------------------------------------
 
-
 	def remove_last_inserted(self):
 		n = len(self.move_list) -1
 		if self.final_flag:
@@ -164,29 +126,17 @@ class Graph:
 		if n <= 0:
 			return -1, -1, -1, False
 		
-		node = self.move_list.pop(n)
-		
-		for j in self.horizontal[n]:
-			self.horizontal[j].remove(n)
-		
-		self.horizontal.pop(len(self.horizontal) - 1)
-		
-		for j in self.vertical[n]:
-			self.vertical[j].remove(n)
-		
-		self.vertical.pop(len(self.vertical) - 1)
-		
-		for j in self.diagonal1[n]:
-			self.diagonal1[j].remove(n)
-		
-		self.diagonal1.pop(len(self.diagonal1) -1)
-		
-		for j in self.diagonal2[n]:
-			self.diagonal2[j].remove(n)
+		node = self.move_list.pop()
+		row_index, col_index, runs = node
 		
-		self.diagonal2.pop(len(self.diagonal2) -1)
+		#Split the run through removed stone back into the two runs it joined
+		r, c = row_index + 1, col_index + 1
+		for (grid, dr, dc), (back, fwd) in zip(self.directions, runs):
+			self.set_run(grid, r, c, dr, dc, -back, -1, back)
+			self.set_run(grid, r, c, dr, dc, 1, fwd, fwd)
+			grid[r][c] = 0
 		
-		return n, node[0], node[1], self.final_flag
+		return n, row_index, col_index, self.final_flag
 	#____________________________________________________________________________________________________________________________________________
 
 	#======================================================== SECTION END =======================================================================
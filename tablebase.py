@@ -0,0 +1,160 @@
+'''
+=====================================================================================================================================================
+FILE		: tablebase.py
+DESCRIPTION	: endgame tablebase: exact win / loss / draw and distance of positions with few empty cells
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import book
+
+#Magic of tablebase files
+MAGIC = b'C4TB'
+
+#Scores stored in the file, from the point of view of the player to move
+#win in d plies: WIN - d, loss in d plies: -(WIN - d), draw: 0
+WIN = 100
+
+#======================================================== SECTION: TABLEBASE =======================================================================
+
+class Tablebase(book.RecordFile):
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: __init__
+	#PARAMETERS	: path
+	#DESCRIPTION	: maps a tablebase file into memory, self.k is the largest number of empty cells it covers
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def __init__(self, path):
+		book.RecordFile.__init__(self, path, MAGIC)
+		self.k = self.extra
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: probe
+	#PARAMETERS	: board
+	#DESCRIPTION	: looks up a position, only positions with at most self.k empty cells are looked up
+	#RETURNS	: (result, distance, move) or None
+	#		  result is 1 (win), -1 (loss) or 0 (draw) for the player to move, distance is number of plies to the end of the game
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def probe(self, board):
+
+		empty = board.empty_cells()
+		if empty > self.k:
+			return None
+
+		entry = self.find(board.hash)
+		if entry is None:
+			return None
+
+		score, mov = entry
+		if score > 0:
+			return 1, WIN - score, mov
+		if score < 0:
+			return -1, WIN + score, mov
+		return 0, empty, mov
+	#____________________________________________________________________________________________________________________________________________
+
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: GENERATOR =======================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: build
+#PARAMETERS	: path, k (largest number of empty cells), roots (list of move sequences, defaults to the empty board)
+#DESCRIPTION	: solves every position with at most k empty cells reachable from the roots and writes them to a tablebase file
+#		  Positions with more than k empty cells are only walked through. Walking from the empty board visits every reachable
+#		  position and is only practical for small boards, deep roots (for example positions from logged games) should be given instead
+#RETURNS	: number of positions written
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def build(path, k, roots = None):
+
+	if roots is None:
+		roots = [()]
+
+	solved = {}
+	visited = set()
+	b = board.Board()
+
+	for moves in roots:
+		for mov in moves:
+			b.make_move(mov)
+
+		walk(b, k, solved, visited)
+
+		for i in range(len(moves)):
+			b.unmake_last_move()
+
+	return book.write_records(path, MAGIC, solved, k)
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: walk
+#PARAMETERS	: board, k, solved (dictionary {hash: (score, move)}), visited (hashes of positions with more than k empty cells)
+#DESCRIPTION	: walks down to positions with at most k empty cells and solves them
+#RETURNS	: none
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def walk(board, k, solved, visited):
+
+	if board.last_move_won() or len(board.legal_moves()) == 0:
+		return
+
+	if board.empty_cells() <= k:
+		solve(board, solved)
+		return
+
+	if board.hash in visited:
+		return
+	visited.add(board.hash)
+
+	for mov in board.legal_moves():
+		board.make_move(mov)
+		walk(board, k, solved, visited)
+		board.unmake_last_move()
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: solve
+#PARAMETERS	: board (not terminal), solved (dictionary {hash: (score, move)})
+#DESCRIPTION	: exact minimax without pruning, so that every position below is solved too
+#		  Winner plays the fastest win, loser the slowest loss
+#RETURNS	: score of the position
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def solve(board, solved):
+
+	entry = solved.get(board.hash)
+	if entry is not None:
+		return entry[0]
+
+	best, best_mov = None, -1
+	for mov in board.legal_moves():
+		board.make_move(mov)
+
+		if board.last_move_won():
+			score = WIN - 1
+		elif len(board.legal_moves()) == 0:
+			score = 0
+		else:
+			#one ply further away from the end of the game, seen from the other side
+			child = solve(board, solved)
+			if child > 0:
+				score = -child + 1
+			elif child < 0:
+				score = -child - 1
+			else:
+				score = 0
+
+		board.unmake_last_move()
+
+		if best is None or score > best:
+			best, best_mov = score, mov
+
+	solved[board.hash] = (best, best_mov)
+	return best
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
@@ -4,6 +4,27 @@ import random_player
 import search
 import random
 import computer
+import transposition
+import parallel
+import math
+import ordering
+import evaluate
+import book
+import tablebase
+import simulate
+import tournament
+import benchmark
+import mcts
+import position_io
+import analyze
+import server
+import solver
+import asyncio
+import json
+import os
+import tempfile
+import pickle
+import time
 
 def test_Q1():
   print("TESTING FOR Q1")
@@ -50,6 +71,47 @@ def test_Q1():
   print("passed")
     
 
+def test_backends():
+  print("TESTING BITBOARD AGAINST GRAPH BACKEND")
+  bb = board.Board('bitboard')
+  gb = board.Board('graph')
+
+  # play random games on both backends and compare every position
+  for k in range(200):
+    i = 0
+    while not bb.last_move_won() and len(bb.generate_moves()) > 0:
+      assert(bb.generate_moves() == gb.generate_moves())
+      move = random.choice(bb.generate_moves())
+      bb.make_move(move)
+      gb.make_move(move)
+      assert(bb.last_move_won() == gb.last_move_won())
+      assert(str(bb) == str(gb))
+      i+=1
+    for j in range(i):
+      bb.unmake_last_move()
+      gb.unmake_last_move()
+      assert(str(bb) == str(gb))
+  assert(search.perft(board.Board('graph'), 5) == search.perft(board.Board('bitboard'), 5))
+  print("passed")
+
+
+def test_simulate():
+  print("TESTING RANDOM GAME SIMULATOR")
+  runs = [simulate.simulate_python(2000, 1)]
+  if simulate.numpy is not None:
+    runs.append(simulate.simulate_numpy(2000, 1, 500))
+  for stats in runs:
+    assert(stats['games'] == 2000)
+    assert(stats['wins'][0] + stats['wins'][1] + stats['draws'] == 2000)
+    assert(sum(stats['length_histogram']) == 2000)
+    assert(stats['min_length'] >= 7 and stats['max_length'] <= 42)
+    assert(sum(stats['length_histogram'][:7]) == 0)
+
+    # first player wins more random games than the second
+    assert(stats['wins'][0] > stats['wins'][1])
+  print("passed")
+
+
 def test_Q2():
   print("TESTING FOR Q2")
   b = board.Board()
@@ -62,6 +124,49 @@ def test_Q2():
   print("passed")
   
 
+def test_parallel_perft():
+  print("TESTING PARALLEL PERFT")
+  b = board.Board()
+  assert(parallel.perft(b, 1) == 7)
+  assert(parallel.divide(b, 2) == {0: 7, 1: 7, 2: 7, 3: 7, 4: 7, 5: 7, 6: 7})
+  for depth in [3, 6]:
+    for split in [1, 2, 3]:
+      assert(parallel.perft(b, depth, 2, split) == search.perft(b, depth))
+  b.make_move(0)
+  b.make_move(2)
+  b.make_move(0)
+  counts = parallel.divide(b, 6)
+  assert(sum(counts.values()) == parallel.perft(b, 6) == search.perft(b, 6))
+
+  # board decoded from a key, with and without a move made after decoding
+  b = board.Board.from_key(board.Board.from_moves('4453').key())
+  for k in range(2):
+    counts = parallel.divide(b, 4, 2)
+    for mov in b.generate_moves():
+      c = b.copy()
+      c.make_move(mov)
+      assert(counts[mov] == search.perft(c, 3))
+    assert(parallel.perft(b, 4, 2) == search.perft(b.copy(), 4))
+    b.make_move(2)
+  print("passed")
+
+
+def test_perft_hashed():
+  print("TESTING HASHED PERFT")
+  b = board.Board()
+  for depth in range(1, 7):
+    assert(search.perft_hashed(b, depth) == search.perft(board.Board(), depth))
+  assert(search.perft_hashed(b, 8) == 5686266)
+
+  # small table forces replacements, counts must not change
+  assert(search.perft_hashed(b, 7, table_size = 64) == 823536)
+  b.make_move(0)
+  b.make_move(2)
+  b.make_move(0)
+  assert(search.perft_hashed(b, 8) == 5245276)
+  print("passed")
+
+
 def test_Q3():
   print("TESTING FOR Q3")
   b = board.Board()
@@ -79,6 +184,843 @@ def test_Q3():
   print("passed")
 
 
+def test_transposition():
+  print("TESTING TRANSPOSITION TABLE")
+  table = transposition.TranspositionTable(1 << 16)
+  b = board.Board()
+
+  # hash must be restored by unmake
+  b.make_move(3)
+  b.make_move(4)
+  b.unmake_last_move()
+  b.unmake_last_move()
+  assert(b.hash == 0)
+
+  # same position reached by different move orders has the same hash
+  for m in [0, 1, 2, 3]:
+    b.make_move(m)
+  h = b.hash
+  for j in range(4):
+    b.unmake_last_move()
+  for m in [2, 3, 0, 1]:
+    b.make_move(m)
+  assert(b.hash == h)
+  for j in range(4):
+    b.unmake_last_move()
+
+  # searching with a table must give the same answers
+  for k in range(20):
+    i = 0
+    for j in range(random.randint(0, 16)):
+      if b.last_move_won() or len(b.generate_moves()) == 0:
+        break
+      b.make_move(random.choice(b.generate_moves()))
+      i+=1
+    if not b.last_move_won():
+      assert(search.find_win(b, 5) == search.find_win(b, 5, table))
+    for j in range(i):
+      b.unmake_last_move()
+  assert(table.hits > 0)
+
+  # deeper entry of the same search is kept unless the store replaces it
+  table = transposition.TranspositionTable(4)
+  assert(table.store(1, 1, 5, transposition.EXACT, 0))
+  assert(not table.store(5, 0, 2, transposition.EXACT, 0) and table.probe(1) is not None)
+  assert(table.store(5, 0, 2, transposition.EXACT, 0, True) and table.probe(1) is None)
+  print("passed")
+
+
+def test_negamax():
+  print("TESTING NEGAMAX")
+  nodes_ab = 0
+  nodes_pvs = 0
+  for k in range(30):
+    b = board.Board()
+    for j in range(random.randint(0, 20)):
+      if b.last_move_won() or len(b.generate_moves()) == 0:
+        break
+      b.make_move(random.choice(b.generate_moves()))
+    if b.last_move_won():
+      continue
+
+    # same value and move as the classic alpha-beta
+    ab = search.Limits()
+    pvs = search.Limits()
+    v, a, bt, m = search.max_value(b, b.get_player(), -math.inf, math.inf, 5, None, ab)
+    assert(search.negamax(b, -math.inf, math.inf, 5, None, pvs) == (v, m))
+    nodes_ab += ab.nodes
+    nodes_pvs += pvs.nodes
+
+  # and fewer nodes
+  assert(nodes_pvs < nodes_ab)
+  print("passed")
+
+
+def test_move_ordering():
+  print("TESTING MOVE ORDERING")
+  nodes = {'shuffle': 0, 'dynamic': 0}
+  rng = random.Random(5)
+  for k in range(20):
+    b = board.Board()
+    for j in range(rng.randint(4, 16)):
+      if b.last_move_won() or len(b.generate_moves()) == 0:
+        break
+      b.make_move(rng.choice(b.generate_moves()))
+    if b.last_move_won():
+      continue
+
+    # ordering must not change the value
+    v, m = search.negamax(b, -math.inf, math.inf, 6)
+    assert(search.negamax(b, -math.inf, math.inf, 6, None, None, ordering.MoveOrdering(b.width, b.height))[0] == v)
+
+    result = search.compare_ordering(b, 7)
+    nodes['shuffle'] += result['shuffle']
+    nodes['dynamic'] += result['dynamic']
+  print(nodes)
+  assert(nodes['dynamic'] < nodes['shuffle'])
+  print("passed")
+
+
+def test_evaluate():
+  print("TESTING EVALUATION")
+  b = board.Board()
+  assert(len(evaluate.LINES) == 69)
+  assert(evaluate.evaluate(b) == 0)
+
+  # open three for player 0, player 1 to move
+  for mov in [1, 1, 2, 2, 3]:
+    b.make_move(mov)
+  assert(-1 < evaluate.evaluate(b) < 0)
+
+  # batch scores must equal single scores
+  positions = []
+  for k in range(50):
+    b = board.Board()
+    for j in range(random.randint(0, 30)):
+      if b.last_move_won() or len(b.generate_moves()) == 0:
+        break
+      b.make_move(random.choice(b.generate_moves()))
+    positions.append(evaluate.masks(b))
+  single = [evaluate.evaluate_masks(own, other) for own, other in positions]
+  batch = evaluate.evaluate_batch(positions)
+  for k in range(len(single)):
+    assert(abs(single[k] - batch[k]) < 1e-9)
+
+  # heuristic never hides a forced win
+  b = board.Board()
+  for mov in [0, 1, 0, 1, 0, 1]:
+    b.make_move(mov)
+  assert(search.negamax(b, -math.inf, math.inf, 3, None, None, None, evaluate.evaluate_batch) == (1, 0))
+  print("passed")
+
+
+def test_parallel_find_win():
+  print("TESTING PARALLEL FIND_WIN")
+  b = board.Board()
+  assert(parallel.find_win(b, 6, 2) == search.find_win(b, 6))
+  b.make_move(0)
+  b.make_move(1)
+  b.make_move(0)
+  b.make_move(1)
+  b.make_move(0)
+  b.make_move(1)
+  assert(parallel.find_win(b, 3, 2) == "WIN BY PLAYING 0")
+
+  # same answers as the serial search on random positions
+  for k in range(10):
+    b = board.Board()
+    for j in range(random.randint(0, 16)):
+      if b.last_move_won() or len(b.generate_moves()) == 0:
+        break
+      b.make_move(random.choice(b.generate_moves()))
+    if not b.last_move_won():
+      assert(parallel.find_win(b, 5, 2) == search.find_win(b, 5))
+
+      # workers rebuild a decoded board from its key
+      c = board.Board.from_key(b.key())
+      assert(parallel.find_win(c, 5, 2) == search.find_win(b, 5))
+
+  # every root move of the decoded position is searched, the empty board would not lose
+  b = board.Board.from_key(board.Board.from_moves('727364').key())
+  assert(parallel.find_win(b, 3, 2) == search.find_win(b, 3) == 'ALL MOVES LOSE')
+  print("passed")
+
+
+def test_iterative_deepening():
+  print("TESTING ITERATIVE DEEPENING")
+  b = board.Board()
+  init_str = str(b)
+
+  # budget exhausted in the middle of an iteration must leave the board untouched
+  v, m, d = search.iterative_deepening(b, node_limit = 2000)
+  assert(m in b.generate_moves() and d > 0)
+  assert(init_str == str(b) and b.hash == 0)
+  v, m, d = search.iterative_deepening(b, time_limit = 0.1)
+  assert(init_str == str(b))
+
+  # a win in one is found by the first iteration
+  for mov in [0, 1, 0, 1, 0, 1]:
+    b.make_move(mov)
+  assert(search.iterative_deepening(b, time_limit = 1.0) == (1, 0, 1))
+
+  # players accept a budget instead of a fixed depth
+  p = computer.Player(node_limit = 1000)
+  for mov in [0, 1, 0, 1, 0, 1]:
+    p.make_move(mov)
+  assert(p.get_move() == 0)
+  print("passed")
+
+
+def test_opening_book():
+  print("TESTING OPENING BOOK")
+  with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, 'book.bin')
+    n = book.build(path, 2, 3)
+
+    # no transpositions within two plies
+    assert(n == 1 + 7 + 7 * 7)
+
+    b = board.Board()
+    with book.OpeningBook(path) as bk:
+      assert(len(bk) == n)
+      for mov in [None, 3, 4]:
+        if mov is not None:
+          b.make_move(mov)
+        m, score = bk.lookup(b)
+        assert(m in b.generate_moves())
+        v = search.negamax(b, -math.inf, math.inf, 3, None, None, None, evaluate.evaluate_batch)[0]
+        assert(score == round(v * 100))
+      b.make_move(4)
+      assert(bk.lookup(b) is None)
+
+    p = computer.Player(book = path)
+    with book.OpeningBook(path) as bk:
+      assert(p.get_move() == bk.lookup(board.Board())[0])
+  print("passed")
+
+
+def test_tablebase():
+  print("TESTING ENDGAME TABLEBASE")
+  with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, 'tablebase.bin')
+
+    # play random games down to 12 empty cells and use them as roots
+    roots = []
+    while len(roots) < 3:
+      b = board.Board()
+      while b.empty_cells() > 12 and not b.last_move_won():
+        b.make_move(random.choice(b.generate_moves()))
+      if not b.last_move_won():
+        roots.append(tuple(b.moves))
+    n = tablebase.build(path, 8, roots)
+
+    with tablebase.Tablebase(path) as tb:
+      assert(tb.k == 8 and len(tb) == n)
+      for moves in roots:
+        b = board.Board()
+        for mov in moves:
+          b.make_move(mov)
+        assert(tb.probe(b) is None)
+
+        # walk down into the tablebase
+        while b.empty_cells() > 6 and not b.last_move_won() and len(b.generate_moves()) > 0:
+          b.make_move(random.choice(b.generate_moves()))
+        if b.last_move_won() or len(b.generate_moves()) == 0:
+          continue
+        result, distance, mov = tb.probe(b)
+
+        # exact result matches a full depth search, and depth limited searches agree with or without the tablebase
+        # a won position is answered with the tablebase move once the depth reaches the win, other winning moves may come first without it
+        assert(search.negamax(b, -math.inf, math.inf, b.empty_cells())[0] == result)
+        for depth in range(1, b.empty_cells() + 1):
+          if result == 1 and depth >= distance:
+            assert(search.find_win(b, depth, None, tb) == 'WIN BY PLAYING ' + str(mov))
+            assert(search.find_win(b, depth).startswith('WIN BY PLAYING '))
+          elif result == 1:
+            assert(search.find_win(b, depth, None, tb) == search.find_win(b, depth) == 'NO FORCED WIN IN ' + str(depth) + ' MOVES')
+          else:
+            assert(search.find_win(b, depth) == search.find_win(b, depth, None, tb))
+  print("passed")
+
+
+def test_tournament():
+  print("TESTING TOURNAMENT")
+  result = tournament.run([random_player.Player, (computer.Player, {'depth': 2})], 6, 2)
+  summary = result['summary']
+  assert(len(result['records']) == 6)
+
+  # colors alternate
+  assert([r['first'] for r in result['records']] == [0, 1, 0, 1, 0, 1])
+  assert(summary['games'] == [6, 6])
+  assert(summary['score'][0] + summary['score'][1] == 6)
+  assert(summary['score'][1] > summary['score'][0])
+  assert(summary['elo'][1] > 0 > summary['elo'][0])
+  assert(abs(sum(summary['elo'])) < 1e-6)
+  for r in result['records']:
+    assert(len(r['latency'][r['first']]) == (len(r['moves']) + 1) // 2)
+  print(tournament.report(result))
+  print("passed")
+
+
+def test_benchmark():
+  print("TESTING BENCHMARK")
+  for backend in ('bitboard', 'graph'):
+    assert(benchmark.make_unmake(backend, 20, 1) > 0)
+    assert(benchmark.board_memory(backend) > 0)
+  assert(benchmark.perft_speed((0, 2, 0), 3, 1) > 0)
+  assert(len(benchmark.find_win_latency(3, 5)) == 5)
+  assert(benchmark.percentile([3, 1, 2], 50) == 2)
+
+  baseline = {'speed': benchmark.metric(100.0, 'nodes/s', 'higher'), 'time': benchmark.metric(1.0, 's', 'lower')}
+  assert(benchmark.compare(baseline, baseline) == [])
+  slower = {'speed': benchmark.metric(85.0, 'nodes/s', 'higher'), 'time': benchmark.metric(1.05, 's', 'lower')}
+  assert([r[0] for r in benchmark.compare(slower, baseline, 0.1)] == ['speed'])
+  assert([r[0] for r in benchmark.compare(slower, baseline, 0.01)] == ['speed', 'time'])
+  print("passed")
+
+
+def test_search_stats():
+  print("TESTING SEARCH STATS")
+  b = board.Board()
+  for m in [3, 3, 2, 4]:
+    b.make_move(m)
+  stats = search.SearchStats()
+  assert(search.find_win(b, 6, None, None, stats) == search.find_win(b, 6))
+  r = stats.result()
+  assert(r['nodes_per_ply'][0] == 1 and len(r['nodes_per_ply']) == 7)
+  assert(r['nodes'] == sum(r['nodes_per_ply']))
+  assert(0 < r['cutoff_rate'] <= 1 and 0 < r['first_move_cutoff_rate'] <= 1)
+  assert(1 < r['branching_factor'] < 7)
+  assert(len(r['iterations']) == 1 and r['iterations'][0]['depth'] == 6)
+
+  # every node counted by the budget is counted by the statistics
+  limits = search.Limits()
+  stats = search.SearchStats()
+  stats.begin_iteration(b, 5)
+  search.negamax(b, -math.inf, math.inf, 5, None, limits, None, None, None, stats)
+  assert(stats.result()['nodes'] >= limits.nodes)
+
+  log = []
+  p = computer.Player(2, None, 2000, True, None, None, False, log.append)
+  p.make_move(3)
+  m = p.get_move()
+  assert(len(log) == 1 and p.stats is log[0])
+  assert(log[0]['move'] == m and log[0]['source'] == 'search' and log[0]['ply'] == 1)
+  assert([it['depth'] for it in log[0]['iterations']] == list(range(1, len(log[0]['iterations']) + 1)))
+  assert(computer.Player().stats is None)
+  print(r)
+  print("passed")
+
+
+def test_pondering():
+  print("TESTING PONDERING")
+  games = []
+  for ponder in (False, True):
+    log = []
+    players = [computer.Player(4, None, None, True, None, None, False, log.append, ponder), computer.Player(3, heuristic = True)]
+    b = board.Board()
+    i = 0
+    while not b.last_move_won() and len(b.generate_moves()) > 0:
+      move = players[i].get_move()
+      for p in players:
+        p.make_move(move)
+      b.make_move(move)
+      i ^= 1
+    players[0].close()
+    games.append((list(b.moves), [entry['source'] for entry in log]))
+
+  # same moves with and without pondering, the opponent searching one ply shallower is always predicted
+  assert(games[0][0] == games[1][0])
+  assert(games[1][1][0] == 'search' and set(games[1][1][1:]) == {'ponder'})
+
+  # wrong prediction cancels pondering
+  p = computer.Player(4, None, None, True, None, None, False, None, True)
+  move = p.get_move()
+  p.make_move(move)
+  p.receive_pondering("reply")
+  p.make_move(p.pondering["reply"] ^ 1)
+  assert(p.pondering is None)
+  p.get_move()
+  p.close()
+  assert(p.pondering is None)
+
+  # tournament games close their players
+  players = []
+  class Pondering(computer.Player):
+    def __init__(self):
+      computer.Player.__init__(self, 4, ponder = True)
+      players.append(self)
+  tournament.play_game((0, 1, (Pondering, {}), (Pondering, {}), 0))
+  assert([p.pondering for p in players] == [None, None])
+
+  # player classes do not need a close() method
+  class Unclosable:
+    def __init__(self):
+      self.player = random_player.Player()
+    def make_move(self, move):
+      self.player.make_move(move)
+    def get_move(self):
+      return self.player.get_move()
+  record = tournament.play_game((0, 1, (Unclosable, {}), (random_player.Player, {}), 0))
+  assert(len(record['moves']) > 0)
+  print("passed")
+
+
+def test_mcts():
+  print("TESTING MCTS")
+  # takes an immediate win and blocks an immediate loss
+  p = mcts.Player(1.0, 2000, 1, 64, 1)
+  for m in [0, 1, 0, 1, 0]:
+    p.make_move(m)
+  assert(p.get_move() == 0)
+  p = mcts.Player(1.0, 2000, 1, 64, 1)
+  for m in [0, 1, 0, 1, 0, 2]:
+    p.make_move(m)
+  assert(p.get_move() == 0)
+
+  # tree of the position after both moves is reused
+  p = mcts.Player(1.0, 1000, 1, 64, 1)
+  move = p.get_move()
+  p.make_move(move)
+  reply = max(p.root.children.values(), key = lambda child: child.visits).move
+  visits = p.root.children[reply].visits
+  p.make_move(reply)
+  assert(p.root is not None and p.root.visits == visits > 0)
+
+  # finished game has no move
+  p = mcts.Player(1.0, 100, 1, 64, 1)
+  for m in [0, 1, 0, 1, 0, 1, 0]:
+    p.make_move(m)
+  assert(p.get_move() == -1 and p.last_playouts == 0)
+
+  # rollouts in a process pool
+  with mcts.Player(1.0, 512, 2, 128, 1) as p:
+    move = p.get_move()
+    assert(p.last_playouts == 512 and p.root.visits == 512 and move in range(7))
+  assert(p.pool is None)
+
+  result = tournament.run([random_player.Player, (mcts.Player, {'playouts': 300})], 4, 2)
+  assert(result['summary']['score'][1] >= 3)
+  print("passed")
+
+
+def test_board_copy():
+  print("TESTING BOARD COPY")
+  b = board.Board()
+  assert(not hasattr(b, '__dict__'))
+  for m in [3, 3, 3, 3, 3, 3, 2]:
+    b.make_move(m)
+  assert(b.legal_moves() == (0, 1, 2, 4, 5, 6) and b.generate_moves() == list(b.legal_moves()))
+
+  # copies do not share state
+  for c in (b.copy(), pickle.loads(pickle.dumps(b))):
+    assert(c.moves == b.moves and c.position == b.position and c.hash == b.hash and c.legal == b.legal and str(c) == str(b))
+    c.make_move(1)
+    assert(len(c.moves) == len(b.moves) + 1 and c.position != b.position)
+    c.unmake_last_move()
+    c.unmake_last_move()
+    c.unmake_last_move()
+    assert(c.legal == board.ALL_MOVES)
+  assert(b.legal_moves() == (0, 1, 2, 4, 5, 6))
+
+  g = board.Board('graph')
+  for m in b.moves:
+    g.make_move(m)
+  c = g.copy()
+  assert(c.backend == 'graph' and str(c) == str(b) and c.legal_moves() == b.legal_moves())
+  print("passed")
+
+
+def test_position_io():
+  print("TESTING POSITION ENCODING")
+  rng = random.Random(5)
+  boards = [board.Board()]
+  for i in range(200):
+    b = board.Board()
+    for j in range(rng.randint(1, 41)):
+      b.make_move(rng.choice(b.generate_moves()))
+      if b.last_move_won():
+        break
+    boards.append(b)
+
+  keys = set()
+  for b in boards:
+    for c in (board.Board.from_moves(b.moves), board.Board.from_moves(b.move_string())):
+      assert(c.moves == b.moves and c.position == b.position and c.hash == b.hash and c.legal == b.legal)
+      assert(c.player == b.player and c.lmw == b.lmw and c.current_state == b.current_state)
+    for c in (board.Board.from_key(b.key()), board.Board.from_record(b.record())):
+      assert(c.position == b.position and c.hash == b.hash and c.legal == b.legal and c.lmw == b.lmw and c.player == b.player)
+      assert(c.moves == [] and c.stones() == len(b.moves) and c.empty_cells() == b.empty_cells())
+    assert(b.key() < 1 << 49 and len(b.record()) == 8)
+    keys.add(b.key())
+  assert(len(keys) == len(set(b.hash for b in boards)))
+
+  g = board.Board('graph')
+  for m in boards[5].moves:
+    g.make_move(m)
+  assert(g.key() == boards[5].key())
+
+  try:
+    board.Board.from_moves('1111111')
+    assert(False)
+  except ValueError:
+    pass
+
+  # decoded boards have no move history, only moves made after decoding are taken back
+  c = board.Board.from_key(board.Board.from_moves('21').key())
+  c.unmake_last_move()
+  assert(c.position == board.Board.from_moves('21').position and c.player == 0)
+  c.make_move(3)
+  c.unmake_last_move()
+  assert(c.position == board.Board.from_moves('21').position and c.stones() == 2)
+  try:
+    c.move_string()
+    assert(False)
+  except ValueError:
+    pass
+
+  with tempfile.TemporaryDirectory() as d:
+    for binary in (True, False):
+      path = os.path.join(d, 'positions')
+      with position_io.PositionWriter(path, binary) as w:
+        for b in boards:
+          w.write(b)
+      assert(w.count == len(boards))
+      assert(list(position_io.read_keys(path)) == [b.key() for b in boards])
+      assert([c.hash for c in position_io.read_positions(path)] == [b.hash for b in boards])
+
+    # binary to text: positions without moves cannot be written as move strings, the empty board can
+    binary, text = os.path.join(d, 'positions.bin'), os.path.join(d, 'positions.txt')
+    with position_io.PositionWriter(binary) as w:
+      for b in boards:
+        w.write(b)
+    with position_io.PositionWriter(text, False) as w:
+      for c in position_io.read_positions(binary):
+        try:
+          w.write(c)
+          assert(c.stones() == 0)
+        except ValueError:
+          assert(c.stones() > 0)
+    assert(list(position_io.read_keys(text)) == [board.Board().key()])
+
+    # board size is kept in the file: binary header or '#size' line of a text file
+    for width, height, connect, binary in ((8, 7, 4, True), (8, 7, 4, False), (9, 7, 5, False), (5, 4, 3, True)):
+      sized = []
+      for k in range(20):
+        b = board.Board(None, width, height, connect)
+        for j in range(rng.randint(0, 12)):
+          b.make_move(rng.choice(b.generate_moves()))
+          if b.last_move_won():
+            break
+        sized.append(b)
+      path = os.path.join(d, 'sized')
+      with position_io.PositionWriter(path, binary) as w:
+        for b in sized:
+          w.write(b)
+      assert(position_io.board_size(path) == (width, height, connect))
+      assert(list(position_io.read_keys(path)) == [b.key() for b in sized])
+      for b, c in zip(sized, position_io.read_positions(path)):
+        assert((c.width, c.height, c.connect) == (width, height, connect))
+        assert(c.position == b.position and c.lmw == b.lmw and c.legal == b.legal)
+
+    # boards of another size than the file's are refused
+    with position_io.PositionWriter(path) as w:
+      w.write(board.Board())
+      try:
+        w.write(board.Board(None, 8, 7))
+        assert(False)
+      except ValueError:
+        pass
+  print("passed")
+
+
+def test_symmetry():
+  print("TESTING SYMMETRY")
+  rng = random.Random(7)
+  for k in range(50):
+    b = board.Board()
+    for j in range(rng.randint(0, 15)):
+      b.make_move(rng.choice(b.generate_moves()))
+      if b.last_move_won():
+        b.unmake_last_move()
+        break
+    m = board.Board.from_moves([6 - x for x in b.moves])
+    assert(b.canonical_key() == m.canonical_key() and b.canonical_hash() == m.canonical_hash())
+    assert(b.mirror == m.hash and b.is_symmetric() == (b.key() == board.mirror_key(b.key())))
+
+    # mirrored position shares table entries, moves come back mirrored
+    table = transposition.TranspositionTable(1 << 16)
+    v, mov = search.negamax(b, -math.inf, math.inf, 4, table)
+    assert(table.probe(b.canonical_hash()) is not None)
+    entry = search.probe(table, m)
+    assert(entry[0] == v and entry[3] == 6 - mov)
+
+  # perft counts mirrored subtrees once
+  def count(b, depth):
+    if b.last_move_won() or len(b.generate_moves()) == 0 or depth == 0:
+      return 1
+    n = 0
+    for mov in b.generate_moves():
+      b.make_move(mov)
+      n += count(b, depth - 1)
+      b.unmake_last_move()
+    return n
+  for moves, symmetric in (([], True), ([3], True), ([3, 3], True), ([2, 4], False), ([0, 6, 3], False)):
+    b = board.Board.from_moves(moves)
+    assert(b.is_symmetric() == symmetric)
+    assert(search.perft(board.Board.from_moves(moves), 5) == count(b, 5) == search.perft_hashed(b, 5))
+  print("passed")
+
+
+def test_board_size():
+  print("TESTING BOARD SIZE")
+  assert(type(board.Board(None, 7, 6, 4)) is board.Board)
+
+  # bitboard and graph backends agree on every size
+  rng = random.Random(11)
+  for width, height, connect in ((8, 7, 4), (9, 7, 5), (5, 4, 3)):
+    for k in range(30):
+      b = board.Board(None, width, height, connect)
+      g = board.Board('graph', width, height, connect)
+      while len(b.generate_moves()) > 0 and not b.last_move_won():
+        assert(b.generate_moves() == g.generate_moves())
+        mov = rng.choice(b.generate_moves())
+        b.make_move(mov)
+        g.make_move(mov)
+        assert(b.last_move_won() == g.last_move_won() and b.hash == g.hash)
+      c = board.Board.from_key(b.key(), width, height, connect)
+      assert(c.key() == b.key() and c.last_move_won() == b.last_move_won())
+
+  # perft of a small board, mirrored subtrees counted once
+  def count(b, depth):
+    if b.last_move_won() or len(b.generate_moves()) == 0 or depth == 0:
+      return 1
+    n = 0
+    for mov in b.generate_moves():
+      b.make_move(mov)
+      n += count(b, depth - 1)
+      b.unmake_last_move()
+    return n
+  for moves in ([], [2], [0, 4, 1]):
+    b = board.Board.from_moves(moves, 5, 4, 3)
+    g = board.Board('graph', 5, 4, 3)
+    for mov in moves:
+      g.make_move(mov)
+    assert(search.perft(board.Board.from_moves(moves, 5, 4, 3), 6) == count(b, 6) == search.perft(g, 6))
+  assert(search.perft(board.Board(None, 8, 7, 4), 5) == 8 ** 5)
+
+  # four in a row on a wider board, only five in a row wins with connect 5
+  b = board.Board.from_moves([0, 7, 1, 7, 2, 7], 8, 7, 4)
+  assert(search.find_win(b, 1) == 'WIN BY PLAYING 3')
+  b = board.Board.from_moves([0, 8, 1, 8, 2, 8, 3], 9, 7, 5)
+  assert(not b.last_move_won())
+  b.make_move(8)
+  b.make_move(4)
+  assert(b.last_move_won())
+
+  # player on a wider board blocks the threat
+  p = computer.Player(2, width = 8, height = 7)
+  for mov in [0, 7, 1, 7, 2]:
+    p.make_move(mov)
+  assert(p.get_move() == 3)
+
+  # MCTS takes the win in the eighth column, rollouts in the pool play on the same board size
+  for workers in (1, 2):
+    with mcts.Player(1.0, 600, workers, 64, 1, 8, 7, 4) as p:
+      for mov in [7, 0, 7, 0, 7, 0]:
+        p.make_move(mov)
+      assert(p.get_move() == 7)
+
+  # random games of a 9x7 connect 5 board last longer than a 7x6 board has cells
+  g = board.geometry(9, 7, 5)
+  rng = random.Random(3)
+  lengths = [simulate.playout((0, 0), [0] * 9, 0, rng, g)[1] for k in range(50)]
+  assert(max(lengths) > 42 and max(lengths) <= 63)
+  p = random_player.Player(9, 7, 5)
+  for k in range(63):
+    p.make_move(p.get_move())
+  assert(p.counts == [7] * 9)
+  print("passed")
+
+
+def test_analyze():
+  print("TESTING BATCH ANALYSIS")
+  rng = random.Random(9)
+  lines = []
+  expected = []
+  for i in range(40):
+    b = board.Board()
+    for j in range(rng.randint(4, 20)):
+      b.make_move(rng.choice(b.generate_moves()))
+      if b.last_move_won():
+        b.unmake_last_move()
+        break
+    if i % 2 == 0:
+      lines.append(json.dumps({'id': 'game' + str(i), 'moves': b.moves}))
+      expected.append(('game' + str(i), search.find_win(b, 4)))
+    else:
+      lines.append(b.move_string())
+      expected.append((i, search.find_win(b, 4)))
+  lines.append('1111111')
+  expected.append((40, None))
+
+  with tempfile.TemporaryDirectory() as d:
+    inp = os.path.join(d, 'in.txt')
+    out = os.path.join(d, 'out.jsonl')
+    def results():
+      with open(out) as f:
+        return [(r['id'], r.get('result')) for r in map(json.loads, f)]
+
+    with open(inp, 'w') as f:
+      f.write('\n'.join(lines) + '\n')
+    assert(analyze.analyze(inp, out, 4, 2, 3) == 41)
+    assert(results() == expected)
+    with open(out) as f:
+      assert('error' in json.loads(f.readlines()[-1]))
+
+    analyze.analyze(inp, out, 4, 2, 5, False)
+    assert(sorted(results(), key = str) == sorted(expected, key = str))
+
+    # interrupted job: first half written, checkpoint, then a partial line written after it
+    checkpoint = os.path.join(d, 'checkpoint')
+    with open(inp, 'w') as f:
+      f.write('\n'.join(lines[:20]) + '\n')
+    analyze.analyze(inp, out, 4, 2, 4, False, checkpoint)
+    with open(out, 'a') as f:
+      f.write('{"id": "garbage"')
+    with open(inp, 'a') as f:
+      f.write('\n'.join(lines[20:]) + '\n')
+    assert(analyze.analyze(inp, out, 4, 2, 4, False, checkpoint) == 21)
+    assert(sorted(results(), key = str) == sorted(expected, key = str))
+  print("passed")
+
+
+def test_server():
+  print("TESTING GAME SERVER")
+  async def run():
+    s = server.GameServer(2, 2)
+    port = await s.start('127.0.0.1', 0)
+    try:
+      result = await server.load('127.0.0.1', port, 40, 2, 'computer', 2)
+      assert(result['games'] == 80 and sum(result['results'].values()) == 80)
+      ops = result['latency']
+      assert(ops['new']['requests'] == ops['close']['requests'] == 80)
+      assert(ops['new']['requests'] + ops['move']['requests'] + ops['close']['requests'] == result['requests'])
+      assert(result['move_p50_latency'] == ops['move']['p50'] > ops['close']['p50'])
+
+      # errors are replied, connection stays usable
+      reader, writer = await asyncio.open_connection('127.0.0.1', port)
+      async def call(msg):
+        writer.write((json.dumps(msg) + '\n').encode())
+        return json.loads(await reader.readline())
+      game = await call({'op': 'new', 'first': 'server', 'depth': 2})
+      assert(len(game['moves']) == 1 and game['result'] is None)
+      assert('error' in await call({'op': 'move', 'game': game['game'], 'move': 9}))
+      assert('error' in await call({'op': 'new', 'depth': 99}))
+      assert('error' in await call({'op': 'move', 'game': 12345, 'move': 0}))
+      reply = await call({'op': 'move', 'game': game['game'], 'move': 3})
+      assert(len(reply['moves']) == 3 and reply['move'] == reply['moves'][2])
+      stats = await call({'op': 'stats'})
+      assert(stats['open_games'] == 1 and stats['errors'] == 3)
+
+      # another connection cannot play or close the game
+      reader2, writer2 = await asyncio.open_connection('127.0.0.1', port)
+      for msg in ({'op': 'move', 'game': game['game'], 'move': 0}, {'op': 'close', 'game': game['game']}):
+        writer2.write((json.dumps(msg) + '\n').encode())
+        assert('error' in json.loads(await reader2.readline()))
+      writer2.close()
+      assert((await call({'op': 'stats'}))['open_games'] == 1)
+      writer.close()
+      return result
+    finally:
+      await s.close()
+  result = asyncio.run(run())
+  print(result)
+  print("passed")
+
+
+def test_solver():
+  print("TESTING SOLVER")
+
+  # exact score by full search: a win with the n-th stone of the winner scores cells / 2 + 1 - n
+  def score(b):
+    cells = b.width * b.height
+    best = None
+    for mov in b.generate_moves():
+      b.make_move(mov)
+      if b.last_move_won():
+        v = (cells + 2 - len(b.moves)) // 2
+      elif len(b.moves) == cells:
+        v = 0
+      else:
+        v = -score(b)
+      b.unmake_last_move()
+      if best is None or v > best:
+        best = v
+    return best
+
+  rng = random.Random(13)
+  s = solver.Solver()
+  for width, height, connect, played in ((4, 4, 3, 6), (5, 4, 4, 10), (4, 3, 3, 2)):
+    for k in range(15):
+      b = board.Board(None, width, height, connect)
+      for j in range(played + rng.randint(0, 4)):
+        b.make_move(rng.choice(b.generate_moves()))
+        if b.last_move_won():
+          b.unmake_last_move()
+          break
+      v = score(b)
+      assert(s.solve(b) == v)
+      assert(s.solve(b, True) == (v > 0) - (v < 0))
+      v, mov = s.best_move(b)
+      b.make_move(mov)
+      assert(b.last_move_won() or -score(b) == v)
+
+  # immediate win and loss
+  b = board.Board.from_moves('112233')
+  assert(s.solve(b) == 18 and s.plies(b, 18) == 1 and s.best_move(b) == (18, 3))
+  b = board.Board.from_moves('27374')
+  assert(s.plies(b, s.solve(b)) == 2)
+
+  # mid-game position, mirror image and graph backend give the same score
+  moves = '2264575446722627'
+  b = board.Board.from_moves(moves)
+  v = s.solve(b)
+  assert(v == -3 and s.plies(b, v) == 22)
+  assert(s.solve(board.Board.from_moves(''.join(str(8 - int(c)) for c in moves))) == v)
+  g = board.Board('graph')
+  for c in moves:
+    g.make_move(int(c) - 1)
+  assert(s.solve(g) == v)
+
+  # 12 ply position solves in about a second, a solve over its node limit gives up and leaves the solver usable
+  b = board.Board.from_moves('333557752147')
+  start = time.perf_counter()
+  v = s.solve(b)
+  print("12 ply solve: %.2f s" % (time.perf_counter() - start))
+  assert(v == 6 and s.plies(b, v) == 19)
+  limited = solver.Solver(None, solver.TABLE_SIZE, 10000)
+  try:
+    limited.solve(board.Board.from_moves('3756157124'))
+    assert(False)
+  except search.SearchTimeout:
+    pass
+  assert(limited.nodes == 10001)
+  assert(limited.best_move(board.Board.from_moves('112233')) == (18, 3))
+
+  # batch analysis in solver mode
+  with tempfile.TemporaryDirectory() as d:
+    inp = os.path.join(d, 'in.txt')
+    out = os.path.join(d, 'out.jsonl')
+    with open(inp, 'w') as f:
+      f.write('112233\n27374\n')
+    assert(analyze.analyze(inp, out, None, 2) == 2)
+    with open(out) as f:
+      results = [json.loads(line) for line in f]
+    assert([(r['score'], r['plies'], r['move']) for r in results] == [(18, 1, 3), (-18, 2, 3)])
+  print("passed")
+
+
 def test_Q4():
   players = [computer.Player(), Player.Player()]
   random.shuffle(players)
@@ -104,7 +1046,31 @@ def test_Q4():
     print("DRAW")
 
 #test_Q1()
+#test_backends()
+#test_board_copy()
+#test_position_io()
+#test_simulate()
 #test_Q2()
+#test_parallel_perft()
+#test_perft_hashed()
+#test_symmetry()
+#test_board_size()
 #test_Q3()
+#test_negamax()
+#test_move_ordering()
+#test_evaluate()
+#test_parallel_find_win()
+#test_analyze()
+#test_transposition()
+#test_iterative_deepening()
+#test_opening_book()
+#test_tablebase()
+#test_tournament()
+#test_server()
+#test_solver()
+#test_benchmark()
+#test_search_stats()
+#test_pondering()
+#test_mcts()
 test_Q4()
 
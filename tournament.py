@@ -0,0 +1,244 @@
+'''
+=====================================================================================================================================================
+FILE		: tournament.py
+DESCRIPTION	: plays many games between player classes in a process pool and reports scores and Elo ratings
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+import board
+import random
+import math
+import time
+import os
+import concurrent.futures
+
+#Confidence intervals are reported at 95%
+Z = 1.96
+
+#======================================================== SECTION: MAIN FUNCTIONS ===================================================================
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: run
+#PARAMETERS	: entrants (list of player classes or (class, constructor keyword arguments) pairs), games (games per pair of entrants),
+#		  workers (number of processes, defaults to number of cores), seed
+#DESCRIPTION	: plays every entrant against every other one, colors alternate between games of a pair
+#RETURNS	: dictionary with entrant names, game records and summary (see summarize())
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def run(entrants, games, workers = None, seed = 0):
+
+	entrants = [e if isinstance(e, tuple) else (e, {}) for e in entrants]
+	names = entrant_names(entrants)
+
+	tasks = []
+	for i in range(len(entrants)):
+		for j in range(i + 1, len(entrants)):
+			for g in range(games):
+				#even games: i plays first, odd games: j plays first
+				first, second = (i, j) if g % 2 == 0 else (j, i)
+				tasks.append((first, second, entrants[first], entrants[second], seed + len(tasks)))
+
+	if workers is None:
+		workers = os.cpu_count() or 1
+
+	records = []
+	with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+		for record in pool.map(play_game, tasks):
+			records.append(record)
+
+	return {'names': names, 'records': records, 'summary': summarize(len(entrants), records)}
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: play_game
+#PARAMETERS	: task (index of first player, index of second player, first entrant, second entrant, random seed)
+#DESCRIPTION	: plays one game in a worker process. A player making an illegal move loses the game
+#		  Players with a close() method are closed when the game ends
+#RETURNS	: dictionary with players, winner (index or -1 for a draw), moves and time of every get_move() call of both players
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def play_game(task):
+
+	first, second, entrant1, entrant2, seed = task
+	random.seed(seed)
+
+	players = [entrant1[0](**entrant1[1]), entrant2[0](**entrant2[1])]
+	index = [first, second]
+	latency = [[], []]
+	moves = []
+
+	b = board.Board()
+	winner = -1
+	i = 0
+
+	#Players are closed however the game ends, a pondering player would leave its search process running
+	try:
+		while not b.last_move_won() and len(b.generate_moves()) > 0:
+			start = time.perf_counter()
+			move = players[i].get_move()
+			latency[i].append(time.perf_counter() - start)
+
+			if move not in b.generate_moves():
+				winner = index[i ^ 1]
+				break
+
+			for p in players:
+				p.make_move(move)
+			b.make_move(move)
+			moves.append(move)
+
+			if b.last_move_won():
+				winner = index[i]
+			i ^= 1
+	finally:
+		for p in players:
+			close = getattr(p, 'close', None)
+			if close is not None:
+				close()
+
+	return {'first': first, 'second': second, 'winner': winner, 'moves': moves, 'latency': {first: latency[0], second: latency[1]}}
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: report
+#PARAMETERS	: result (returned by run())
+#DESCRIPTION	: formats scores, Elo ratings with confidence intervals, move latency and the pairwise score table
+#RETURNS	: string
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def report(result):
+
+	names = result['names']
+	summary = result['summary']
+	width = max(len(n) for n in names) + 4
+
+	lines = ['name'.ljust(width) + 'games\tscore\telo\t95% ci\tmean ms\tp99 ms']
+	ranking = sorted(range(len(names)), key = lambda i: -summary['elo'][i])
+	for i in ranking:
+		lines.append(names[i].ljust(width) + '%d\t%.1f\t%.0f\t+-%.0f\t%.2f\t%.2f' % (summary['games'][i], summary['score'][i], summary['elo'][i], summary['elo_ci'][i], summary['mean_latency'][i] * 1000, summary['p99_latency'][i] * 1000))
+
+	lines.append('')
+	lines.append(''.ljust(width) + '\t'.join(str(i) for i in range(len(names))))
+	for i in range(len(names)):
+		row = []
+		for j in range(len(names)):
+			row.append('-' if i == j else '%.1f' % summary['pair_score'][i][j])
+		lines.append((str(i) + ' ' + names[i]).ljust(width) + '\t'.join(row))
+
+	return '\n'.join(lines)
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
+
+#======================================================== SECTION: HELPER FUNCTIONS =================================================================
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: entrant_names
+#PARAMETERS	: entrants (list of (class, keyword arguments) pairs)
+#DESCRIPTION	: names entrants by module, class and non-default arguments
+#RETURNS	: list of names
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def entrant_names(entrants):
+	names = []
+	for cls, kwargs in entrants:
+		name = cls.__module__ + '.' + cls.__name__
+		if kwargs:
+			name += '(' + ', '.join(k + '=' + str(kwargs[k]) for k in sorted(kwargs)) + ')'
+		names.append(name)
+	return names
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: summarize
+#PARAMETERS	: n (number of entrants), records (game records)
+#DESCRIPTION	: computes scores (win 1, draw 0.5), Elo ratings fitted to all games with mean 0, confidence intervals and latency
+#RETURNS	: dictionary of lists indexed by entrant
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def summarize(n, records):
+
+	games = [0] * n
+	score = [0.0] * n
+	pair_score = [[0.0] * n for i in range(n)]
+	pair_games = [[0] * n for i in range(n)]
+	results = [[] for i in range(n)]
+	latency = [[] for i in range(n)]
+
+	for r in records:
+		for me, other in ((r['first'], r['second']), (r['second'], r['first'])):
+			s = 0.5 if r['winner'] == -1 else (1.0 if r['winner'] == me else 0.0)
+			games[me] += 1
+			score[me] += s
+			pair_score[me][other] += s
+			pair_games[me][other] += 1
+			results[me].append(s)
+			latency[me].extend(r['latency'][me])
+
+	elo = fit_elo(n, pair_score, pair_games)
+
+	#Confidence interval from the standard error of the mean game score, converted to Elo at that score
+	elo_ci = []
+	for i in range(n):
+		if games[i] < 2:
+			elo_ci.append(math.inf)
+			continue
+		mean = score[i] / games[i]
+		p = min(max(mean, 0.01), 0.99)
+
+		#a perfect score has no sample variance, binomial variance at the clamped score is used as a floor
+		var = sum((s - mean) ** 2 for s in results[i]) / (games[i] - 1)
+		var = max(var, p * (1 - p))
+		se = math.sqrt(var / games[i])
+		elo_ci.append(Z * se * 400 / (math.log(10) * p * (1 - p)))
+
+	mean_latency = [sum(l) / len(l) if l else 0.0 for l in latency]
+	p99_latency = [sorted(l)[min(len(l) - 1, int(0.99 * len(l)))] if l else 0.0 for l in latency]
+
+	return {
+		'games': games,
+		'score': score,
+		'pair_score': pair_score,
+		'elo': elo,
+		'elo_ci': elo_ci,
+		'mean_latency': mean_latency,
+		'p99_latency': p99_latency,
+	}
+#____________________________________________________________________________________________________________________________________________________
+
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+#NAME		: fit_elo
+#PARAMETERS	: n, pair_score, pair_games
+#DESCRIPTION	: finds ratings whose expected scores match actual scores (maximum likelihood, Bradley-Terry model)
+#		  Half a draw is added to every pair so that perfect scores still give finite ratings
+#RETURNS	: list of ratings with mean 0
+#----------------------------------------------------------------------------------------------------------------------------------------------------
+
+def fit_elo(n, pair_score, pair_games):
+
+	elo = [0.0] * n
+	for iteration in range(1000):
+		change = 0.0
+		for i in range(n):
+			actual, expected, weight = 0.0, 0.0, 0.0
+			for j in range(n):
+				g = pair_games[i][j]
+				if i == j or g == 0:
+					continue
+				e = 1 / (1 + 10 ** ((elo[j] - elo[i]) / 400))
+				actual += pair_score[i][j] + 0.25
+				expected += (g + 0.5) * e
+				weight += (g + 0.5) * e * (1 - e)
+			if weight > 0:
+				step = (actual - expected) / weight * 400 / math.log(10)
+				elo[i] += step
+				change = max(change, abs(step))
+
+		mean = sum(elo) / n
+		elo = [e - mean for e in elo]
+		if change < 0.01:
+			break
+
+	return elo
+#____________________________________________________________________________________________________________________________________________________
+#======================================================== SECTION END ===============================================================================
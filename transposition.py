@@ -0,0 +1,142 @@
+'''
+=====================================================================================================================================================
+FILE		: transposition.py
+DESCRIPTION	: fixed size transposition table used by the search functions
+AUTHOR		: Rohit Rane
+EmAIL		: rrrane@indiana.edu
+=====================================================================================================================================================
+'''
+
+#Flags describing how a stored value relates to the true value of the position
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+#Default number of entries
+DEFAULT_SIZE = 1 << 20
+
+class TranspositionTable:
+
+	#================================================== SECTION: CONSTRUCTORS ===================================================================
+	def __init__(self, size = DEFAULT_SIZE):
+
+		#Round size up to a power of two so that a key can be mapped to a slot with a mask
+		n = 1
+		while n < size:
+			n <<= 1
+		self.size = n
+		self.mask = n - 1
+
+		#Entries are stored in parallel lists allocated once, so the table never grows
+		#keys[i] is None for an empty slot
+		self.keys = [None] * n
+		self.values = [0] * n
+		self.depths = [0] * n
+		self.flags = [EXACT] * n
+		self.moves = [-1] * n
+		self.ages = [0] * n
+
+		#Age of the current search, entries from older searches are replaced first
+		self.age = 0
+
+		#Counters
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
+		self.overwrites = 0
+		self.rejected = 0
+		pass
+	#================================================== SECTION END =============================================================================
+
+	#================================================== SECTION: FUNCTIONS ======================================================================
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: new_search
+	#PARAMETERS	: none
+	#DESCRIPTION	: starts a new search, entries stored before this call become 'old'
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def new_search(self):
+		self.age += 1
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: probe
+	#PARAMETERS	: key (position hash)
+	#DESCRIPTION	: looks up a position
+	#RETURNS	: (value, depth, flag, move) if position is stored and None otherwise
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def probe(self, key):
+		i = key & self.mask
+		if self.keys[i] == key:
+			self.hits += 1
+			return self.values[i], self.depths[i], self.flags[i], self.moves[i]
+
+		self.misses += 1
+		return None
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: store
+	#PARAMETERS	: key, value, depth, flag, move, replace (always overwrite the slot)
+	#DESCRIPTION	: stores a search result
+	#		  An entry for a different position is overwritten only if it comes from an older search or was searched less deep,
+	#		  unless replace is set
+	#RETURNS	: True if the result was stored and False otherwise
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def store(self, key, value, depth, flag, move, replace = False):
+		i = key & self.mask
+		old = self.keys[i]
+
+		if old is not None and old != key:
+			if not replace and self.ages[i] == self.age and self.depths[i] > depth:
+				self.rejected += 1
+				return False
+			self.overwrites += 1
+
+		self.keys[i] = key
+		self.values[i] = value
+		self.depths[i] = depth
+		self.flags[i] = flag
+		self.moves[i] = move
+		self.ages[i] = self.age
+		self.stores += 1
+		return True
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: clear
+	#PARAMETERS	: none
+	#DESCRIPTION	: removes all entries and resets counters
+	#RETURNS	: none
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def clear(self):
+		self.__init__(self.size)
+	#____________________________________________________________________________________________________________________________________________
+
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+	#NAME		: stats
+	#PARAMETERS	: none
+	#DESCRIPTION	: returns table counters
+	#RETURNS	: dictionary of counters
+	#--------------------------------------------------------------------------------------------------------------------------------------------
+
+	def stats(self):
+		probes = self.hits + self.misses
+		return {
+			'size': self.size,
+			'hits': self.hits,
+			'misses': self.misses,
+			'hit_rate': (self.hits / probes) if probes > 0 else 0.0,
+			'stores': self.stores,
+			'overwrites': self.overwrites,
+			'rejected': self.rejected,
+			'used': self.size - self.keys.count(None),
+		}
+	#____________________________________________________________________________________________________________________________________________
+
+	#======================================================== SECTION END =======================================================================